@@ -0,0 +1,479 @@
+import numpy as np
+
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT, FPS
+from game_input import INPUT_LEFT, INPUT_RIGHT, INPUT_JUMP
+
+
+class BatchGame:
+    """Steps many headless games at once with NumPy.
+
+    The per-frame hot state (gap offsets/directions/levels, enemy x/direction/lane,
+    player position and velocity, timers, lives and score) lives in arrays of shape
+    (n_envs, ...) and is advanced by one vectorized call per frame. Rare events -
+    level setup, enemy spawns and game over - are delegated to each environment's
+    scalar Game object, which draws from its own seeded random generator.
+
+    Stepping a BatchGame reproduces a headless Game created with the same seed and
+    fed the same inputs, frame for frame.
+    """
+
+    def __init__(self, n_envs):
+        self.n_envs = n_envs
+        self.games = []
+        self._gap_capacity = 0
+        self._enemy_capacity = 0
+        self._allocate(n_envs)
+
+    def _allocate(self, n):
+        # Player
+        self.player_x = np.zeros(n, dtype=np.float64)
+        self.player_y = np.zeros(n, dtype=np.float64)
+        self.velocity_y = np.zeros(n, dtype=np.float64)
+        self.jumping = np.zeros(n, dtype=bool)
+        self.last_direction = np.zeros(n, dtype=np.int64)
+        self.player_animation_frame = np.zeros(n, dtype=np.int64)
+
+        # Game counters
+        self.total_score = np.zeros(n, dtype=np.int64)
+        self.level = np.ones(n, dtype=np.int64)
+        self.lives = np.zeros(n, dtype=np.int64)
+        self.level_transition = np.zeros(n, dtype=bool)
+        self.transition_timer = np.zeros(n, dtype=np.int64)
+        self.score_timer = np.zeros(n, dtype=np.int64)
+        self.invincibility_timer = np.zeros(n, dtype=np.int64)
+        self.enemies_to_spawn = np.zeros(n, dtype=np.int64)
+        self.enemy_spawn_timer = np.zeros(n, dtype=np.int64)
+        self.enemy_spawn_interval = np.zeros(n, dtype=np.int64)
+        self.base_speed = np.zeros(n, dtype=np.float64)
+        self.done = np.ones(n, dtype=bool)
+
+        # Platform bar positions (identical for every game)
+        self.platform_positions = np.zeros(0, dtype=np.float64)
+
+        self._resize_gaps(0)
+        self._resize_enemies(0)
+
+    def _resize_gaps(self, capacity):
+        n = self.n_envs
+        old = self._gap_capacity if hasattr(self, 'gap_mask') else 0
+
+        def grow(name, dtype):
+            new = np.zeros((n, capacity), dtype=dtype)
+            if old:
+                new[:, :old] = getattr(self, name)
+            setattr(self, name, new)
+
+        grow('gap_mask', bool)
+        grow('gap_start', np.float64)
+        grow('gap_width', np.float64)
+        grow('gap_x_offset', np.float64)
+        grow('gap_segment_origin', np.float64)
+        grow('gap_segment_frame', np.int64)
+        grow('gap_direction', np.int64)
+        grow('gap_level', np.int64)
+        grow('gap_vertical_direction', np.int64)
+        grow('gap_original_level', np.int64)
+        grow('gap_speed', np.float64)
+        self._gap_capacity = capacity
+
+    def _resize_enemies(self, capacity):
+        n = self.n_envs
+        old = self._enemy_capacity if hasattr(self, 'enemy_mask') else 0
+
+        def grow(name, dtype):
+            new = np.zeros((n, capacity), dtype=dtype)
+            if old:
+                new[:, :old] = getattr(self, name)
+            setattr(self, name, new)
+
+        grow('enemy_mask', bool)
+        grow('enemy_x', np.float64)
+        grow('enemy_segment_origin', np.float64)
+        grow('enemy_segment_frame', np.int64)
+        grow('enemy_y', np.float64)
+        grow('enemy_width', np.float64)
+        grow('enemy_height', np.float64)
+        grow('enemy_speed', np.float64)
+        grow('enemy_direction', np.int64)
+        grow('enemy_level', np.int64)
+        grow('enemy_vertical_direction', np.int64)
+        grow('enemy_animation_frame', np.int64)
+        self._enemy_capacity = capacity
+
+    # ------------------------------------------------------------------
+    # Scalar <-> array synchronisation
+
+    def _load(self, i):
+        """Copy environment i's Game objects into the arrays"""
+        game = self.games[i]
+        player = game.player
+
+        self.player_x[i] = player.x
+        self.player_y[i] = player.y
+        self.velocity_y[i] = player.velocity_y
+        self.jumping[i] = player.jumping
+        self.last_direction[i] = player.last_direction
+        self.player_animation_frame[i] = player.animation_frame
+
+        self.total_score[i] = game.total_score
+        self.level[i] = game.level
+        self.lives[i] = game.lives
+        self.level_transition[i] = game.level_transition
+        self.transition_timer[i] = game.transition_timer
+        self.score_timer[i] = game.score_timer
+        self.invincibility_timer[i] = game.invincibility_timer
+        self.enemies_to_spawn[i] = game.enemies_to_spawn
+        self.enemy_spawn_timer[i] = game.enemy_spawn_timer
+        self.enemy_spawn_interval[i] = game.enemy_spawn_interval
+        self.base_speed[i] = game.base_speed
+        self.done[i] = game.lives <= 0 or not game.running
+        self.platform_positions = np.asarray(game.platform_positions, dtype=np.float64)
+
+        if len(game.platforms) > self._gap_capacity:
+            self._resize_gaps(len(game.platforms))
+        self.gap_mask[i] = False
+        for j, gap in enumerate(game.platforms):
+            self.gap_mask[i, j] = True
+            self.gap_start[i, j] = gap.gap_start
+            self.gap_width[i, j] = gap.gap_width
+            self.gap_x_offset[i, j] = gap.x_offset
+            self.gap_segment_origin[i, j] = gap.segment_origin
+            self.gap_segment_frame[i, j] = gap.segment_frame
+            self.gap_direction[i, j] = gap.direction
+            self.gap_level[i, j] = gap.gap_current_platform_index
+            self.gap_vertical_direction[i, j] = gap.vertical_direction
+            self.gap_original_level[i, j] = gap.original_platform_index
+            self.gap_speed[i, j] = gap.speed
+
+        self._load_enemies(i)
+
+    def _load_enemies(self, i):
+        game = self.games[i]
+        if len(game.enemies) > self._enemy_capacity:
+            self._resize_enemies(len(game.enemies))
+        self.enemy_mask[i] = False
+        for j, enemy in enumerate(game.enemies):
+            self.enemy_mask[i, j] = True
+            self.enemy_x[i, j] = enemy.x
+            self.enemy_segment_origin[i, j] = enemy.segment_origin
+            self.enemy_segment_frame[i, j] = enemy.segment_frame
+            self.enemy_y[i, j] = enemy.y
+            self.enemy_width[i, j] = enemy.width
+            self.enemy_height[i, j] = enemy.height
+            self.enemy_speed[i, j] = enemy.speed
+            self.enemy_direction[i, j] = enemy.direction
+            self.enemy_level[i, j] = enemy.current_platform_index
+            self.enemy_vertical_direction[i, j] = enemy.vertical_direction
+            self.enemy_animation_frame[i, j] = enemy.animation_frame
+
+    def _store(self, i):
+        """Copy environment i's arrays back into its Game objects"""
+        game = self.games[i]
+        player = game.player
+
+        player.x = self.player_x[i].item()
+        player.y = self.player_y[i].item()
+        player.velocity_y = self.velocity_y[i].item()
+        player.jumping = bool(self.jumping[i])
+        player.last_direction = int(self.last_direction[i])
+        player.animation_frame = int(self.player_animation_frame[i])
+
+        game.total_score = int(self.total_score[i])
+        game.level = int(self.level[i])
+        game.lives = int(self.lives[i])
+        game.level_transition = bool(self.level_transition[i])
+        game.transition_timer = int(self.transition_timer[i])
+        game.score_timer = int(self.score_timer[i])
+        game.invincibility_timer = int(self.invincibility_timer[i])
+        game.enemies_to_spawn = int(self.enemies_to_spawn[i])
+        game.enemy_spawn_timer = int(self.enemy_spawn_timer[i])
+
+        for j, gap in enumerate(game.platforms):
+            gap.x_offset = self.gap_x_offset[i, j].item()
+            gap.segment_origin = self.gap_segment_origin[i, j].item()
+            gap.segment_frame = int(self.gap_segment_frame[i, j])
+            gap.direction = int(self.gap_direction[i, j])
+            gap.vertical_direction = int(self.gap_vertical_direction[i, j])
+            level = int(self.gap_level[i, j])
+            if level != gap.gap_current_platform_index and gap.gap_index is not None:
+                gap.gap_index.move(gap, gap.gap_current_platform_index, level)
+            gap.gap_current_platform_index = level
+
+        for j, enemy in enumerate(game.enemies):
+            enemy.x = self.enemy_x[i, j].item()
+            enemy.segment_origin = self.enemy_segment_origin[i, j].item()
+            enemy.segment_frame = int(self.enemy_segment_frame[i, j])
+            enemy.y = self.enemy_y[i, j].item()
+            enemy.direction = int(self.enemy_direction[i, j])
+            level = int(self.enemy_level[i, j])
+            if enemy.lanes is not None:
+                enemy.lanes.move(enemy, enemy.current_platform_index, level)
+            enemy.current_platform_index = level
+            enemy.vertical_direction = int(self.enemy_vertical_direction[i, j])
+            enemy.animation_frame = int(self.enemy_animation_frame[i, j])
+        game.enemy_lanes.positions_changed()
+
+    def sync(self):
+        """Write the array state of every environment back into self.games"""
+        for i in range(self.n_envs):
+            self._store(i)
+        return self.games
+
+    # ------------------------------------------------------------------
+
+    def reset(self, seeds):
+        """Start a fresh headless game per seed (len(seeds) must equal n_envs)"""
+        # Imported here to avoid a circular import with jumping_jack
+        from jumping_jack import Game
+
+        if len(seeds) != self.n_envs:
+            raise ValueError(f"Expected {self.n_envs} seeds, got {len(seeds)}")
+
+        self.games = [Game(headless=True, seed=seed) for seed in seeds]
+
+        self._resize_gaps(max(len(game.platforms) for game in self.games))
+        self._resize_enemies(max(len(game.enemies) for game in self.games))
+        for i in range(self.n_envs):
+            self._load(i)
+
+    def _setup_level(self, i):
+        self._store(i)
+        self.games[i].setup_level()
+        self._load(i)
+
+    def _in_gap_player(self, center):
+        """Player.check_head_collision/can_land gap test for every gap, shape (n_envs, gaps)"""
+        start = np.mod(self.gap_start + self.gap_x_offset, SCREEN_WIDTH)
+        end = start + self.gap_width
+        c = center[:, None]
+        wraps = end > SCREEN_WIDTH
+        return np.where(wraps,
+                        (c >= start) | (c <= end - SCREEN_WIDTH),
+                        (start <= c) & (c <= end))
+
+    def _in_gap_platform(self, center):
+        """Platform.is_in_gap for every gap, shape (n_envs, gaps)"""
+        start = self.gap_start + self.gap_x_offset
+        end = start + self.gap_width
+        negative = start < 0
+        while negative.any():
+            start = np.where(negative, start + SCREEN_WIDTH, start)
+            end = np.where(negative, end + SCREEN_WIDTH, end)
+            negative = start < 0
+        start = np.mod(start, SCREEN_WIDTH)
+        end = np.mod(end, SCREEN_WIDTH)
+        c = center[:, None]
+        return np.where(end < start,
+                        (c >= start) | (c <= end),
+                        (start <= c) & (c <= end))
+
+    def _lose_life(self, hit):
+        """Apply Game.update's life-loss branch to the environments in mask hit"""
+        self.lives -= hit
+        for i in np.flatnonzero(hit & (self.lives <= 0)):
+            game = self.games[i]
+            game.leaderboard.add_score(game.player_name, int(self.total_score[i]), int(self.level[i]))
+            game.show_leaderboard = True
+        self.player_x[hit] = 100
+        self.player_y[hit] = 370 - 32
+        self.velocity_y[hit] = 0
+        self.jumping[hit] = False
+        self.invincibility_timer[hit] = FPS * 1
+
+    def step(self, actions):
+        """Advance every running environment by one frame.
+
+        actions holds one input bit mask (INPUT_LEFT | INPUT_RIGHT | INPUT_JUMP) per
+        environment. Returns (score_delta, done) arrays.
+        """
+        actions = np.asarray(actions)
+        left = (actions & INPUT_LEFT) != 0
+        right = (actions & INPUT_RIGHT) != 0
+        jump = (actions & INPUT_JUMP) != 0
+        score_before = self.total_score.copy()
+
+        active = ~self.done
+
+        # Level transition screen: jump skips it, otherwise wait 3 seconds
+        in_transition = active & self.level_transition
+        if in_transition.any():
+            skip = in_transition & jump
+            self.transition_timer[in_transition & ~jump] += 1
+            timed_out = in_transition & ~jump & (self.transition_timer >= FPS * 3)
+            for i in np.flatnonzero(skip | timed_out):
+                self.level_transition[i] = False
+                self.games[i].level_transition = False
+                self._setup_level(i)
+            jump = jump & ~skip
+            active = active & ~(in_transition & ~skip)
+
+        self._step_player_input(active, left, right, jump)
+        self._step_gaps(active)
+        self._step_enemies(active)
+        self._step_player_physics(active)
+
+        # Reaching the ceiling completes the level
+        completed = active & (self.player_y <= 0)
+        if completed.any():
+            self.level[completed] += 1
+            self.level_transition[completed] = True
+            self.transition_timer[completed] = 0
+            active = active & ~completed
+
+        self.invincibility_timer[active & (self.invincibility_timer > 0)] -= 1
+        vulnerable = active & (self.invincibility_timer <= 0)
+        if vulnerable.any():
+            self._lose_life(vulnerable & self._crushed())
+            self._lose_life(vulnerable & self._enemy_hit())
+
+        # Score only while off the ground
+        scoring = active & (self.player_y < 370 - 32)
+        self.score_timer[scoring] += 1
+        scored = scoring & (self.score_timer >= FPS)
+        self.total_score[scored] += 10
+        self.score_timer[scored] = 0
+
+        # Progressive enemy spawning
+        spawning = active & (self.enemies_to_spawn > 0)
+        self.enemy_spawn_timer[spawning] += 1
+        due = spawning & (self.enemy_spawn_timer >= self.enemy_spawn_interval)
+        for i in np.flatnonzero(due):
+            self._store(i)
+            self.games[i].spawn_enemy()
+            self._load_enemies(i)
+        self.enemies_to_spawn[due] -= 1
+        self.enemy_spawn_timer[due] = 0
+
+        self.done |= self.lives <= 0
+        return self.total_score - score_before, self.done.copy()
+
+    def _step_player_input(self, active, left, right, jump):
+        jumps = active & jump & ~self.jumping
+        self.velocity_y[jumps] = -11
+        self.jumping[jumps] = True
+
+        moving_left = active & left
+        self.player_x[moving_left] -= 5
+        self.player_x[moving_left & (self.player_x + 20 < 0)] = SCREEN_WIDTH
+        self.last_direction[moving_left] = -1
+        self.player_animation_frame[moving_left] += 1
+
+        moving_right = active & right
+        self.player_x[moving_right] += 5
+        self.player_x[moving_right & (self.player_x > SCREEN_WIDTH)] = -20
+        self.last_direction[moving_right] = 1
+        self.player_animation_frame[moving_right] += 1
+
+        self.last_direction[active & ~left & ~right] = 0
+
+    def _move_to_next_level(self, level, vertical_direction, mask):
+        """Snake-pattern platform change shared by gaps and enemies"""
+        num_levels = len(self.platform_positions)
+        level[mask] += vertical_direction[mask]
+        below = mask & (level < 0)
+        level[below] = 0
+        vertical_direction[below] = 1
+        above = mask & (level >= num_levels)
+        level[above] = num_levels - 1
+        vertical_direction[above] = -1
+
+    def _step_gaps(self, active):
+        moving = active[:, None] & self.gap_mask
+        self.gap_segment_frame[moving] += 1
+        self.gap_x_offset = np.where(
+            moving, self.gap_segment_origin + self.gap_direction * self.gap_speed * self.gap_segment_frame,
+            self.gap_x_offset)
+
+        off_right = moving & (self.gap_direction == 1) & \
+            (self.gap_start + self.gap_x_offset + self.gap_width >= SCREEN_WIDTH)
+        off_left = moving & (self.gap_direction == -1) & (self.gap_start + self.gap_x_offset <= 0)
+        wrapped = off_right | off_left
+        if wrapped.any():
+            self._move_to_next_level(self.gap_level, self.gap_vertical_direction, wrapped)
+            self.gap_x_offset[off_right] = (SCREEN_WIDTH - self.gap_start - self.gap_width)[off_right]
+            self.gap_direction[off_right] = -1
+            self.gap_x_offset[off_left] = -self.gap_start[off_left]
+            self.gap_direction[off_left] = 1
+            self.gap_segment_origin[wrapped] = self.gap_x_offset[wrapped]
+            self.gap_segment_frame[wrapped] = 0
+
+    def _step_enemies(self, active):
+        moving = active[:, None] & self.enemy_mask
+        self.enemy_segment_frame[moving] += 1
+        self.enemy_x = np.where(
+            moving, self.enemy_segment_origin + self.enemy_direction * self.enemy_speed * 0.8 * self.enemy_segment_frame,
+            self.enemy_x)
+        self.enemy_animation_frame[moving] += 1
+
+        off_right = moving & (self.enemy_direction == 1) & (self.enemy_x >= SCREEN_WIDTH + self.enemy_width)
+        off_left = moving & (self.enemy_direction == -1) & (self.enemy_x <= -(self.enemy_width * 2))
+        wrapped = off_right | off_left
+        if wrapped.any():
+            self._move_to_next_level(self.enemy_level, self.enemy_vertical_direction, wrapped)
+            self.enemy_y[wrapped] = (self.platform_positions[self.enemy_level] - self.enemy_height)[wrapped]
+            self.enemy_x[off_right] = (SCREEN_WIDTH + self.enemy_width - 1)[off_right]
+            self.enemy_direction[off_right] = -1
+            self.enemy_x[off_left] = (-(self.enemy_width * 2 - 1))[off_left]
+            self.enemy_direction[off_left] = 1
+            self.enemy_segment_origin[wrapped] = self.enemy_x[wrapped]
+            self.enemy_segment_frame[wrapped] = 0
+
+    def _step_player_physics(self, active):
+        self.velocity_y[active] += 0.8
+
+        center = self.player_x + 20 / 2
+        in_gap = self._in_gap_player(center) & self.gap_mask
+        gap_free = [~(in_gap & (self.gap_level == k)).any(axis=1) for k in range(len(self.platform_positions))]
+
+        # Head collision against each platform level, first solid hit wins
+        checking = active & (self.velocity_y < 0)
+        for k, platform_y in enumerate(self.platform_positions):
+            if not checking.any():
+                break
+            top = self.player_y
+            hit = checking & (top >= platform_y + 3) & (top + self.velocity_y <= platform_y + 3) & gap_free[k]
+            self.player_y[hit] = platform_y + 3
+            self.velocity_y[hit] = 0
+            checking &= ~hit
+
+        self.player_y[active] += self.velocity_y[active]
+
+        # Landing on each platform level, first solid surface wins
+        checking = active & (self.velocity_y >= 0)
+        landed = np.zeros(self.n_envs, dtype=bool)
+        for k, platform_y in enumerate(self.platform_positions):
+            if not checking.any():
+                break
+            distance = np.abs(self.player_y + 32 - platform_y)
+            hit = checking & (distance <= np.abs(self.velocity_y) + 5) & gap_free[k]
+            self.player_y[hit] = platform_y - 32
+            self.velocity_y[hit] = 0
+            self.jumping[hit] = False
+            landed |= hit
+            checking &= ~hit
+
+        grounded = active & ~landed & (self.player_y >= SCREEN_HEIGHT - 32)
+        self.player_y[grounded] = SCREEN_HEIGHT - 32
+        self.velocity_y[grounded] = 0
+        self.jumping[grounded] = False
+
+    def _crushed(self):
+        """Player.check_crushed: touching solid platform bars at 2+ different heights"""
+        center = self.player_x + 20 / 2
+        solid = (self.gap_level != self.gap_original_level) | ~self._in_gap_platform(center)
+        touching = np.zeros(self.n_envs, dtype=np.int64)
+        for k, platform_y in enumerate(self.platform_positions):
+            overlaps = (self.player_y + 32 >= platform_y) & (self.player_y <= platform_y + 3)
+            touching += overlaps & (self.gap_mask & (self.gap_original_level == k) & solid).any(axis=1)
+        return touching >= 2
+
+    def _enemy_hit(self):
+        """BaseEnemy.check_collision against every enemy"""
+        px = self.player_x[:, None]
+        py = self.player_y[:, None]
+        hits = (self.enemy_mask &
+                (px < self.enemy_x + self.enemy_width) &
+                (px + 20 > self.enemy_x) &
+                (py < self.enemy_y + self.enemy_height) &
+                (py + 32 > self.enemy_y))
+        return hits.any(axis=1)
@@ -0,0 +1,307 @@
+"""Benchmarks for the game's hot paths.
+
+Measures Game.update, Game.draw, Game.setup_level, Game.spawn_enemy,
+Player.update, Player.check_crushed and Leaderboard.add_score at a range of
+levels with fixed seeds, and reports per-call latency percentiles and the
+equivalent frames per second.
+
+    python benchmark.py                              # print a table
+    python benchmark.py --json results.json          # also write machine-readable results
+    python benchmark.py --baseline baseline.json     # fail (exit 1) on regressions
+
+Drawing uses SDL's dummy video driver, so no window is opened.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+# Must be set before pygame is imported
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+from enemy_types import EnemyLanes
+from game_input import PolicyInput, INPUT_LEFT, INPUT_RIGHT, INPUT_JUMP
+from jumping_jack import Game
+from leaderboard import Leaderboard
+from player import Player
+
+DEFAULT_LEVELS = (1, 5, 10, 25, 50)
+BENCHMARKS = ('update', 'draw', 'setup_level', 'spawn_enemy', 'player_update', 'check_crushed', 'add_score')
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+def summarize(samples_ns):
+    """Latency statistics in microseconds (plus calls per second) for a list of timings"""
+    samples = sorted(samples_ns)
+    mean = sum(samples) / len(samples)
+    return {
+        'calls': len(samples),
+        'mean_us': mean / 1000,
+        'p50_us': percentile(samples, 0.50) / 1000,
+        'p90_us': percentile(samples, 0.90) / 1000,
+        'p99_us': percentile(samples, 0.99) / 1000,
+        'max_us': samples[-1] / 1000,
+        'fps': 1e9 / mean if mean > 0 else float('inf'),
+    }
+
+
+def make_policy(seed):
+    """A seeded, jump-happy input policy so games climb levels and meet enemies"""
+    rng = random.Random(seed)
+    choices = [INPUT_JUMP, INPUT_JUMP, INPUT_RIGHT | INPUT_JUMP, INPUT_LEFT | INPUT_JUMP, INPUT_RIGHT, INPUT_LEFT, 0]
+    return lambda game: rng.choice(choices)
+
+
+def make_game(level, seed, headless=True):
+    """A game already playing the given level"""
+    # Silent: no mixer, effect cache writes or music thread competing with the timed calls
+    game = Game(headless=headless, seed=seed, leaderboard=Leaderboard(filename=None), sound=False)
+    game.input_source = PolicyInput(make_policy(seed), game)
+    game.player_name = "Benchmark"
+    game.name_entry_active = False
+    game.game_started = True
+    game.level = level
+    game.setup_level()
+    return game
+
+
+def keep_playing(game, level):
+    """Restart the level after a game over so the measured game never stops"""
+    if game.lives <= 0:
+        game.lives = 5
+        game.level = level
+        game.setup_level()
+
+
+@contextmanager
+def timed_method(cls, name, samples):
+    """Temporarily wrap cls.name so every call appends its duration (ns) to samples"""
+    original = getattr(cls, name)
+    perf_counter_ns = time.perf_counter_ns
+
+    def wrapper(*args, **kwargs):
+        start = perf_counter_ns()
+        result = original(*args, **kwargs)
+        samples.append(perf_counter_ns() - start)
+        return result
+
+    setattr(cls, name, wrapper)
+    try:
+        yield
+    finally:
+        setattr(cls, name, original)
+
+
+def run_frames(game, level, frames, samples=None):
+    """Step the game for a number of frames, timing each update() if samples is given"""
+    perf_counter_ns = time.perf_counter_ns
+    for _ in range(frames):
+        keep_playing(game, level)
+        if samples is None:
+            game.update()
+        else:
+            start = perf_counter_ns()
+            game.update()
+            samples.append(perf_counter_ns() - start)
+
+
+def bench_update(level, seed, calls):
+    game = make_game(level, seed)
+    run_frames(game, level, calls // 10)  # Warm up
+    samples = []
+    run_frames(game, level, calls, samples)
+    return samples
+
+
+def bench_draw(level, seed, calls):
+    game = make_game(level, seed, headless=False)
+    perf_counter_ns = time.perf_counter_ns
+    samples = []
+    for frame in range(calls + calls // 10):
+        keep_playing(game, level)
+        game.update()
+        start = perf_counter_ns()
+        game.draw()
+        if frame >= calls // 10:  # The first frames bake sprites and text
+            samples.append(perf_counter_ns() - start)
+    return samples
+
+
+def bench_setup_level(level, seed, calls):
+    game = make_game(level, seed)
+    perf_counter_ns = time.perf_counter_ns
+    samples = []
+    for _ in range(calls):
+        start = perf_counter_ns()
+        game.setup_level()
+        samples.append(perf_counter_ns() - start)
+    return samples
+
+
+def bench_spawn_enemy(level, seed, calls):
+    game = make_game(level, seed)
+    initial_enemies = list(game.enemies)
+    perf_counter_ns = time.perf_counter_ns
+    samples = []
+    for _ in range(calls):
+        start = perf_counter_ns()
+        game.spawn_enemy()
+        samples.append(perf_counter_ns() - start)
+        # Spawn into the same crowd every time
+        game.enemies = []
+        game.enemy_lanes = EnemyLanes(game.platform_positions)
+        game.enemy_colors = set()
+        for enemy in initial_enemies:
+            game.add_enemy(enemy)
+        game.used_enemy_types.clear()
+    return samples
+
+
+def bench_player_update(level, seed, calls):
+    game = make_game(level, seed)
+    samples = []
+    with timed_method(Player, 'update', samples):
+        while len(samples) < calls:
+            run_frames(game, level, 1)
+    return samples
+
+
+def bench_check_crushed(level, seed, calls):
+    game = make_game(level, seed)
+    samples = []
+    with timed_method(Player, 'check_crushed', samples):
+        while len(samples) < calls:
+            run_frames(game, level, 1)
+    return samples
+
+
+def bench_add_score(level, seed, calls):
+    rng = random.Random(seed)
+    perf_counter_ns = time.perf_counter_ns
+    samples = []
+    with tempfile.TemporaryDirectory() as directory:
+        leaderboard = Leaderboard(filename=os.path.join(directory, 'leaderboard.json'))
+        for _ in range(calls):
+            score = rng.randint(0, 50000)
+            start = perf_counter_ns()
+            leaderboard.add_score("Benchmark", score, level)
+            samples.append(perf_counter_ns() - start)
+        leaderboard.close()
+    return samples
+
+
+BENCHMARK_FUNCTIONS = {
+    'update': bench_update,
+    'draw': bench_draw,
+    'setup_level': bench_setup_level,
+    'spawn_enemy': bench_spawn_enemy,
+    'player_update': bench_player_update,
+    'check_crushed': bench_check_crushed,
+    'add_score': bench_add_score,
+}
+
+# Slow calls get fewer samples so the suite finishes in reasonable time
+CALLS_SCALE = {'setup_level': 0.1, 'spawn_enemy': 0.5, 'draw': 0.5, 'add_score': 0.5}
+
+
+def run_benchmarks(names, levels, calls, seed):
+    results = {}
+    for name in names:
+        results[name] = {}
+        for level in levels:
+            n = max(10, int(calls * CALLS_SCALE.get(name, 1.0)))
+            samples = BENCHMARK_FUNCTIONS[name](level, seed + level, n)
+            results[name][str(level)] = summarize(samples)
+    return results
+
+
+def compare(results, baseline, threshold, p99_threshold):
+    """List regressions against a baseline: p50 (or p99) slower by more than the threshold"""
+    regressions = []
+    for name, levels in results.items():
+        for level, stats in levels.items():
+            base = baseline.get('results', {}).get(name, {}).get(level)
+            if base is None:
+                continue
+            for metric, limit in (('p50_us', threshold), ('p99_us', p99_threshold)):
+                if base[metric] > 0 and stats[metric] > base[metric] * (1 + limit):
+                    change = stats[metric] / base[metric] - 1
+                    regressions.append(f"{name} level {level} {metric}: {base[metric]:.1f} -> "
+                                       f"{stats[metric]:.1f} us (+{change:.0%}, limit +{limit:.0%})")
+    return regressions
+
+
+def print_table(results):
+    print(f"{'benchmark':<14} {'level':>5} {'calls':>6} {'mean us':>9} {'p50 us':>9} {'p90 us':>9} "
+          f"{'p99 us':>9} {'max us':>9} {'fps':>10}")
+    for name, levels in results.items():
+        for level, stats in levels.items():
+            print(f"{name:<14} {level:>5} {stats['calls']:>6} {stats['mean_us']:>9.1f} {stats['p50_us']:>9.1f} "
+                  f"{stats['p90_us']:>9.1f} {stats['p99_us']:>9.1f} {stats['max_us']:>9.1f} {stats['fps']:>10.0f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Jumping Jack's hot paths")
+    parser.add_argument('--levels', default=','.join(str(level) for level in DEFAULT_LEVELS),
+                        help="comma-separated levels to measure (default: %(default)s)")
+    parser.add_argument('--only', default=','.join(BENCHMARKS),
+                        help="comma-separated benchmarks to run (default: all)")
+    parser.add_argument('--calls', type=int, default=2000, help="timed calls per benchmark and level")
+    parser.add_argument('--seed', type=int, default=1, help="base seed (each level adds its number)")
+    parser.add_argument('--json', metavar='PATH', help="write results as JSON")
+    parser.add_argument('--baseline', metavar='PATH', help="compare against a previous --json file")
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help="allowed p50 slowdown vs the baseline, as a fraction (default: %(default)s)")
+    parser.add_argument('--p99-threshold', type=float, default=0.25,
+                        help="allowed p99 slowdown vs the baseline, as a fraction (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    names = [name for name in args.only.split(',') if name]
+    unknown = [name for name in names if name not in BENCHMARK_FUNCTIONS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+    levels = [int(level) for level in args.levels.split(',') if level]
+
+    results = run_benchmarks(names, levels, args.calls, args.seed)
+    print_table(results)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({
+                'meta': {
+                    'python': platform.python_version(),
+                    'platform': platform.platform(),
+                    'calls': args.calls,
+                    'seed': args.seed,
+                    'levels': levels,
+                    'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+                },
+                'results': results,
+            }, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, args.p99_threshold)
+        if regressions:
+            print("\nRegressions:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("\nNo regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+import math
+
+import pygame
+
+from constants import SCREEN_WIDTH, WHITE
+from sprite_cache import SPRITE_MARGIN
+
+
+class DirtyRectRenderer:
+    """Opt-in renderer that repaints only the parts of the play screen that changed.
+
+    Each frame it collects the bounding boxes of the gaps, enemies, Jack and the
+    HUD text, and marks last frame's and this frame's boxes dirty. Every dirty
+    region is cleared and redrawn (bars, then enemies, then Jack, then HUD - only
+    the items that overlap it) and the regions are presented with
+    pygame.display.update(rects) instead of a full-screen fill and flip.
+    """
+
+    def __init__(self):
+        self.previous_rects = {}
+        self.previous_hud = None
+        self.previous_hud_rects = []
+        self.full_redraw = True
+
+    def invalidate(self):
+        """Force a full repaint on the next frame (after a menu or overlay was shown)"""
+        self.full_redraw = True
+
+    @staticmethod
+    def _sprite_rect(x, y, width, height):
+        # One extra pixel on each side for the float -> int truncation of the blit position
+        return pygame.Rect(math.floor(x) - SPRITE_MARGIN - 1, math.floor(y) - SPRITE_MARGIN - 1,
+                           width + 2 * SPRITE_MARGIN + 2, height + 2 * SPRITE_MARGIN + 2)
+
+    def _gap_rects(self, game, gap):
+        y = game.platform_positions[gap.gap_current_platform_index]
+        top, height = (y - 2, 20) if game.debug_mode else (y, 3)
+        start, end = gap.screen_span()
+        if end < start:
+            return [pygame.Rect(math.floor(start), top, SCREEN_WIDTH - math.floor(start), height),
+                    pygame.Rect(0, top, math.ceil(end) + 1, height)]
+        return [pygame.Rect(math.floor(start), top, math.ceil(end) - math.floor(start) + 1, height)]
+
+    def _collect(self, game):
+        """Get {entity: [rects]} for everything that moves, plus the draw list in back-to-front order"""
+        rects = {}
+        items = []
+
+        for platform_index, y in enumerate(game.platform_positions):
+            bar_rect = pygame.Rect(0, y - 2, SCREEN_WIDTH, 20) if game.debug_mode else pygame.Rect(0, y, SCREEN_WIDTH, 3)
+            items.append((bar_rect, lambda index=platform_index: game.draw_platform_bar(index)))
+
+        for gap in game.platforms:
+            rects[id(gap)] = self._gap_rects(game, gap)
+
+        for enemy in game.enemies:
+            enemy_rect = self._sprite_rect(enemy.x, enemy.y, enemy.width, enemy.height)
+            rects[id(enemy)] = [enemy_rect]
+            items.append((enemy_rect, lambda enemy=enemy: game.sprite_atlas.draw_enemy(game.screen, enemy)))
+
+        player = game.player
+        player_rect = self._sprite_rect(player.x, player.y, player.width, player.height)
+        rects[id(player)] = [player_rect]
+        items.append((player_rect, lambda: game.sprite_atlas.draw_player(game.screen, player)))
+
+        return rects, items
+
+    def draw(self, game):
+        screen = game.screen
+        current_rects, items = self._collect(game)
+        hud_state = (game.total_score, game.lives, game.level)
+        hud_rects = game.hud_rects()
+
+        if self.full_redraw:
+            screen.fill(WHITE)
+            for _, draw_item in items:
+                draw_item()
+            game.draw_hud()
+            if game.profiler is not None:
+                game.profiler.draw_overlay(screen, game.render_cache)
+            pygame.display.flip()
+            self.previous_rects = current_rects
+            self.previous_hud = hud_state
+            self.previous_hud_rects = hud_rects
+            self.full_redraw = False
+            return
+
+        # Last frame's and this frame's boxes, merged per entity when they overlap
+        dirty = []
+        for key in self.previous_rects.keys() | current_rects.keys():
+            boxes = self.previous_rects.get(key, []) + current_rects.get(key, [])
+            if len(boxes) == 2 and boxes[0].colliderect(boxes[1]):
+                boxes = [boxes[0].union(boxes[1])]
+            dirty.extend(boxes)
+        if hud_state != self.previous_hud:
+            dirty.extend(self.previous_hud_rects)
+            dirty.extend(hud_rects)
+        if game.profiler is not None:
+            # The frame-time overlay changes every frame
+            dirty.append(game.profiler.OVERLAY_RECT.copy())
+
+        screen_rect = screen.get_rect()
+        dirty = [rect.clip(screen_rect) for rect in dirty]
+        dirty = [rect for rect in dirty if rect.width > 0 and rect.height > 0]
+
+        # Repaint each dirty region from scratch, drawing only what overlaps it
+        for rect in dirty:
+            screen.set_clip(rect)
+            screen.fill(WHITE, rect)
+            for item_rect, draw_item in items:
+                if item_rect.colliderect(rect):
+                    draw_item()
+            if rect.collidelist(hud_rects) != -1:
+                game.draw_hud()
+        screen.set_clip(None)
+        if game.profiler is not None:
+            game.profiler.draw_overlay(screen, game.render_cache)
+
+        pygame.display.update(dirty)
+        self.previous_rects = current_rects
+        self.previous_hud = hud_state
+        self.previous_hud_rects = hud_rects
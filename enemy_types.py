@@ -1,54 +1,98 @@
+import bisect
+import random
+
 import pygame
 from constants import SCREEN_WIDTH, PURPLE, YELLOW, GREEN, BLACK, BLUE, RED, GRAY
 
 
+# Per-frame enemy fields and their array typecodes, for a ComponentStore (see entity_store.py)
+ENEMY_FIELDS = {
+    'x': 'd', 'y': 'd', 'segment_origin': 'd', 'segment_frame': 'q', 'speed': 'd', 'direction': 'b',
+    'vertical_direction': 'b', 'current_platform_index': 'q', 'animation_frame': 'q', 'width': 'q', 'height': 'q',
+}
+
+
 class BaseEnemy:
-    """Base class for all enemy types"""
-    def __init__(self, platform_positions, speed, start_platform_index=None, color_variant=0):
+    """Base class for all enemy types.
+
+    Each subclass describes its type with class attributes - its name in
+    ENEMY_TYPES, the level it first appears at, its size and its palette (a
+    color_variant indexes COLORS) - so spawning needs no instance to look them up.
+    """
+    TYPE_NAME = None
+    UNLOCK_LEVEL = 1
+    WIDTH = 30
+    HEIGHT = 25
+    COLORS = (PURPLE,)
+    # Frames after which draw() repeats itself, and how many distinct poses the
+    # sprite atlas keeps per period (at most 16, so every sprite can be pre-baked)
+    animation_period = 1
+    animation_phases = 1
+    __slots__ = ('speed', 'platform_positions', 'color_variant', 'width', 'height', 'color', 'current_platform_index',
+                 'direction', 'vertical_direction', 'has_reached_edge', 'animation_frame', 'lanes', 'x', 'y',
+                 'segment_origin', 'segment_frame')
+
+    def __init__(self, platform_positions, speed, start_platform_index=None, color_variant=0, rng=None):
+        self.reset(platform_positions, speed, start_platform_index, color_variant, rng)
+
+    def reset(self, platform_positions, speed, start_platform_index=None, color_variant=0, rng=None):
+        """(Re)initialise the enemy - EntityPool reuses enemies across levels"""
+        # rng is the game's random.Random (the module-level generator if not given)
+        if rng is None:
+            rng = random
         self.speed = speed
         self.platform_positions = platform_positions
         self.color_variant = color_variant
 
-        # Set size and color in subclass
-        self.width = 30
-        self.height = 25
-        self.color = PURPLE
+        self.width = self.WIDTH
+        self.height = self.HEIGHT
+        self.color = self.COLORS[color_variant % len(self.COLORS)]
 
         # Position setup
         if start_platform_index is None:
-            import random
-            self.current_platform_index = random.randint(0, len(platform_positions) - 1)
+            self.current_platform_index = rng.randint(0, len(platform_positions) - 1)
         else:
             self.current_platform_index = start_platform_index
 
-        import random
-        self.direction = random.choice([-1, 1])
-        self.vertical_direction = random.choice([-1, 1])
+        self.direction = rng.choice([-1, 1])
+        self.vertical_direction = rng.choice([-1, 1])
         self.has_reached_edge = False
         self.animation_frame = 0
+        self.lanes = None  # EnemyLanes this enemy is registered with (set by EnemyLanes.add)
 
         if self.direction == 1:
             self.x = 0
         else:
             self.x = SCREEN_WIDTH - self.width
+        # x is segment_origin + direction * speed * 0.8 * segment_frame, recomputed each
+        # frame rather than accumulated, so trajectory.py can jump to any frame exactly
+        self.segment_origin = self.x
+        self.segment_frame = 0
 
         self.y = platform_positions[self.current_platform_index] - self.height
 
     def update(self):
-        self.x += self.direction * self.speed * 0.8
+        self.segment_frame += 1
+        self.x = self.segment_origin + self.direction * self.speed * 0.8 * self.segment_frame
         self.animation_frame += 1
 
         # Snake pattern: enemy goes completely off screen
         if self.direction == 1 and self.x >= SCREEN_WIDTH + self.width:
             self.move_to_next_platform()
-            self.x = SCREEN_WIDTH + self.width - 1
-            self.direction = -1
+            self.place(SCREEN_WIDTH + self.width - 1, -1)
         elif self.direction == -1 and self.x <= -(self.width * 2):
             self.move_to_next_platform()
-            self.x = -(self.width * 2 - 1)
-            self.direction = 1
+            self.place(-(self.width * 2 - 1), 1)
+
+    def place(self, x, direction):
+        """Put the enemy at x moving in direction (starts a new straight run)"""
+        self.x = x
+        self.direction = direction
+        self.segment_origin = x
+        self.segment_frame = 0
 
     def move_to_next_platform(self):
+        old_platform_index = self.current_platform_index
         self.current_platform_index += self.vertical_direction
 
         if self.current_platform_index < 0:
@@ -60,6 +104,9 @@ class BaseEnemy:
 
         self.y = self.platform_positions[self.current_platform_index] - self.height
 
+        if self.lanes is not None:
+            self.lanes.move(self, old_platform_index, self.current_platform_index)
+
     def check_collision(self, player):
         if (player.x < self.x + self.width and
             player.x + player.width > self.x and
@@ -74,13 +121,16 @@ class BaseEnemy:
 
 
 class Snake(BaseEnemy):
-    def __init__(self, platform_positions, speed, start_platform_index=None, color_variant=0):
-        super().__init__(platform_positions, speed, start_platform_index, color_variant)
-        self.width = 35
-        self.height = 20
-        # More color variety
-        colors = [GREEN, YELLOW, BLUE, (255, 140, 0), (0, 255, 127), (173, 216, 230)]  # Orange, Spring Green, Light Blue
-        self.color = colors[color_variant % len(colors)]
+    TYPE_NAME = 'snake'
+    UNLOCK_LEVEL = 1
+    WIDTH = 35
+    HEIGHT = 20
+    # More color variety
+    COLORS = (GREEN, YELLOW, BLUE, (255, 140, 0), (0, 255, 127), (173, 216, 230))  # Orange, Spring Green, Light Blue
+    # Body wave angle is animation_frame % 360, shown in 22.5 degree steps
+    animation_period = 360
+    animation_phases = 16
+    __slots__ = ()
 
     def draw(self, screen):
         cx = int(self.x + self.width / 2)
@@ -102,12 +152,13 @@ class Snake(BaseEnemy):
 
 
 class Plane(BaseEnemy):
-    def __init__(self, platform_positions, speed, start_platform_index=None, color_variant=0):
-        super().__init__(platform_positions, speed, start_platform_index, color_variant)
-        self.width = 50
-        self.height = 20
-        colors = [RED, PURPLE, (255, 140, 0), (0, 191, 255), (255, 20, 147), (255, 215, 0)]  # Orange, Deep Sky Blue, Deep Pink, Gold
-        self.color = colors[color_variant % len(colors)]
+    TYPE_NAME = 'plane'
+    UNLOCK_LEVEL = 1
+    WIDTH = 50
+    HEIGHT = 20
+    COLORS = (RED, PURPLE, (255, 140, 0), (0, 191, 255), (255, 20, 147), (255, 215, 0))  # Orange, Deep Sky Blue, Deep Pink, Gold
+    animation_period = 1
+    __slots__ = ()
 
     def draw(self, screen):
         cx = int(self.x + self.width / 2)
@@ -136,12 +187,15 @@ class Plane(BaseEnemy):
 
 
 class Axel(BaseEnemy):
-    def __init__(self, platform_positions, speed, start_platform_index=None, color_variant=0):
-        super().__init__(platform_positions, speed, start_platform_index, color_variant)
-        self.width = 25
-        self.height = 25
-        colors = [(255, 215, 0), GREEN, (255, 140, 0), (255, 20, 147), (0, 255, 255), RED]  # Gold (first), then others
-        self.color = colors[color_variant % len(colors)]
+    TYPE_NAME = 'axel'
+    UNLOCK_LEVEL = 1
+    WIDTH = 25
+    HEIGHT = 25
+    COLORS = ((255, 215, 0), GREEN, (255, 140, 0), (255, 20, 147), (0, 255, 255), RED)  # Gold (first), then others
+    # 4 spokes turning 5 degrees per frame look the same every 90 degrees; shown in 10 degree steps
+    animation_period = 18
+    animation_phases = 9
+    __slots__ = ()
 
     def draw(self, screen):
         cx = int(self.x + self.width / 2)
@@ -160,12 +214,15 @@ class Axel(BaseEnemy):
 
 
 class Octopus(BaseEnemy):
-    def __init__(self, platform_positions, speed, start_platform_index=None, color_variant=0):
-        super().__init__(platform_positions, speed, start_platform_index, color_variant)
-        self.width = 30
-        self.height = 25
-        colors = [(255, 20, 147), GREEN, RED, (255, 140, 0), (0, 191, 255), PURPLE]  # Deep Pink (first), then others
-        self.color = colors[color_variant % len(colors)]
+    TYPE_NAME = 'octopus'
+    UNLOCK_LEVEL = 1
+    WIDTH = 30
+    HEIGHT = 25
+    COLORS = ((255, 20, 147), GREEN, RED, (255, 140, 0), (0, 191, 255), PURPLE)  # Deep Pink (first), then others
+    # Tentacle angle is animation_frame * 3 % 360, shown in 30 degree steps
+    animation_period = 120
+    animation_phases = 12
+    __slots__ = ()
 
     def draw(self, screen):
         cx = int(self.x + self.width / 2)
@@ -189,12 +246,15 @@ class Octopus(BaseEnemy):
 
 
 class Ghost(BaseEnemy):
-    def __init__(self, platform_positions, speed, start_platform_index=None, color_variant=0):
-        super().__init__(platform_positions, speed, start_platform_index, color_variant)
-        self.width = 28
-        self.height = 28
-        colors = [(0, 255, 255), (255, 140, 0), (255, 105, 180), (173, 216, 230), GREEN, BLACK]  # Cyan (first), then others including black
-        self.color = colors[color_variant % len(colors)]
+    TYPE_NAME = 'ghost'
+    UNLOCK_LEVEL = 2
+    WIDTH = 28
+    HEIGHT = 28
+    COLORS = ((0, 255, 255), (255, 140, 0), (255, 105, 180), (173, 216, 230), GREEN, BLACK)  # Cyan (first), then others including black
+    # Wave angle is animation_frame * 4 % 360, shown in 30 degree steps
+    animation_period = 90
+    animation_phases = 12
+    __slots__ = ()
 
     def draw(self, screen):
         pygame.draw.ellipse(screen, self.color, (self.x + 3, self.y, self.width - 6, self.height - 8))
@@ -212,12 +272,13 @@ class Ghost(BaseEnemy):
 
 
 class Car(BaseEnemy):
-    def __init__(self, platform_positions, speed, start_platform_index=None, color_variant=0):
-        super().__init__(platform_positions, speed, start_platform_index, color_variant)
-        self.width = 45
-        self.height = 18
-        colors = [YELLOW, (0, 191, 255), (255, 140, 0), (0, 255, 127), (255, 20, 147), RED]  # Yellow (first), then others
-        self.color = colors[color_variant % len(colors)]
+    TYPE_NAME = 'car'
+    UNLOCK_LEVEL = 3
+    WIDTH = 45
+    HEIGHT = 18
+    COLORS = (YELLOW, (0, 191, 255), (255, 140, 0), (0, 255, 127), (255, 20, 147), RED)  # Yellow (first), then others
+    animation_period = 1
+    __slots__ = ()
 
     def draw(self, screen):
         cx = int(self.x + self.width / 2)
@@ -236,12 +297,13 @@ class Car(BaseEnemy):
 
 
 class Train(BaseEnemy):
-    def __init__(self, platform_positions, speed, start_platform_index=None, color_variant=0):
-        super().__init__(platform_positions, speed, start_platform_index, color_variant)
-        self.width = 55
-        self.height = 22
-        colors = [(138, 43, 226), GREEN, (255, 140, 0), (0, 191, 255), (255, 215, 0), RED]  # Blue Violet (first), then others
-        self.color = colors[color_variant % len(colors)]
+    TYPE_NAME = 'train'
+    UNLOCK_LEVEL = 4
+    WIDTH = 55
+    HEIGHT = 22
+    COLORS = ((138, 43, 226), GREEN, (255, 140, 0), (0, 191, 255), (255, 215, 0), RED)  # Blue Violet (first), then others
+    animation_period = 1
+    __slots__ = ()
 
     def draw(self, screen):
         cx = int(self.x + self.width / 2)
@@ -274,12 +336,15 @@ class Train(BaseEnemy):
 
 
 class Hunter(BaseEnemy):
-    def __init__(self, platform_positions, speed, start_platform_index=None, color_variant=0):
-        super().__init__(platform_positions, speed, start_platform_index, color_variant)
-        self.width = 22
-        self.height = 30
-        colors = [(255, 140, 0), GREEN, (138, 43, 226), (0, 191, 255), (255, 20, 147), RED]  # Orange (first), then others
-        self.color = colors[color_variant % len(colors)]
+    TYPE_NAME = 'hunter'
+    UNLOCK_LEVEL = 5
+    WIDTH = 22
+    HEIGHT = 30
+    COLORS = ((255, 140, 0), GREEN, (138, 43, 226), (0, 191, 255), (255, 20, 147), RED)  # Orange (first), then others
+    # Legs alternate every 4 frames
+    animation_period = 8
+    animation_phases = 2
+    __slots__ = ()
 
     def draw(self, screen):
         cx = int(self.x + self.width / 2)
@@ -311,12 +376,15 @@ class Hunter(BaseEnemy):
 
 
 class Dinosaur(BaseEnemy):
-    def __init__(self, platform_positions, speed, start_platform_index=None, color_variant=0):
-        super().__init__(platform_positions, speed, start_platform_index, color_variant)
-        self.width = 40
-        self.height = 28
-        colors = [(0, 191, 255), PURPLE, (255, 140, 0), (205, 92, 92), (255, 215, 0), GREEN]  # Deep Sky Blue (first), then others
-        self.color = colors[color_variant % len(colors)]
+    TYPE_NAME = 'dinosaur'
+    UNLOCK_LEVEL = 6
+    WIDTH = 40
+    HEIGHT = 28
+    COLORS = ((0, 191, 255), PURPLE, (255, 140, 0), (205, 92, 92), (255, 215, 0), GREEN)  # Deep Sky Blue (first), then others
+    # Legs alternate every 4 frames
+    animation_period = 8
+    animation_phases = 2
+    __slots__ = ()
 
     def draw(self, screen):
         cx = int(self.x + self.width / 2)
@@ -363,20 +431,107 @@ class Dinosaur(BaseEnemy):
             pygame.draw.line(screen, self.color, (cx + 2, cy + 6), (cx + 4, leg_y), 3)
 
 
+class EnemyLanes:
+    """Broad phase for enemy queries: enemies bucketed by lane, sorted by x.
+
+    Enemies only move along their lane (current_platform_index), so collision
+    and spawn-overlap checks only need the lanes that can be involved, and
+    within a lane only the enemies in an x window found by bisection. Enemies
+    register with add(); BaseEnemy.move_to_next_platform keeps the buckets up
+    to date. Call positions_changed() after moving enemies: it refreshes each
+    lane's xs, and only a lane whose enemies changed order (or that gained or
+    lost an enemy at the screen edge) is re-sorted, on its next query.
+    """
+
+    def __init__(self, platform_positions):
+        self.platform_positions = platform_positions
+        self.lanes = [[] for _ in platform_positions]
+        self.lane_xs = [[] for _ in platform_positions]  # x of each enemy in self.lanes
+        self.unsorted = set()
+        self.max_width = 0
+        # Vertical extent of every enemy box ever seen on each lane (so queries
+        # stay correct even for an enemy that is not resting on its platform)
+        self.lane_tops = [float('inf')] * len(platform_positions)
+        self.lane_bottoms = [float('-inf')] * len(platform_positions)
+
+    def _extend_lane(self, lane, enemy):
+        self.lane_tops[lane] = min(self.lane_tops[lane], enemy.y)
+        self.lane_bottoms[lane] = max(self.lane_bottoms[lane], enemy.y + enemy.height)
+
+    def add(self, enemy):
+        enemy.lanes = self
+        self.max_width = max(self.max_width, enemy.width)
+        lane = enemy.current_platform_index
+        self._extend_lane(lane, enemy)
+        self._sort(lane)
+        position = bisect.bisect_right(self.lane_xs[lane], enemy.x)
+        self.lanes[lane].insert(position, enemy)
+        self.lane_xs[lane].insert(position, enemy.x)
+
+    def move(self, enemy, old_platform_index, new_platform_index):
+        """Record a lane change (or a new y on the same lane, which also happens at the edges)"""
+        if new_platform_index != old_platform_index:
+            self.lanes[old_platform_index].remove(enemy)
+            self.lanes[new_platform_index].append(enemy)
+            self.unsorted.update((old_platform_index, new_platform_index))
+        self._extend_lane(new_platform_index, enemy)
+
+    def positions_changed(self):
+        for lane, enemies in enumerate(self.lanes):
+            if lane in self.unsorted:
+                continue  # Rebuilt when it is next queried
+            xs = [enemy.x for enemy in enemies]
+            # Enemies on a lane only swap places when two moving in opposite directions pass
+            if all(x <= next_x for x, next_x in zip(xs, xs[1:])):
+                self.lane_xs[lane] = xs
+            else:
+                self.unsorted.add(lane)
+
+    def _sort(self, lane):
+        if lane in self.unsorted:
+            enemies = self.lanes[lane]
+            enemies.sort(key=lambda enemy: enemy.x)
+            self.lane_xs[lane] = [enemy.x for enemy in enemies]
+            self.unsorted.discard(lane)
+
+    def enemies_between(self, lane, x_min, x_max):
+        """Enemies on a lane with x_min <= x <= x_max"""
+        self._sort(lane)
+        xs = self.lane_xs[lane]
+        start = bisect.bisect_left(xs, x_min)
+        end = bisect.bisect_right(xs, x_max)
+        return self.lanes[lane][start:end]
+
+    def collision_candidates(self, player):
+        """Enemies whose box could overlap the player's (check_collision decides)"""
+        candidates = []
+        for lane in range(len(self.lanes)):
+            if player.y < self.lane_bottoms[lane] and player.y + player.height > self.lane_tops[lane]:
+                # One pixel of slack either side so float rounding can't drop a candidate
+                candidates.extend(self.enemies_between(lane, player.x - self.max_width - 1,
+                                                       player.x + player.width + 1))
+        return candidates
+
+    def any_within(self, lane, x, distance):
+        """Whether an enemy on the lane is less than distance pixels from x horizontally"""
+        for enemy in self.enemies_between(lane, x - distance - 1, x + distance + 1):
+            if abs(enemy.x - x) < distance:
+                return True
+        return False
+
+
+# Every enemy type by TYPE_NAME, in unlock order
+ENEMY_TYPES = {enemy_class.TYPE_NAME: enemy_class
+               for enemy_class in (Snake, Plane, Axel, Octopus, Ghost, Car, Train, Hunter, Dinosaur)}
+
+
+def enemy_types_for_level(level):
+    """Names of the enemy types that can appear on a level"""
+    return [name for name, enemy_class in ENEMY_TYPES.items() if enemy_class.UNLOCK_LEVEL <= level]
+
+
 # Factory function to create enemies
-def create_enemy(enemy_type, platform_positions, speed, start_platform_index=None, color_variant=0):
+def create_enemy(enemy_type, platform_positions, speed, start_platform_index=None, color_variant=0, rng=None):
     """Factory function to create the appropriate enemy subclass"""
-    enemy_classes = {
-        'snake': Snake,
-        'plane': Plane,
-        'axel': Axel,
-        'octopus': Octopus,
-        'ghost': Ghost,
-        'car': Car,
-        'train': Train,
-        'hunter': Hunter,
-        'dinosaur': Dinosaur
-    }
-
-    enemy_class = enemy_classes.get(enemy_type, Snake)
-    return enemy_class(platform_positions, speed, start_platform_index, color_variant)
+    enemy_class = ENEMY_TYPES.get(enemy_type, Snake)
+    return enemy_class(platform_positions, speed, start_platform_index, color_variant, rng)
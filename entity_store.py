@@ -0,0 +1,97 @@
+from array import array
+
+
+class ComponentStore:
+    """Entity fields kept in contiguous typed arrays instead of per-object storage.
+
+    fields maps each field name to an array typecode ('d' for floats, 'q' for
+    ints, 'b' for directions). Every entity owns one row: store.<field>[row].
+    Entities are views - subclasses of the normal entity classes whose stored
+    fields are properties reading and writing their row - so Platform and
+    BaseEnemy code runs unchanged on top of the arrays, while the arrays
+    themselves can be scanned, copied or handed to NumPy (np.frombuffer) in one
+    piece. Arrays only ever grow in place, so references to them stay valid.
+    """
+
+    def __init__(self, fields, capacity=32):
+        self.fields = dict(fields)
+        self.capacity = capacity
+        self.count = 0
+        for name, typecode in self.fields.items():
+            setattr(self, name, array(typecode, bytes(array(typecode).itemsize * capacity)))
+
+    def allocate(self):
+        """A new zeroed row (the arrays double in size when full)"""
+        if self.count == self.capacity:
+            for name, typecode in self.fields.items():
+                getattr(self, name).extend(array(typecode, bytes(array(typecode).itemsize * self.capacity)))
+            self.capacity *= 2
+        self.count += 1
+        return self.count - 1
+
+    def create(self, cls, *args, **kwargs):
+        """A view of cls on a new row, initialised with cls.reset(*args, **kwargs)"""
+        view_class = stored_view(cls, self.fields)
+        entity = view_class.__new__(view_class)
+        entity._store = self
+        entity._row = self.allocate()
+        entity.reset(*args, **kwargs)
+        return entity
+
+
+def _field_property(name):
+    def get(self):
+        return getattr(self._store, name)[self._row]
+
+    def set(self, value):
+        getattr(self._store, name)[self._row] = value
+
+    return property(get, set)
+
+
+_view_classes = {}
+
+
+def stored_view(cls, fields):
+    """Subclass of cls keeping the given fields in a ComponentStore (created once per class)"""
+    key = (cls, tuple(fields))
+    view_class = _view_classes.get(key)
+    if view_class is None:
+        namespace = {name: _field_property(name) for name in fields}
+        namespace['__slots__'] = ('_store', '_row')
+        namespace['view_of'] = cls
+        namespace['__doc__'] = f"{cls.__name__} whose {', '.join(fields)} live in a ComponentStore"
+        view_class = _view_classes[key] = type(f"Stored{cls.__name__}", (cls,), namespace)
+    return view_class
+
+
+class EntityPool:
+    """Reuses gaps and enemies across levels instead of allocating new ones.
+
+    release() hands a level's entities back; acquire(cls, ...) re-initialises a
+    released entity of that class with reset() (the same code __init__ runs),
+    or creates one - as a plain object, or as a view on the right component
+    store when stores are given (a dict of entity base class -> ComponentStore).
+    """
+
+    def __init__(self, stores=None):
+        self.stores = stores
+        self.free = {}
+
+    def acquire(self, cls, *args, **kwargs):
+        free = self.free.get(cls)
+        if free:
+            entity = free.pop()
+            entity.reset(*args, **kwargs)
+            return entity
+        if self.stores is None:
+            return cls(*args, **kwargs)
+        for base, store in self.stores.items():
+            if issubclass(cls, base):
+                return store.create(cls, *args, **kwargs)
+        return cls(*args, **kwargs)
+
+    def release(self, entities):
+        for entity in entities:
+            cls = getattr(type(entity), 'view_of', type(entity))
+            self.free.setdefault(cls, []).append(entity)
@@ -0,0 +1,117 @@
+"""Step/reset environment API over a headless Game, for reinforcement learning.
+
+    env = JumpingJackEnv(frame_skip=4)
+    observation, info = env.reset(seed=1)
+    while True:
+        observation, reward, terminated, truncated, info = env.step(INPUT_RIGHT | INPUT_JUMP)
+        if terminated or truncated:
+            break
+
+An action is an input bit mask (INPUT_LEFT | INPUT_RIGHT | INPUT_JUMP, 0-7) or
+an InputState, held for frame_skip Game.update ticks. Nothing is rendered.
+The reward is the score gained, plus level_bonus per completed level, minus
+life_penalty per life lost. Observations come from an ObservationEncoder
+(encode_vector) and are refilled in place by the next step. terminated means
+the game is over (no lives left); truncated means max_frames ran out first.
+Stepping a finished game raises RuntimeError - call reset() for the next one.
+"""
+from game_input import InputState
+from observation import ObservationEncoder
+
+# InputState for every action bit mask, so steps don't build them
+_ACTION_STATES = tuple(InputState.from_bits(bits) for bits in range(8))
+
+
+class ActionInput:
+    """Input source returning whatever action the environment set last"""
+
+    def __init__(self):
+        self.state = _ACTION_STATES[0]
+
+    def poll(self):
+        return self.state
+
+
+class JumpingJackEnv:
+    """reset(seed) / step(action) wrapper of a headless Game (see the module docstring).
+
+    info holds the score, level, lives, frames played, and level_complete /
+    life_lost counts for the step. With skip_level_transitions the "LEVEL X"
+    screen is skipped immediately (as pressing jump does) instead of idling
+    for three seconds of ticks. max_frames ends an episode early, reported as
+    truncated rather than terminated.
+    """
+
+    def __init__(self, frame_skip=4, encoder=None, level_bonus=100.0, life_penalty=100.0,
+                 skip_level_transitions=True, max_frames=None):
+        if frame_skip < 1:
+            raise ValueError("frame_skip must be at least 1")
+        self.frame_skip = frame_skip
+        self.encoder = encoder if encoder is not None else ObservationEncoder()
+        self.level_bonus = level_bonus
+        self.life_penalty = life_penalty
+        self.skip_level_transitions = skip_level_transitions
+        self.max_frames = max_frames
+        self.input = ActionInput()
+        self.game = None
+        self.frames = 0
+        self.done = False  # The episode ended: game over or truncated
+
+    def reset(self, seed=None):
+        """Start a new game; returns (observation, info)"""
+        # Imported here to avoid a circular import with jumping_jack
+        from jumping_jack import Game
+
+        self.game = Game(headless=True, seed=seed, input_source=self.input)
+        self.frames = 0
+        self.done = False
+        return self.encoder.encode_vector(self.game), self._info(0, 0)
+
+    def step(self, action):
+        """Run frame_skip ticks with the action held.
+
+        Returns (observation, reward, terminated, truncated, info).
+        """
+        game = self.game
+        if game is None:
+            raise RuntimeError("Call reset() before step()")
+        if self.done:
+            raise RuntimeError("The episode has ended - call reset() to start a new one")
+        self.input.state = action if isinstance(action, InputState) else _ACTION_STATES[action]
+
+        score, level, lives = game.total_score, game.level, game.lives
+        update = game.update
+        frames = 0
+        for _ in range(self.frame_skip):
+            update()
+            frames += 1
+            if game.level != level:
+                # Jack reached the top (Player.y <= 0): the level is complete
+                if self.skip_level_transitions:
+                    game.level_transition = False
+                    game.setup_level()
+                break
+            if game.lives <= 0:
+                break
+        self.frames += frames
+
+        levels_completed = game.level - level
+        lives_lost = lives - game.lives
+        reward = (game.total_score - score + self.level_bonus * levels_completed
+                  - self.life_penalty * lives_lost)
+        terminated = game.lives <= 0
+        truncated = not terminated and self.max_frames is not None and self.frames >= self.max_frames
+        self.done = terminated or truncated
+        info = self._info(levels_completed, lives_lost)
+        return self.encoder.encode_vector(game), reward, terminated, truncated, info
+
+    def _info(self, levels_completed, lives_lost):
+        game = self.game
+        return {
+            'score': game.total_score,
+            'level': game.level,
+            'lives': game.lives,
+            'frames': self.frames,
+            'level_complete': levels_completed,
+            'life_lost': lives_lost,
+        }
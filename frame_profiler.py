@@ -0,0 +1,144 @@
+import csv
+import time
+from array import array
+
+import pygame
+
+from constants import SCREEN_WIDTH, WHITE, BLACK, RED, GREEN, FPS
+
+
+# Frame phases, in the order they appear in the CSV and the overlay
+PHASE_EVENTS = 0
+PHASE_PLATFORMS = 1
+PHASE_ENEMIES = 2
+PHASE_PLAYER = 3
+PHASE_COLLISIONS = 4
+PHASE_OTHER = 5  # Input, scoring, spawning, sound cooldowns and level changes
+PHASE_DRAW = 6
+PHASE_TICK = 7
+PHASE_NAMES = ('events', 'platforms', 'enemies', 'player', 'collisions', 'other', 'draw', 'tick')
+
+
+class FrameProfiler:
+    """Per-phase frame timings kept in a fixed-size ring buffer.
+
+    The game loop calls begin_frame(), then lap(phase) after each phase -
+    lap() charges the time since the previous lap to that phase - and
+    end_frame(). The last `capacity` frames are kept (in seconds, in one flat
+    array of doubles) for the live overlay and the CSV dump. Code on the hot
+    path only pays for `if profiler is not None` when profiling is off.
+    """
+
+    def __init__(self, capacity=FPS * 60, csv_filename='frame_profile.csv'):
+        self.capacity = capacity
+        self.csv_filename = csv_filename
+        self.n_phases = len(PHASE_NAMES)
+        self.times = array('d', bytes(8 * capacity * self.n_phases))
+        self.ticks = array('H', bytes(2 * capacity))
+        self.frame = 0  # Frames recorded so far (the current row is frame % capacity)
+        self.last_time = time.perf_counter()
+        self._row = 0
+        self._overlay_stats = None
+        self._overlay_stats_frame = -1
+
+    def begin_frame(self):
+        self._row = (self.frame % self.capacity) * self.n_phases
+        for phase in range(self.n_phases):
+            self.times[self._row + phase] = 0.0
+        self.ticks[self.frame % self.capacity] = 0
+        self.last_time = time.perf_counter()
+
+    def lap(self, phase):
+        now = time.perf_counter()
+        self.times[self._row + phase] += now - self.last_time
+        self.last_time = now
+
+    def count_tick(self):
+        self.ticks[self.frame % self.capacity] += 1
+
+    def end_frame(self):
+        self.frame += 1
+
+    def recorded_frames(self, last=None):
+        """Ring positions of the recorded frames (or only the last few), oldest first"""
+        count = min(self.frame, self.capacity)
+        if last is not None:
+            count = min(count, last)
+        return [(self.frame - count + i) % self.capacity for i in range(count)]
+
+    def frame_total(self, position):
+        row = position * self.n_phases
+        return sum(self.times[row:row + self.n_phases])
+
+    def percentiles(self, frames=None):
+        """p50 and p99 of total frame time in ms over the last `frames` frames"""
+        positions = self.recorded_frames(frames)
+        if not positions:
+            return 0.0, 0.0
+        totals = sorted(self.frame_total(position) for position in positions)
+        p50 = totals[int(0.50 * (len(totals) - 1))]
+        p99 = totals[int(round(0.99 * (len(totals) - 1)))]
+        return p50 * 1000, p99 * 1000
+
+    def phase_means(self, frames):
+        """Mean time per phase in ms over the last `frames` frames"""
+        positions = self.recorded_frames(frames)
+        if not positions:
+            return [0.0] * self.n_phases
+        return [sum(self.times[position * self.n_phases + phase] for position in positions) / len(positions) * 1000
+                for phase in range(self.n_phases)]
+
+    def write_csv(self, filename=None):
+        """Dump the ring buffer, oldest frame first, with times in milliseconds"""
+        filename = filename or self.csv_filename
+        with open(filename, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['frame', 'ticks'] + [f"{name}_ms" for name in PHASE_NAMES] + ['total_ms'])
+            first_frame = self.frame - len(self.recorded_frames())
+            for i, position in enumerate(self.recorded_frames()):
+                row = position * self.n_phases
+                phases = [self.times[row + phase] * 1000 for phase in range(self.n_phases)]
+                writer.writerow([first_frame + i, self.ticks[position]] + [f"{value:.4f}" for value in phases]
+                                + [f"{sum(phases):.4f}"])
+        return filename
+
+    # ------------------------------------------------------------------
+    # Live overlay
+
+    OVERLAY_RECT = pygame.Rect(SCREEN_WIDTH // 2 - 180, 4, 360, 90)
+    GRAPH_FRAMES = 120
+    GRAPH_MAX_MS = 2000 / FPS  # Graph height is two frame budgets
+
+    def draw_overlay(self, screen, render_cache):
+        """Frame-time graph of the last frames, with p50/p99 and per-phase means"""
+        rect = self.OVERLAY_RECT
+        screen.fill(WHITE, rect)
+        pygame.draw.rect(screen, BLACK, rect, 1)
+
+        # Text is refreshed twice a second so it stays readable (and cached)
+        if self._overlay_stats is None or self.frame - self._overlay_stats_frame >= FPS // 2:
+            p50, p99 = self.percentiles()
+            means = self.phase_means(FPS)
+            phases = [f"{name} {mean:.2f}" for name, mean in zip(PHASE_NAMES, means)]
+            self._overlay_stats = (
+                f"frame p50 {p50:.1f} ms  p99 {p99:.1f} ms  (phase means, ms)",
+                "  ".join(phases[:4]),
+                "  ".join(phases[4:]),
+            )
+            self._overlay_stats_frame = self.frame
+        for line, text in enumerate(self._overlay_stats):
+            screen.blit(render_cache.text(text, 18, BLACK), (rect.x + 6, rect.y + 4 + line * 14))
+
+        # One bar per frame; red when it took long enough to drop a frame
+        graph_bottom = rect.bottom - 4
+        graph_height = rect.height - 50
+        budget = 1.0 / FPS
+        budget_y = graph_bottom - int(graph_height * budget * 1000 / self.GRAPH_MAX_MS)
+        pygame.draw.line(screen, BLACK, (rect.x + 4, budget_y), (rect.right - 5, budget_y))
+        positions = self.recorded_frames(self.GRAPH_FRAMES)
+        bar_width = (rect.width - 8) // self.GRAPH_FRAMES
+        for i, position in enumerate(positions):
+            total = self.frame_total(position)
+            height = min(graph_height, int(graph_height * total * 1000 / self.GRAPH_MAX_MS))
+            color = RED if total > budget * 1.5 else GREEN
+            screen.fill(color, (rect.x + 4 + i * bar_width, graph_bottom - height, bar_width - 1, height))
@@ -0,0 +1,70 @@
+from collections import namedtuple
+
+import pygame
+
+
+# Input bits used by scripted inputs, bots and replays
+INPUT_LEFT = 1
+INPUT_RIGHT = 2
+INPUT_JUMP = 4
+
+
+class InputState(namedtuple('InputState', ['left', 'right', 'jump'])):
+    """Controls for one simulation frame (jump means "pressed this frame")"""
+    __slots__ = ()
+
+    @classmethod
+    def from_bits(cls, bits):
+        return cls(bool(bits & INPUT_LEFT), bool(bits & INPUT_RIGHT), bool(bits & INPUT_JUMP))
+
+    @property
+    def bits(self):
+        return (INPUT_LEFT if self.left else 0) | (INPUT_RIGHT if self.right else 0) | (INPUT_JUMP if self.jump else 0)
+
+
+NO_INPUT = InputState(False, False, False)
+
+
+class KeyboardInput:
+    """Reads held movement keys from pygame; jump presses are queued by Game.handle_events"""
+
+    def __init__(self):
+        self.jump_pressed = False
+
+    def press_jump(self):
+        self.jump_pressed = True
+
+    def poll(self):
+        keys = pygame.key.get_pressed()
+        left = bool(keys[pygame.K_LEFT] or keys[pygame.K_a])
+        right = bool(keys[pygame.K_RIGHT] or keys[pygame.K_d])
+        jump = self.jump_pressed
+        self.jump_pressed = False
+        return InputState(left, right, jump)
+
+
+class ScriptedInput:
+    """Feeds a fixed sequence of inputs (InputState or bit masks), then no input"""
+
+    def __init__(self, inputs=()):
+        self.inputs = iter(inputs)
+
+    def poll(self):
+        state = next(self.inputs, NO_INPUT)
+        if isinstance(state, int):
+            return InputState.from_bits(state)
+        return state
+
+
+class PolicyInput:
+    """Asks a policy callable for each frame's input: policy(game) -> InputState or bit mask"""
+
+    def __init__(self, policy, game=None):
+        self.policy = policy
+        self.game = game
+
+    def poll(self):
+        state = self.policy(self.game)
+        if isinstance(state, int):
+            return InputState.from_bits(state)
+        return state
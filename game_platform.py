@@ -1,31 +1,64 @@
+import bisect
+import math
 import pygame
 import random
 from constants import SCREEN_WIDTH, RED, BLUE, WHITE
 
+# Range of a gap's gap_start and gap_width
+GAP_START_MIN = 50
+GAP_START_MAX = SCREEN_WIDTH - 100
+GAP_WIDTH_MIN = 60
+GAP_WIDTH_MAX = 90
+
+
+# Per-frame gap fields and their array typecodes, for a ComponentStore (see entity_store.py)
+GAP_FIELDS = {
+    'x_offset': 'd', 'segment_origin': 'd', 'segment_frame': 'q', 'speed': 'd', 'direction': 'b',
+    'vertical_direction': 'b', 'gap_current_platform_index': 'q', 'gap_start': 'q', 'gap_width': 'q',
+}
+
 
 class Platform:
-    def __init__(self, y, speed, platform_index, all_platform_ys, gap_id=0):
+    __slots__ = ('y', 'original_y', 'height', 'speed', 'width', 'original_platform_index', 'num_levels', 'gap_id',
+                 'gap_index', 'gap_start', 'gap_width', 'x_offset', 'segment_origin', 'segment_frame',
+                 'gap_current_platform_index', 'direction', 'vertical_direction', 'has_reached_edge')
+
+    def __init__(self, y, speed, platform_index, all_platform_ys, gap_id=0, rng=None, gap_start=None, gap_width=None):
+        self.reset(y, speed, platform_index, all_platform_ys, gap_id, rng, gap_start, gap_width)
+
+    def reset(self, y, speed, platform_index, all_platform_ys, gap_id=0, rng=None, gap_start=None, gap_width=None):
+        """(Re)initialise the gap - EntityPool reuses gaps across levels"""
         self.y = y
         self.original_y = y
         self.height = 3  # Thinner platforms like the original
         self.speed = speed
         self.width = SCREEN_WIDTH
         self.original_platform_index = platform_index
-        self.all_platform_ys = all_platform_ys
+        self.num_levels = len(all_platform_ys)
         self.gap_id = gap_id  # Unique ID for this gap to track its movement
+        self.gap_index = None  # GapIndex this gap is registered with (set by GapIndex.add)
 
-        self.gap_start = random.randint(50, SCREEN_WIDTH - 100)
-        self.gap_width = random.randint(60, 90)
+        # rng is the game's random.Random (the module-level generator if not given)
+        if rng is None:
+            rng = random
+        # gap_start/gap_width are chosen by GapPlacer in setup_level; random when not given
+        self.gap_start = rng.randint(GAP_START_MIN, GAP_START_MAX) if gap_start is None else gap_start
+        self.gap_width = rng.randint(GAP_WIDTH_MIN, GAP_WIDTH_MAX) if gap_width is None else gap_width
         self.x_offset = 0
+        # x_offset is segment_origin + direction * speed * segment_frame, recomputed each
+        # frame rather than accumulated, so trajectory.py can jump to any frame exactly
+        self.segment_origin = 0
+        self.segment_frame = 0
 
         self.gap_current_platform_index = platform_index
-        self.direction = random.choice([-1, 1])
-        self.vertical_direction = random.choice([-1, 1])
+        self.direction = rng.choice([-1, 1])
+        self.vertical_direction = rng.choice([-1, 1])
         self.has_reached_edge = False  # Track if gap has reached one edge
 
     def update(self):
         self.y = self.original_y  # Always keep platform at original position
-        self.x_offset += self.direction * self.speed
+        self.segment_frame += 1
+        self.x_offset = self.segment_origin + self.direction * self.speed * self.segment_frame
 
         # Snake pattern: gap goes completely off screen, then appears on next platform from same edge
         # Going right - when gap END goes off right edge (gap_start + x_offset + gap_width >= width)
@@ -36,6 +69,7 @@ class Platform:
             # Position so the gap END is at the right edge
             self.x_offset = self.width - self.gap_start - self.gap_width
             self.direction = -1  # Now go left
+            self.start_segment()
         # Going left - when gap START goes off left edge (gap_start + x_offset <= 0)
         elif self.direction == -1 and (self.gap_start + self.x_offset) <= 0:
             # Gap completely off left edge - move to next platform
@@ -44,18 +78,37 @@ class Platform:
             # Position so gap start is at the left edge
             self.x_offset = -self.gap_start
             self.direction = 1  # Now go right
+            self.start_segment()
+
+    def start_segment(self):
+        """Start a straight run from the current x_offset in the current direction"""
+        self.segment_origin = self.x_offset
+        self.segment_frame = 0
 
     def move_gap_to_next_platform(self):
+        old_platform_index = self.gap_current_platform_index
         self.gap_current_platform_index += self.vertical_direction
 
         if self.gap_current_platform_index < 0:
             self.gap_current_platform_index = 0
             self.vertical_direction = 1
-        elif self.gap_current_platform_index >= len(self.all_platform_ys):
-            self.gap_current_platform_index = len(self.all_platform_ys) - 1
+        elif self.gap_current_platform_index >= self.num_levels:
+            self.gap_current_platform_index = self.num_levels - 1
             self.vertical_direction = -1
 
+        if self.gap_index is not None and self.gap_current_platform_index != old_platform_index:
+            self.gap_index.move(self, old_platform_index, self.gap_current_platform_index)
+
     def is_in_gap(self, x_position):
+        gap_actual_start, gap_actual_end = self.screen_span()
+
+        if gap_actual_end < gap_actual_start:
+            return x_position >= gap_actual_start or x_position <= gap_actual_end
+        else:
+            return gap_actual_start <= x_position <= gap_actual_end
+
+    def screen_span(self):
+        """Get (start, end) of the gap on screen; end < start means it wraps around the edge"""
         gap_actual_start = self.gap_start + self.x_offset
         gap_actual_end = gap_actual_start + self.gap_width
 
@@ -63,13 +116,7 @@ class Platform:
             gap_actual_start += self.width
             gap_actual_end += self.width
 
-        gap_actual_start = gap_actual_start % self.width
-        gap_actual_end = gap_actual_end % self.width
-
-        if gap_actual_end < gap_actual_start:
-            return x_position >= gap_actual_start or x_position <= gap_actual_end
-        else:
-            return gap_actual_start <= x_position <= gap_actual_end
+        return gap_actual_start % self.width, gap_actual_end % self.width
 
     def check_collision(self, player):
         if not (player.y + player.height >= self.y and player.y <= self.y + self.height):
@@ -81,28 +128,22 @@ class Platform:
         else:
             return True
 
-    def draw(self, screen, all_platforms, debug_mode=False):
+    def draw(self, screen, all_platforms, debug_mode=False, render_cache=None):
         # Find ALL gaps that should be displayed on this platform's level
-        active_gaps = []
-        for platform in all_platforms:
-            if platform.gap_current_platform_index == self.original_platform_index:
-                active_gaps.append(platform)
+        if self.gap_index is not None:
+            active_gaps = self.gap_index.gaps_on_level(self.original_platform_index)
+        else:
+            active_gaps = []
+            for platform in all_platforms:
+                if platform.gap_current_platform_index == self.original_platform_index:
+                    active_gaps.append(platform)
 
         if active_gaps:
             # Create a list to track all gap regions (to draw platform around them)
             gap_regions = []
 
             for active_gap in active_gaps:
-                gap_actual_start = active_gap.gap_start + active_gap.x_offset
-                gap_actual_end = gap_actual_start + active_gap.gap_width
-
-                while gap_actual_start < 0:
-                    gap_actual_start += self.width
-                    gap_actual_end += self.width
-
-                gap_actual_start = gap_actual_start % self.width
-                gap_actual_end = gap_actual_end % self.width
-
+                gap_actual_start, gap_actual_end = active_gap.screen_span()
                 gap_regions.append((gap_actual_start, gap_actual_end, active_gap))
 
             # Draw solid platform first
@@ -120,11 +161,229 @@ class Platform:
 
                 # Draw gap ID only in debug mode (to track gap movement)
                 if debug_mode:
-                    font = pygame.font.Font(None, 24)
-                    gap_text = font.render(str(active_gap.gap_id), True, BLUE)
+                    if render_cache is not None:
+                        gap_text = render_cache.text(str(active_gap.gap_id), 24, BLUE)
+                    else:
+                        font = pygame.font.Font(None, 24)
+                        gap_text = font.render(str(active_gap.gap_id), True, BLUE)
                     # Position the number in the middle of the gap
                     gap_center = (gap_start + active_gap.gap_width / 2) % self.width
                     screen.blit(gap_text, (gap_center - 6, self.y - 2))
         else:
             # No gap on this platform level - draw solid platform
             pygame.draw.rect(screen, RED, (0, self.y, self.width, self.height))
+
+
+def gaps_contain(gaps, x_position):
+    """Check if x_position is inside any of the given gaps (the test used for head-bumps and landing)"""
+    for gap in gaps:
+        gap_actual_start = (gap.gap_start + gap.x_offset) % gap.width
+        gap_actual_end = gap_actual_start + gap.gap_width
+
+        if gap_actual_end > gap.width:
+            if x_position >= gap_actual_start or x_position <= gap_actual_end - gap.width:
+                return True
+        elif gap_actual_start <= x_position <= gap_actual_end:
+            return True
+    return False
+
+
+class GapIndex:
+    """Tracks which gaps are currently on each platform level.
+
+    Gaps register with add(); Platform.move_gap_to_next_platform keeps the index
+    up to date, so per-level queries only look at the gaps on that level instead
+    of scanning every gap.
+    """
+
+    def __init__(self, platform_positions):
+        self.platform_positions = platform_positions
+        self.levels = [[] for _ in platform_positions]
+        # Gaps that originate on a level but are currently on another one
+        self.away_counts = [0] * len(platform_positions)
+
+    def add(self, gap):
+        gap.gap_index = self
+        self.levels[gap.gap_current_platform_index].append(gap)
+        if gap.gap_current_platform_index != gap.original_platform_index:
+            self.away_counts[gap.original_platform_index] += 1
+
+    def move(self, gap, old_platform_index, new_platform_index):
+        self.levels[old_platform_index].remove(gap)
+        self.levels[new_platform_index].append(gap)
+        if old_platform_index == gap.original_platform_index:
+            self.away_counts[gap.original_platform_index] += 1
+        elif new_platform_index == gap.original_platform_index:
+            self.away_counts[gap.original_platform_index] -= 1
+
+    def gaps_on_level(self, platform_index):
+        return self.levels[platform_index]
+
+    def is_in_any_gap(self, platform_index, x_position):
+        """Check if x_position falls through a gap on the given platform level"""
+        return gaps_contain(self.levels[platform_index], x_position)
+
+    def bar_is_solid_at(self, platform_index, x_position):
+        """Platform.check_collision for every gap originating on this level at once.
+
+        A gap that has moved away from its original level leaves that bar solid;
+        a gap at home is solid everywhere except inside the gap itself.
+        """
+        if self.away_counts[platform_index] > 0:
+            return True
+        for gap in self.levels[platform_index]:
+            if gap.original_platform_index == platform_index and not gap.is_in_gap(x_position):
+                return True
+        return False
+
+
+class GapPlacer:
+    """Chooses starting platforms and positions for a level's gaps.
+
+    Gaps starting on the same platform must have their centers at least
+    min_distance apart, measured around the wrapping screen. For each platform
+    the placer keeps the sorted, disjoint intervals of gap centers that are
+    still allowed and samples a position directly from them, so placing a gap
+    costs time proportional to the (small) number of intervals instead of
+    retrying random positions.
+
+    Given the level's gap count, it also keeps room for the gaps still to
+    come: a random position that would leave too little room (see capacity())
+    is redrawn, and after a few tries the gap is packed against its
+    neighbours instead, which never costs more room than the gap itself. So
+    the spacing only gives way when the count can't fit at all; then the gap
+    goes where it is furthest from the gaps already on the emptiest platform.
+    """
+
+    PLACE_ATTEMPTS = 8
+
+    def __init__(self, num_levels, rng, min_distance=100, count=0):
+        self.rng = rng
+        self.min_distance = min_distance
+        self.free = [[(0.0, float(SCREEN_WIDTH))] for _ in range(num_levels)]
+        self.centers = [[] for _ in range(num_levels)]
+        self.remaining = count  # Gaps still to be placed
+        # Centers every gap width can be placed at
+        self.safe_low = GAP_START_MIN + GAP_WIDTH_MAX / 2
+        self.safe_high = GAP_START_MAX + GAP_WIDTH_MIN / 2
+
+    def start_ranges(self, level, gap_width):
+        """Inclusive ranges of integer gap_start values that keep the spacing on a level"""
+        half = gap_width / 2
+        ranges = []
+        for low, high in self.free[level]:
+            first = max(GAP_START_MIN, math.ceil(low - half))
+            last = min(GAP_START_MAX, math.floor(high - half))
+            if first <= last:
+                ranges.append((first, last))
+        return ranges
+
+    def stretches(self, free):
+        """(lowest, highest) center a gap of any width can surely use, per free interval with room.
+
+        Centers fall on whole or half pixels depending on the gap width, so the
+        first usable one can be up to half a pixel past the interval's start.
+        """
+        stretches = []
+        for low, high in free:
+            low = max(low, self.safe_low)
+            high = min(high, self.safe_high) - 0.5
+            if low <= high:
+                stretches.append((low, high))
+        return stretches
+
+    def capacity(self, free):
+        """How many more gaps of any width surely fit in a level's free centers with the spacing.
+
+        Counted one pixel further apart than min_distance, which absorbs the
+        half pixel each packed gap may be shifted by.
+        """
+        step = self.min_distance + 1
+        return sum(int((high - low) // step) + 1 for low, high in self.stretches(free))
+
+    def place(self):
+        """Pick (platform_index, gap_start, gap_width) for the next gap and reserve its space"""
+        gap_width = self.rng.randint(GAP_WIDTH_MIN, GAP_WIDTH_MAX)
+        self.remaining = max(0, self.remaining - 1)
+        candidates = []
+        for level in range(len(self.free)):
+            ranges = self.start_ranges(level, gap_width)
+            if ranges:
+                candidates.append((level, ranges))
+
+        if candidates:
+            capacities = [self.capacity(free) for free in self.free]
+            total = sum(capacities)
+            # Leave room for every gap still to come, or if that's impossible
+            # at least don't waste more room than this gap takes
+            needed = min(self.remaining, total - 1)
+            for _ in range(self.PLACE_ATTEMPTS):
+                level, gap_start = self.random_start(candidates)
+                free = self.without(self.free[level], gap_start + gap_width / 2)
+                if total - capacities[level] + self.capacity(free) >= needed:
+                    break
+            else:
+                level, gap_start = self.packed_start(gap_width)
+        else:
+            level = min(range(len(self.centers)), key=lambda level: len(self.centers[level]))
+            gap_start = self.furthest_start(level, gap_width)
+
+        self.reserve(level, gap_start + gap_width / 2)
+        return level, gap_start, gap_width
+
+    def random_start(self, candidates):
+        """A uniformly random allowed gap_start on a random level with room"""
+        level, ranges = self.rng.choice(candidates)
+        choice = self.rng.randrange(sum(last - first + 1 for first, last in ranges))
+        for first, last in ranges:
+            if choice <= last - first:
+                return level, first + choice
+            choice -= last - first + 1
+
+    def packed_start(self, gap_width):
+        """The lowest free position of a random free stretch: it only uses up this gap's own room"""
+        stretches = [(level, low) for level, free in enumerate(self.free) for low, _ in self.stretches(free)]
+        level, low = self.rng.choice(stretches)
+        return level, math.ceil(low - gap_width / 2)
+
+    def furthest_start(self, level, gap_width):
+        """gap_start on a full level whose center is as far as possible from the gaps already there"""
+        centers = self.centers[level]
+        half = gap_width / 2
+        # The best center is midway between two neighbouring gaps (or at the end of the range)
+        options = [GAP_START_MIN + half, GAP_START_MAX + half]
+        for i, center in enumerate(centers):
+            following = centers[(i + 1) % len(centers)] + (SCREEN_WIDTH if i + 1 == len(centers) else 0)
+            options.append(((center + following) / 2) % SCREEN_WIDTH)
+
+        def distance_to_nearest(center):
+            # Around the circle the nearest gap is one of the two neighbours in sorted order
+            i = bisect.bisect_left(centers, center)
+            return min(min(abs(center - other), SCREEN_WIDTH - abs(center - other))
+                       for other in (centers[i % len(centers)], centers[i - 1]))
+
+        best = max(options, key=lambda center: distance_to_nearest(
+            min(GAP_START_MAX, max(GAP_START_MIN, round(center - half))) + half))
+        return min(GAP_START_MAX, max(GAP_START_MIN, round(best - half)))
+
+    def reserve(self, level, center):
+        """Forbid centers closer than min_distance to center on a level"""
+        bisect.insort(self.centers[level], center)
+        self.free[level] = self.without(self.free[level], center)
+
+    def without(self, free, center):
+        """free minus the open interval of centers closer than min_distance to center (wrapped)"""
+        for shift in (-SCREEN_WIDTH, 0, SCREEN_WIDTH):
+            low = center + shift - self.min_distance
+            high = center + shift + self.min_distance
+            remaining = []
+            for free_low, free_high in free:
+                if free_high <= low or free_low >= high:
+                    remaining.append((free_low, free_high))
+                    continue
+                if free_low <= low:
+                    remaining.append((free_low, low))
+                if high <= free_high:
+                    remaining.append((high, free_high))
+            free = remaining
+        return free
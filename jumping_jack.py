@@ -1,36 +1,221 @@
-import pygame
 import random
 import sys
-
-from constants import SCREEN_WIDTH, SCREEN_HEIGHT, FPS, WHITE, BLACK, RED, BLUE
-from player import Player
-from game_platform import Platform
-from enemy_types import create_enemy
-from sound_manager import SoundManager
-from leaderboard import Leaderboard
-
-pygame.init()
+import threading
+import time
+
+from startup_profile import startup_profile
+
+with startup_profile.stage("import pygame"):
+    import pygame
+
+with startup_profile.stage("import game modules"):
+    from constants import SCREEN_WIDTH, SCREEN_HEIGHT, FPS, WHITE, BLACK, RED, BLUE
+    from player import Player
+    from game_platform import Platform, GapIndex, GapPlacer, GAP_FIELDS
+    from enemy_types import BaseEnemy, ENEMY_TYPES, ENEMY_FIELDS, EnemyLanes, enemy_types_for_level
+    from entity_store import ComponentStore, EntityPool
+    from sound_manager import SoundManager, NullSoundManager
+    from leaderboard import Leaderboard
+    from game_input import KeyboardInput, ScriptedInput
+    from replay import RecordingInput
+    from render_cache import RenderCache
+    from sprite_cache import SpriteAtlas
+    from dirty_renderer import DirtyRectRenderer
+    from frame_profiler import (FrameProfiler, PHASE_EVENTS, PHASE_PLATFORMS, PHASE_ENEMIES, PHASE_PLAYER,
+                                PHASE_COLLISIONS, PHASE_OTHER, PHASE_DRAW, PHASE_TICK)
+
+
+# Most simulation ticks run in one frame to catch up after a stall
+MAX_CATCH_UP_TICKS = 5
+
+
+class FramePacer:
+    """Paces the windowed loop to fixed simulation ticks.
+
+    ticks_due() turns the time since its last call into whole ticks (at most
+    max_catch_up after a stall) and keeps the remainder; wait() sleeps until
+    the next tick is due. Clock.tick(FPS) sleeps whole milliseconds - 16 ms
+    against a 16.67 ms tick - so every so often a frame woke before its tick
+    and showed the same picture again.
+
+    wait() only busy-waits where the platform's sleep is too coarse: at
+    startup it measures how late sleep() wakes up, and if that is more than
+    MAX_SLEEP_OVERSHOOT it spins for that long before each deadline. clock and
+    sleep default to time.perf_counter and time.sleep.
+    """
+
+    # Lateness of a wake-up that still doesn't show as uneven frames
+    MAX_SLEEP_OVERSHOOT = 0.002
+
+    def __init__(self, tick_time, max_catch_up=MAX_CATCH_UP_TICKS, clock=time.perf_counter, sleep=time.sleep,
+                 spin_margin=None):
+        self.tick_time = tick_time
+        self.max_catch_up = max_catch_up
+        self.clock = clock
+        self.sleep = sleep
+        if spin_margin is None:
+            overshoot = self.measure_sleep_overshoot()
+            spin_margin = overshoot if overshoot > self.MAX_SLEEP_OVERSHOOT else 0.0
+        self.spin_margin = spin_margin
+        self.restart()
+
+    def measure_sleep_overshoot(self, samples=5, duration=0.001):
+        """How much later than asked the worst of a few short sleeps woke up"""
+        worst = 0.0
+        for _ in range(samples):
+            started = self.clock()
+            self.sleep(duration)
+            worst = max(worst, self.clock() - started - duration)
+        return worst
+
+    def restart(self):
+        """Start counting ticks from now (after the loop ran unpaced)"""
+        self.accumulator = 0.0
+        self.previous_time = self.clock()
+
+    def ticks_due(self):
+        now = self.clock()
+        self.accumulator = min(self.accumulator + now - self.previous_time, self.max_catch_up * self.tick_time)
+        self.previous_time = now
+        # The epsilon keeps a frame woken exactly on time from rounding down to 0 ticks
+        ticks = int(self.accumulator / self.tick_time + 1e-6)
+        self.accumulator -= ticks * self.tick_time
+        return ticks
+
+    def wait(self):
+        """Sleep until the next tick is due"""
+        deadline = self.previous_time + self.tick_time - self.accumulator
+        # Sleep again if woken early
+        remaining = deadline - self.clock()
+        while remaining > self.spin_margin:
+            self.sleep(remaining - self.spin_margin)
+            remaining = deadline - self.clock()
+        while self.spin_margin and self.clock() < deadline:
+            pass
 
 
 class Game:
-    def __init__(self, debug_mode=False):
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("Jumping Jack")
-        self.clock = pygame.time.Clock()
+    def __init__(self, debug_mode=False, headless=False, input_source=None, leaderboard=None, dirty_rects=False,
+                 seed=None, profile=False, component_store=False, mixer_frequency=None, mixer_buffer=None,
+                 music=True, sound=True):
+        # Headless games never touch the display, mixer or event pump: they
+        # step the simulation from input_source as fast as the CPU allows
+        self.headless = headless
+        if headless:
+            self.screen = None
+        else:
+            # Only what the name entry screen needs - the mixer, sounds and
+            # leaderboard are brought up after its first frame is shown
+            with startup_profile.stage("display init"):
+                pygame.display.init()
+                pygame.font.init()
+                self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+                pygame.display.set_caption("Jumping Jack")
+        # Menu animations run on our own clock: pygame.time.get_ticks() stays 0 until
+        # SDL's timer is started, which only pygame.init() (and so the mixer) does up front
+        self.started_at = time.perf_counter()
+        if input_source is None:
+            input_source = ScriptedInput() if headless else KeyboardInput()
+        self.input_source = input_source
+        self.render_cache = RenderCache()
+        self.sprite_atlas = SpriteAtlas()
+        # Opt-in: repaint and present only the regions that changed during play
+        self.dirty_renderer = DirtyRectRenderer() if dirty_rects and not headless else None
+        # Opt-in: per-phase frame timings with a live overlay (None costs one check per phase)
+        self.profiler = FrameProfiler() if profile and not headless else None
+        # Gaps and enemies are reused across levels; with component_store their
+        # per-frame fields live in typed arrays (see entity_store.py)
+        if component_store:
+            self.entity_pool = EntityPool({Platform: ComponentStore(GAP_FIELDS),
+                                           BaseEnemy: ComponentStore(ENEMY_FIELDS)})
+        else:
+            self.entity_pool = EntityPool()
+        self.player = None
+        self.platforms = []
+        self.enemies = []
         self.running = True
+        # All gameplay randomness comes from this generator, so a seed plus the
+        # per-frame inputs reproduce a game exactly (see replay.py)
+        self.reseed(seed)
+        self.replay_filename = None
+        self.replay_saved = False
         self.total_score = 0
         self.level = 1
         self.lives = 5
         self.level_transition = False
         self.transition_timer = 0
         self.score_timer = 0
-        self.sound_manager = SoundManager()
+        # Created on first use (see the properties below) or by start_background_init();
+        # sound=False keeps a windowed game silent as well
+        self._sound_manager = NullSoundManager() if headless or not sound else None
+        # Mixer sample rate and buffer size (None keeps SoundManager's defaults)
+        self.sound_settings = {key: value for key, value in
+                               (('frequency', mixer_frequency), ('buffer', mixer_buffer)) if value is not None}
+        self.sound_settings['music'] = music
         self.debug_mode = debug_mode
-        self.leaderboard = Leaderboard()
+        if leaderboard is None and headless:
+            # Headless runs keep scores in memory so they never touch the kiosk's file
+            leaderboard = Leaderboard(filename=None)
+        self._leaderboard = leaderboard
+        self._init_lock = threading.Lock()
+        self.background_init_thread = None
         self.player_name = ""
         self.name_entry_active = True
         self.game_started = False
         self.show_leaderboard = False
+        self.last_entry = None  # Leaderboard entry of the last finished game
+
+        if headless:
+            # No name entry screen - go straight into the first level
+            self.player_name = "Headless"
+            self.name_entry_active = False
+            self.game_started = True
+            self.setup_level()
+
+    @property
+    def sound_manager(self):
+        if self._sound_manager is None:
+            with startup_profile.stage("sound manager"):
+                self._sound_manager = SoundManager(**self.sound_settings)
+        return self._sound_manager
+
+    @property
+    def leaderboard(self):
+        if self._leaderboard is None:
+            # The background loader may be reading it right now
+            with self._init_lock:
+                if self._leaderboard is None:
+                    with startup_profile.stage("leaderboard load"):
+                        self._leaderboard = Leaderboard()
+        return self._leaderboard
+
+    def start_background_init(self):
+        """Bring up the subsystems the name entry screen doesn't need.
+
+        The mixer is opened here on the main thread; sound synthesis and
+        leaderboard parsing continue on background threads. Anything used
+        before they finish is created on demand instead.
+        """
+        self.sound_manager.warm(background=True)
+        self.background_init_thread = threading.Thread(target=lambda: self.leaderboard,
+                                                       name="leaderboard-load", daemon=True)
+        self.background_init_thread.start()
+
+    def reseed(self, seed=None):
+        """Start a new random sequence (from a fresh random seed if none is given)"""
+        self.seed = seed if seed is not None else random.randrange(1 << 32)
+        self.rng = random.Random(self.seed)
+
+    def record_replay(self, filename):
+        """Record every game from now on; the current one is written to filename when it ends"""
+        self.input_source = RecordingInput(self.input_source, self.seed)
+        self.replay_filename = filename
+        self.replay_saved = False
+
+    def save_replay(self):
+        if self.replay_filename and not self.replay_saved:
+            self.input_source.save(self.replay_filename, self)
+            self.replay_saved = True
 
     def reset_game(self):
         self.total_score = 0
@@ -43,71 +228,51 @@ class Game:
         self.game_started = False
         self.show_leaderboard = False
         # Keep player_name to show as default in name entry
+        self.reseed()
+        if self.replay_filename:
+            self.input_source.restart(self.seed)
+            self.replay_saved = False
 
     def setup_level(self):
-        self.player = Player(self.sound_manager)
+        if self.player is None:
+            self.player = Player(self.sound_manager)
+        else:
+            self.player.reset(self.sound_manager)
+        # The previous level's gaps and enemies are recycled by the pool
+        self.entity_pool.release(self.platforms)
+        self.entity_pool.release(self.enemies)
         self.platforms = []
         self.enemies = []
+        self.enemy_colors = set()  # Colors of the enemies on screen
         # More gradual speed increase: +0.2 per level
         # Level 1: 1.2, Level 2: 1.4, Level 3: 1.6, Level 6: 2.2, Level 10: 3.0
         self.base_speed = 1.2 + (self.level - 1) * 0.2
         self.invincibility_timer = FPS * 2  # 2 seconds of invincibility at start
+        # Background music for the level, faster as the gaps speed up
+        self.sound_manager.start_music(self.level, self.base_speed)
 
         # 5 elevated platforms - closer together like the original
         # Player stands on ground at y=370 (no platform there)
         # First platform at y=340 (30 pixels above ground), then upward every 60 pixels
         self.platform_positions = [340, 280, 220, 160, 100]
+        self.gap_index = GapIndex(self.platform_positions)
+        self.enemy_lanes = EnemyLanes(self.platform_positions)
 
         # Number of gaps increases with level: Level 1 = 6 gaps, Level 2 = 7 gaps, etc.
         num_gaps = 5 + self.level
 
         # Create gaps with random starting platforms - gaps may naturally meet on same platform
-        # if they move there from different directions
+        # if they move there from different directions. Gaps starting on the same platform are
+        # kept at least 100 pixels apart (between centers) whenever there is room for that.
         # Each gap gets a unique ID (0, 1, 2, ...) to track its movement in debug mode
-        for gap_index in range(num_gaps):
-            # Try to find a non-overlapping position for this gap
-            max_attempts = 20
-            gap_created = False
-
-            for attempt in range(max_attempts):
-                # Each gap starts on a random platform
-                platform_index = random.randint(0, len(self.platform_positions) - 1)
-                y = self.platform_positions[platform_index]
-
-                # Create temporary gap to check position
-                temp_gap = Platform(y, self.base_speed, platform_index, self.platform_positions, gap_id=gap_index)
-
-                # Check if this gap overlaps with any existing gap on the same platform
-                overlaps = False
-                min_gap_distance = 100  # Minimum pixels between gaps on same platform
-
-                for existing_gap in self.platforms:
-                    # Only check gaps that are currently on the same platform
-                    if existing_gap.gap_current_platform_index == platform_index:
-                        # Calculate the distance between gap centers
-                        existing_gap_center = existing_gap.gap_start + existing_gap.gap_width / 2
-                        temp_gap_center = temp_gap.gap_start + temp_gap.gap_width / 2
-
-                        # Account for screen wrapping
-                        distance = abs(existing_gap_center - temp_gap_center)
-                        wrapped_distance = SCREEN_WIDTH - distance
-                        actual_distance = min(distance, wrapped_distance)
-
-                        # Check if gaps are too close
-                        if actual_distance < min_gap_distance:
-                            overlaps = True
-                            break
-
-                if not overlaps:
-                    self.platforms.append(temp_gap)
-                    gap_created = True
-                    break
-
-            # If we couldn't find a non-overlapping position after max attempts, add it anyway
-            if not gap_created:
-                platform_index = random.randint(0, len(self.platform_positions) - 1)
-                y = self.platform_positions[platform_index]
-                self.platforms.append(Platform(y, self.base_speed, platform_index, self.platform_positions, gap_id=gap_index))
+        placer = GapPlacer(len(self.platform_positions), self.rng, min_distance=100, count=num_gaps)
+        for gap_id in range(num_gaps):
+            platform_index, gap_start, gap_width = placer.place()
+            gap = self.entity_pool.acquire(Platform, self.platform_positions[platform_index], self.base_speed,
+                                           platform_index, self.platform_positions, gap_id=gap_id, rng=self.rng,
+                                           gap_start=gap_start, gap_width=gap_width)
+            self.platforms.append(gap)
+            self.gap_index.add(gap)
 
         # Progressive enemy spawning: X initial enemies, Y added during level
         # Level 1: 2 initial, 1 added | Level 2: 3 initial, 2 added | etc.
@@ -120,18 +285,11 @@ class Game:
         self.used_enemy_types = set()
 
         # Level-based enemy types - unlock new enemies as levels progress
-        if self.level == 1:
-            self.all_enemy_types = ['snake', 'plane', 'axel', 'octopus']
-        elif self.level == 2:
-            self.all_enemy_types = ['snake', 'plane', 'axel', 'octopus', 'ghost']
-        elif self.level == 3:
-            self.all_enemy_types = ['snake', 'plane', 'axel', 'octopus', 'ghost', 'car']
-        elif self.level == 4:
-            self.all_enemy_types = ['snake', 'plane', 'axel', 'octopus', 'ghost', 'car', 'train']
-        elif self.level == 5:
-            self.all_enemy_types = ['snake', 'plane', 'axel', 'octopus', 'ghost', 'car', 'train', 'hunter']
-        else:  # Level 6+
-            self.all_enemy_types = ['snake', 'plane', 'axel', 'octopus', 'ghost', 'car', 'train', 'hunter', 'dinosaur']
+        # (4 types on level 1, then one more per level up to all 9 on level 6)
+        self.all_enemy_types = enemy_types_for_level(self.level)
+        if not self.headless:
+            # Every pose of the level's enemies, so draw() never bakes mid-level
+            self.sprite_atlas.prebake(ENEMY_TYPES[name] for name in self.all_enemy_types)
 
         # Spawn initial enemies with random positions
         for _ in range(self.initial_enemies):
@@ -139,16 +297,15 @@ class Game:
 
     def get_colors_on_screen(self):
         """Get set of all colors currently visible on screen"""
-        colors_on_screen = set()
-        for enemy in self.enemies:
-            # Convert color tuple to a hashable format
-            colors_on_screen.add(enemy.color)
-        return colors_on_screen
+        return self.enemy_colors
+
+    def add_enemy(self, enemy):
+        self.enemies.append(enemy)
+        self.enemy_lanes.add(enemy)
+        self.enemy_colors.add(enemy.color)
 
     def spawn_enemy(self):
         """Spawn a new enemy at a random position, avoiding overlaps"""
-        import random
-
         # Choose enemy type - prefer unused types before repeating
         available_types = [t for t in self.all_enemy_types if t not in self.used_enemy_types]
         if not available_types:
@@ -156,103 +313,53 @@ class Game:
             self.used_enemy_types.clear()
             available_types = self.all_enemy_types.copy()
 
-        chosen_type = random.choice(available_types)
+        chosen_type = self.rng.choice(available_types)
         self.used_enemy_types.add(chosen_type)
+        enemy_class = ENEMY_TYPES[chosen_type]
 
-        # Get all 6 possible colors for this enemy type
-        from enemy_types import Snake, Plane, Axel, Octopus, Ghost, Car, Train, Hunter, Dinosaur
-        enemy_class_map = {
-            'snake': Snake, 'plane': Plane, 'axel': Axel, 'octopus': Octopus,
-            'ghost': Ghost, 'car': Car, 'train': Train, 'hunter': Hunter, 'dinosaur': Dinosaur
-        }
-
-        # Create a temporary enemy to get its color list
-        temp_class = enemy_class_map[chosen_type]
-        temp_obj = temp_class(self.platform_positions, self.base_speed, 0, 0)
-
-        # Get the colors list from the temporary object
-        if chosen_type == 'snake':
-            all_colors = [(50, 200, 50), (200, 200, 50), (50, 100, 200), (255, 140, 0), (0, 255, 127), (173, 216, 230)]
-        elif chosen_type == 'plane':
-            all_colors = [(200, 50, 50), (150, 50, 150), (255, 140, 0), (0, 191, 255), (255, 20, 147), (255, 215, 0)]
-        elif chosen_type == 'axel':
-            all_colors = [(255, 215, 0), (50, 200, 50), (255, 140, 0), (255, 20, 147), (0, 255, 255), (200, 50, 50)]
-        elif chosen_type == 'octopus':
-            all_colors = [(255, 20, 147), (50, 200, 50), (200, 50, 50), (255, 140, 0), (0, 191, 255), (150, 50, 150)]
-        elif chosen_type == 'ghost':
-            all_colors = [(0, 255, 255), (255, 140, 0), (255, 105, 180), (173, 216, 230), (50, 200, 50), (150, 50, 150)]
-        elif chosen_type == 'car':
-            all_colors = [(200, 200, 50), (0, 191, 255), (255, 140, 0), (0, 255, 127), (255, 20, 147), (200, 50, 50)]
-        elif chosen_type == 'train':
-            all_colors = [(138, 43, 226), (50, 200, 50), (255, 140, 0), (0, 191, 255), (255, 215, 0), (200, 50, 50)]
-        elif chosen_type == 'hunter':
-            all_colors = [(255, 140, 0), (50, 200, 50), (138, 43, 226), (0, 191, 255), (255, 20, 147), (200, 50, 50)]
-        elif chosen_type == 'dinosaur':
-            all_colors = [(0, 191, 255), (150, 50, 150), (255, 140, 0), (205, 92, 92), (255, 215, 0), (50, 200, 50)]
-        else:
-            all_colors = [(200, 50, 50), (50, 200, 50), (50, 100, 200), (255, 140, 0), (0, 255, 255), (255, 215, 0)]
-
-        # Get colors currently on screen
-        colors_on_screen = self.get_colors_on_screen()
-
-        # Find colors not currently on screen
-        available_colors = [c for c in all_colors if c not in colors_on_screen]
-
-        # If all colors are on screen, use any color
-        if not available_colors:
-            available_colors = all_colors
-
-        # Pick a random color from available colors
-        chosen_color = random.choice(available_colors)
-        color_variant = all_colors.index(chosen_color)
+        # Pick a random color from those of the type's palette not currently on screen
+        # (any color if they all are)
+        all_colors = enemy_class.COLORS
+        available_colors = [c for c in all_colors if c not in self.enemy_colors] or all_colors
+        color_variant = all_colors.index(self.rng.choice(available_colors))
 
+        # Pick the spot first and only create the enemy that is actually spawned
         max_attempts = 10
         for attempt in range(max_attempts):
             # Random platform, random starting side, random position offset
-            platform_idx = random.randint(0, len(self.platform_positions) - 1)
-            start_side = random.choice([-1, 1])  # -1 = left edge, 1 = right edge
-
-            # Create temporary enemy using factory function
-            temp_enemy = create_enemy(chosen_type, self.platform_positions, self.base_speed,
-                                     start_platform_index=platform_idx, color_variant=color_variant)
+            platform_idx = self.rng.randint(0, len(self.platform_positions) - 1)
+            start_side = self.rng.choice([-1, 1])  # -1 = left edge, 1 = right edge
 
             # Set random x position based on side
             if start_side == -1:
-                # Start from left side, somewhere off-screen to 1/4 across
-                temp_enemy.x = random.randint(-temp_enemy.width * 2, int(SCREEN_WIDTH * 0.25))
-                temp_enemy.direction = 1  # Moving right
+                # Start from left side, somewhere off-screen to 1/4 across, moving right
+                x = self.rng.randint(-enemy_class.WIDTH * 2, int(SCREEN_WIDTH * 0.25))
             else:
-                # Start from right side, somewhere 3/4 across to off-screen
-                temp_enemy.x = random.randint(int(SCREEN_WIDTH * 0.75),
-                                             SCREEN_WIDTH + temp_enemy.width)
-                temp_enemy.direction = -1  # Moving left
-
-            # Check if this position overlaps with existing enemies
-            overlaps = False
-            for existing_enemy in self.enemies:
-                # Check if enemies are on same platform and too close horizontally
-                if (existing_enemy.current_platform_index == temp_enemy.current_platform_index):
-                    x_distance = abs(existing_enemy.x - temp_enemy.x)
-                    if x_distance < 100:  # Minimum 100 pixels apart
-                        overlaps = True
-                        break
+                # Start from right side, somewhere 3/4 across to off-screen, moving left
+                x = self.rng.randint(int(SCREEN_WIDTH * 0.75), SCREEN_WIDTH + enemy_class.WIDTH)
+
+            # Check if this position overlaps with existing enemies on the same platform
+            # (minimum 100 pixels apart horizontally)
+            overlaps = self.enemy_lanes.any_within(platform_idx, x, 100)
 
             # Also check if enemy spawns too close to player's initial position
             # Player starts at x=100 on the ground (not on any platform)
             # Only check if enemy is on the ground level (platform index would be -1 or closest to ground)
             player_start_x = 100
-            player_start_distance = abs(temp_enemy.x - player_start_x)
+            player_start_distance = abs(x - player_start_x)
             # If enemy is on lowest platform and too close to player start position, skip
-            if temp_enemy.current_platform_index == len(self.platform_positions) - 1:  # Closest to ground
+            if platform_idx == len(self.platform_positions) - 1:  # Closest to ground
                 if player_start_distance < 150:  # Give player more space at start
                     overlaps = True
 
             if not overlaps:
-                self.enemies.append(temp_enemy)
-                return
+                break
+        # If all attempts failed, the last spot is used anyway
 
-        # If all attempts failed, just add it anyway
-        self.enemies.append(temp_enemy)
+        enemy = self.entity_pool.acquire(enemy_class, self.platform_positions, self.base_speed, platform_idx,
+                                         color_variant, self.rng)
+        enemy.place(x, -start_side)
+        self.add_enemy(enemy)
 
     def handle_events(self):
         for event in pygame.event.get():
@@ -276,11 +383,9 @@ class Game:
                         if event.unicode.isprintable():
                             self.player_name += event.unicode
                 elif event.key == pygame.K_SPACE or event.key == pygame.K_UP:
-                    if self.level_transition:
-                        self.level_transition = False
-                        self.setup_level()
-                    elif self.game_started:
-                        self.player.jump()
+                    # Jump (or skipping the level transition) is applied in update()
+                    if self.game_started and hasattr(self.input_source, 'press_jump'):
+                        self.input_source.press_jump()
                 elif event.key == pygame.K_r:
                     if self.lives <= 0:
                         self.reset_game()
@@ -295,33 +400,55 @@ class Game:
         if not self.game_started:
             return
 
+        profiler = self.profiler
+        # Each sound effect plays at most once per frame
+        self.sound_manager.begin_frame()
+        controls = self.input_source.poll()
+
         if self.level_transition:
-            self.transition_timer += 1
-            if self.transition_timer >= FPS * 3:
+            if controls.jump:
+                # Jump skips the transition screen, but doesn't make Jack jump
                 self.level_transition = False
                 self.setup_level()
-            return
+                controls = controls._replace(jump=False)
+            else:
+                self.transition_timer += 1
+                if self.transition_timer >= FPS * 3:
+                    self.level_transition = False
+                    self.setup_level()
+                return
+
+        if controls.jump:
+            self.player.jump()
 
-        keys = pygame.key.get_pressed()
         moved = False
-        if keys[pygame.K_LEFT] or keys[pygame.K_a]:
+        if controls.left:
             self.player.move_left()
             moved = True
-        if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
+        if controls.right:
             self.player.move_right()
             moved = True
 
         # Reset direction if not moving
         if not moved:
             self.player.last_direction = 0
+        if profiler is not None:
+            profiler.lap(PHASE_OTHER)
 
         for platform in self.platforms:
             platform.update()
+        if profiler is not None:
+            profiler.lap(PHASE_PLATFORMS)
 
         for enemy in self.enemies:
             enemy.update()
+        self.enemy_lanes.positions_changed()
+        if profiler is not None:
+            profiler.lap(PHASE_ENEMIES)
 
-        self.player.update(self.platforms, self.platform_positions)
+        self.player.update(self.platforms, self.platform_positions, self.gap_index)
+        if profiler is not None:
+            profiler.lap(PHASE_PLAYER)
 
         if self.player.y <= 0:
             self.level += 1
@@ -336,12 +463,13 @@ class Game:
 
         # Only check collisions if not invincible
         if self.invincibility_timer <= 0:
-            if self.player.check_crushed(self.platforms):
+            if self.player.check_crushed(self.platforms, self.gap_index):
                 self.lives -= 1
                 if self.lives <= 0:
                     # Game over - save score and show leaderboard
-                    self.leaderboard.add_score(self.player_name, self.total_score, self.level)
+                    self.last_entry = self.leaderboard.add_score(self.player_name, self.total_score, self.level)
                     self.show_leaderboard = True
+                    self.sound_manager.stop_music()
                 self.player.x = 100
                 self.player.y = 370 - 32  # Standing on ground at y=370, player height is 32
                 self.player.velocity_y = 0
@@ -349,13 +477,15 @@ class Game:
                 self.invincibility_timer = FPS * 1  # 1 second invincibility after death
                 self.sound_manager.play('death')
 
-            for enemy in self.enemies:
+            # Only enemies in lanes and x ranges that can reach Jack get the full box test
+            for enemy in self.enemy_lanes.collision_candidates(self.player):
                 if enemy.check_collision(self.player):
                     self.lives -= 1
                     if self.lives <= 0:
                         # Game over - save score and show leaderboard
-                        self.leaderboard.add_score(self.player_name, self.total_score, self.level)
+                        self.last_entry = self.leaderboard.add_score(self.player_name, self.total_score, self.level)
                         self.show_leaderboard = True
+                        self.sound_manager.stop_music()
                     self.player.x = 100
                     self.player.y = 370 - 32  # Standing on ground at y=370, player height is 32
                     self.player.velocity_y = 0
@@ -363,6 +493,8 @@ class Game:
                     self.invincibility_timer = FPS * 1  # 1 second invincibility after death
                     self.sound_manager.play('death')
                     break
+        if profiler is not None:
+            profiler.lap(PHASE_COLLISIONS)
 
         # Only increment score when player is not on the ground
         if self.player.y < 370 - 32:  # Ground level is 370, player height is 32
@@ -387,11 +519,8 @@ class Game:
             self.draw_name_entry()
         elif self.level_transition:
             self.screen.fill(WHITE)
-            font_large = pygame.font.Font(None, 96)
-            font_small = pygame.font.Font(None, 48)
-
-            level_text = font_large.render(f"LEVEL {self.level}", True, BLACK)
-            instruction_text = font_small.render("Press SPACE to continue", True, BLACK)
+            level_text = self.render_cache.text(f"LEVEL {self.level}", 96, BLACK)
+            instruction_text = self.render_cache.text("Press SPACE to continue", 48, BLACK)
 
             level_rect = level_text.get_rect(center=(SCREEN_WIDTH/2, SCREEN_HEIGHT/2 - 50))
             instruction_rect = instruction_text.get_rect(center=(SCREEN_WIDTH/2, SCREEN_HEIGHT/2 + 50))
@@ -399,81 +528,33 @@ class Game:
             self.screen.blit(level_text, level_rect)
             self.screen.blit(instruction_text, instruction_rect)
         else:
+            if self.dirty_renderer is not None and self.lives > 0:
+                # Dirty-rect mode repaints and presents only the regions that changed
+                self.dirty_renderer.draw(self)
+                return
+
             self.screen.fill(WHITE)
 
             # Draw each of the 5 physical platform bars
             # For each platform level, find ALL gaps currently on it and render them
             for platform_index in range(len(self.platform_positions)):
-                y = self.platform_positions[platform_index]
-
-                # Find ALL gaps currently on this platform level
-                active_gaps = []
-                for gap in self.platforms:
-                    if gap.gap_current_platform_index == platform_index:
-                        active_gaps.append(gap)
-
-                if active_gaps:
-                    # Draw platform with gaps
-                    # Draw solid platform first
-                    pygame.draw.rect(self.screen, RED, (0, y, SCREEN_WIDTH, 3))
-
-                    # Then cut out the gaps
-                    for active_gap in active_gaps:
-                        gap_actual_start = active_gap.gap_start + active_gap.x_offset
-                        gap_actual_end = gap_actual_start + active_gap.gap_width
-
-                        while gap_actual_start < 0:
-                            gap_actual_start += SCREEN_WIDTH
-                            gap_actual_end += SCREEN_WIDTH
-
-                        gap_actual_start = gap_actual_start % SCREEN_WIDTH
-                        gap_actual_end = gap_actual_end % SCREEN_WIDTH
-
-                        if gap_actual_end < gap_actual_start:
-                            # Gap wraps around screen edge
-                            pygame.draw.rect(self.screen, WHITE, (gap_actual_start, y, SCREEN_WIDTH - gap_actual_start, 3))
-                            pygame.draw.rect(self.screen, WHITE, (0, y, gap_actual_end, 3))
-                        else:
-                            # Gap doesn't wrap
-                            pygame.draw.rect(self.screen, WHITE, (gap_actual_start, y, gap_actual_end - gap_actual_start, 3))
-
-                        # Draw gap ID in debug mode
-                        if self.debug_mode:
-                            font = pygame.font.Font(None, 24)
-                            gap_text = font.render(str(active_gap.gap_id), True, BLUE)
-                            gap_center = (gap_actual_start + active_gap.gap_width / 2) % SCREEN_WIDTH
-                            self.screen.blit(gap_text, (gap_center - 6, y - 2))
-                else:
-                    # No gaps on this platform level - draw solid platform
-                    pygame.draw.rect(self.screen, RED, (0, y, SCREEN_WIDTH, 3))
+                self.draw_platform_bar(platform_index)
 
+            # Enemies and Jack are pre-rendered sprites - one blit each
             for enemy in self.enemies:
-                enemy.draw(self.screen)
+                self.sprite_atlas.draw_enemy(self.screen, enemy)
 
-            self.player.draw(self.screen)
+            self.sprite_atlas.draw_player(self.screen, self.player)
 
-            font = pygame.font.Font(None, 36)
-            score_text = font.render(f"Score: {self.total_score}", True, BLACK)
-            level_text = font.render(f"Level: {self.level}", True, BLACK)
-
-            self.screen.blit(score_text, (10, 10))
-
-            # Draw lives as Jack sprites instead of text
-            lives_label = font.render("Lives:", True, BLACK)
-            self.screen.blit(lives_label, (10, 50))
-            for i in range(self.lives):
-                Player.draw_small_jack(self.screen, 90 + i * 15, 53)
-
-            self.screen.blit(level_text, (SCREEN_WIDTH - 150, 10))
+            self.draw_hud()
 
             if self.lives <= 0:
                 if self.show_leaderboard:
                     self.draw_leaderboard()
                 else:
-                    game_over_font = pygame.font.Font(None, 72)
-                    game_over_text = game_over_font.render("GAME OVER", True, RED)
-                    restart_text = font.render("Press R to Restart", True, BLACK)
-                    leaderboard_text = font.render("Press L for Leaderboard", True, BLACK)
+                    game_over_text = self.render_cache.text("GAME OVER", 72, RED)
+                    restart_text = self.render_cache.text("Press R to Restart", 36, BLACK)
+                    leaderboard_text = self.render_cache.text("Press L for Leaderboard", 36, BLACK)
 
                     text_rect = game_over_text.get_rect(center=(SCREEN_WIDTH/2, SCREEN_HEIGHT/2 - 80))
                     restart_rect = restart_text.get_rect(center=(SCREEN_WIDTH/2, SCREEN_HEIGHT/2 + 20))
@@ -483,27 +564,88 @@ class Game:
                     self.screen.blit(restart_text, restart_rect)
                     self.screen.blit(leaderboard_text, leaderboard_rect)
 
+        if self.dirty_renderer is not None:
+            # Whole screen was repainted - the next dirty-rect frame starts from scratch
+            self.dirty_renderer.invalidate()
+        if self.profiler is not None:
+            self.profiler.draw_overlay(self.screen, self.render_cache)
         pygame.display.flip()
 
+    def draw_platform_bar(self, platform_index):
+        """Draw one platform bar with all gaps currently on its level cut out"""
+        y = self.platform_positions[platform_index]
+
+        # Draw solid platform first
+        pygame.draw.rect(self.screen, RED, (0, y, SCREEN_WIDTH, 3))
+
+        # Then cut out the gaps currently on this platform level
+        for active_gap in self.gap_index.gaps_on_level(platform_index):
+            gap_actual_start, gap_actual_end = active_gap.screen_span()
+
+            if gap_actual_end < gap_actual_start:
+                # Gap wraps around screen edge
+                pygame.draw.rect(self.screen, WHITE, (gap_actual_start, y, SCREEN_WIDTH - gap_actual_start, 3))
+                pygame.draw.rect(self.screen, WHITE, (0, y, gap_actual_end, 3))
+            else:
+                # Gap doesn't wrap
+                pygame.draw.rect(self.screen, WHITE, (gap_actual_start, y, gap_actual_end - gap_actual_start, 3))
+
+            # Draw gap ID in debug mode
+            if self.debug_mode:
+                gap_text = self.render_cache.text(str(active_gap.gap_id), 24, BLUE)
+                gap_center = (gap_actual_start + active_gap.gap_width / 2) % SCREEN_WIDTH
+                self.screen.blit(gap_text, (gap_center - 6, y - 2))
+
+    def draw_score(self):
+        # Cached by string, so the score is only re-rendered when it changes
+        score_text = self.render_cache.text(f"Score: {self.total_score}", 36, BLACK)
+        self.screen.blit(score_text, (10, 10))
+
+    def draw_lives(self):
+        # Draw lives as Jack sprites instead of text
+        lives_label = self.render_cache.text("Lives:", 36, BLACK)
+        self.screen.blit(lives_label, (10, 50))
+        for i in range(self.lives):
+            self.sprite_atlas.draw_small_jack(self.screen, 90 + i * 15, 53, Player)
+
+    def draw_level_label(self):
+        level_text = self.render_cache.text(f"Level: {self.level}", 36, BLACK)
+        self.screen.blit(level_text, (SCREEN_WIDTH - 150, 10))
+
+    def draw_hud(self):
+        self.draw_score()
+        self.draw_lives()
+        self.draw_level_label()
+
+    def hud_rects(self):
+        """Screen areas covered by the HUD drawn by draw_hud()"""
+        score_text = self.render_cache.text(f"Score: {self.total_score}", 36, BLACK)
+        lives_label = self.render_cache.text("Lives:", 36, BLACK)
+        level_text = self.render_cache.text(f"Level: {self.level}", 36, BLACK)
+        return [
+            score_text.get_rect(topleft=(10, 10)),
+            lives_label.get_rect(topleft=(10, 50)).union(pygame.Rect(85, 50, 15 * max(self.lives, 0) + 10, 20)),
+            level_text.get_rect(topleft=(SCREEN_WIDTH - 150, 10)),
+        ]
+
     def draw_name_entry(self):
         """Draw the name entry screen"""
         self.screen.fill(WHITE)
-        font_title = pygame.font.Font(None, 72)
-        font_normal = pygame.font.Font(None, 36)
-        font_small = pygame.font.Font(None, 28)
 
         # Title
-        title_text = font_title.render("JUMPING JACK", True, BLACK)
+        title_text = self.render_cache.text("JUMPING JACK", 72, BLACK)
         title_rect = title_text.get_rect(center=(SCREEN_WIDTH/2, 100))
         self.screen.blit(title_text, title_rect)
 
         # Instructions
-        prompt_text = font_normal.render("Enter your name:", True, BLACK)
+        prompt_text = self.render_cache.text("Enter your name:", 36, BLACK)
         prompt_rect = prompt_text.get_rect(center=(SCREEN_WIDTH/2, 220))
         self.screen.blit(prompt_text, prompt_rect)
 
         # Name input box
-        name_display = self.player_name if self.player_name else self.leaderboard.get_last_player_name()
+        # Don't block the first frame on the leaderboard - the default name appears once it's loaded
+        last_player_name = self._leaderboard.get_last_player_name() if self._leaderboard is not None else ""
+        name_display = self.player_name if self.player_name else last_player_name
         name_box_width = 400
         name_box_height = 50
         name_box_x = SCREEN_WIDTH/2 - name_box_width/2
@@ -513,20 +655,20 @@ class Game:
         pygame.draw.rect(self.screen, BLACK, (name_box_x, name_box_y, name_box_width, name_box_height), 2)
 
         # Draw name text
-        name_text = font_normal.render(name_display, True, BLACK)
+        name_text = self.render_cache.text(name_display, 36, BLACK)
         name_text_rect = name_text.get_rect(center=(SCREEN_WIDTH/2, name_box_y + name_box_height/2))
         self.screen.blit(name_text, name_text_rect)
 
         # Cursor blinking
-        if pygame.time.get_ticks() % 1000 < 500:
+        if self.cursor_visible():
             cursor_x = name_text_rect.right + 5
             cursor_y = name_box_y + 10
             pygame.draw.line(self.screen, BLACK, (cursor_x, cursor_y), (cursor_x, cursor_y + 30), 2)
 
         # Instructions
-        hint1 = font_small.render("Press ENTER to start", True, BLACK)
-        hint2 = font_small.render("Press ESC to use last player name", True, BLACK)
-        hint3 = font_small.render("Press BACKSPACE to delete", True, BLACK)
+        hint1 = self.render_cache.text("Press ENTER to start", 28, BLACK)
+        hint2 = self.render_cache.text("Press ESC to use last player name", 28, BLACK)
+        hint3 = self.render_cache.text("Press BACKSPACE to delete", 28, BLACK)
 
         hint1_rect = hint1.get_rect(center=(SCREEN_WIDTH/2, 380))
         hint2_rect = hint2.get_rect(center=(SCREEN_WIDTH/2, 415))
@@ -538,35 +680,33 @@ class Game:
 
     def draw_leaderboard(self):
         """Draw the leaderboard overlay"""
-        # Semi-transparent overlay
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-        overlay.set_alpha(230)
-        overlay.fill(WHITE)
+        # Semi-transparent overlay (built once and reused)
+        overlay = self.render_cache.overlay((SCREEN_WIDTH, SCREEN_HEIGHT), WHITE, 230)
         self.screen.blit(overlay, (0, 0))
 
-        font_title = pygame.font.Font(None, 64)
-        font_header = pygame.font.Font(None, 32)
-        font_entry = pygame.font.Font(None, 28)
-        font_small = pygame.font.Font(None, 24)
-
         # Title
-        title_text = font_title.render("LEADERBOARD", True, BLACK)
+        title_text = self.render_cache.text("LEADERBOARD", 64, BLACK)
         title_rect = title_text.get_rect(center=(SCREEN_WIDTH/2, 50))
         self.screen.blit(title_text, title_rect)
 
         # Headers
         y_pos = 120
-        header_text = font_header.render("Rank  Name                Score    Level    Date", True, BLACK)
+        header_text = self.render_cache.text("Rank  Name                Score    Level    Date", 32, BLACK)
         self.screen.blit(header_text, (50, y_pos))
 
         # Draw line under header
         pygame.draw.line(self.screen, BLACK, (50, y_pos + 35), (SCREEN_WIDTH - 50, y_pos + 35), 2)
 
-        # Entries - show only top 6
+        # Entries - the top 6, or the top 3 and the 3 around this game's score when
+        # it ranked below 6th
         y_pos = 170
-        scores = self.leaderboard.get_top_scores(6)
+        rows = list(enumerate(self.leaderboard.get_top_scores(6)))
+        position = self.leaderboard.position(self.last_entry) if self.last_entry is not None else None
+        if position is not None and position >= 6:
+            first, around = self.leaderboard.get_page_around(position, 3)
+            rows = rows[:3] + list(enumerate(around, first))
 
-        for i, entry in enumerate(scores):
+        for i, entry in rows:
             rank = f"{i + 1}."
             name = entry['name'][:18]  # Truncate long names
             score = f"{entry['score']}"
@@ -576,32 +716,186 @@ class Game:
             entry_text = f"{rank:<5} {name:<20} {score:<8} {level:<8} {date}"
 
             # Highlight current player's score
-            color = RED if entry['name'] == self.player_name and entry['score'] == self.total_score else BLACK
-            text = font_entry.render(entry_text, True, color)
+            color = RED if entry is self.last_entry else BLACK
+            text = self.render_cache.text(entry_text, 28, color)
             self.screen.blit(text, (50, y_pos))
             y_pos += 35
 
         # Instructions - positioned lower to avoid overlapping with 6th entry
-        instruction = font_small.render("Press R to Restart  |  Press L to close", True, BLACK)
+        instruction = self.render_cache.text("Press R to Restart  |  Press L to close", 24, BLACK)
         instruction_rect = instruction.get_rect(center=(SCREEN_WIDTH/2, SCREEN_HEIGHT - 20))
         self.screen.blit(instruction, instruction_rect)
 
-    def run(self):
+    def cursor_visible(self):
+        """Whether the name entry cursor is shown - it blinks once a second"""
+        return (time.perf_counter() - self.started_at) % 1.0 < 0.5
+
+    def simulate(self, max_frames):
+        """Step the game without rendering until game over or max_frames; returns frames run"""
+        frames = 0
+        while self.running and self.lives > 0 and frames < max_frames:
+            self.update()
+            frames += 1
+        return frames
+
+    def run(self, startup_report=False, turbo=0, render=True):
+        """Run the windowed game loop.
+
+        The simulation advances in fixed 1/FPS ticks independent of drawing:
+        normally a FramePacer turns real elapsed time into ticks to run each
+        frame (so a slow frame is caught up rather than slowing the game down)
+        and sleeps until the next tick is due. With turbo=N the loop is uncapped and runs N ticks per
+        presented frame while a game is in progress (menus, name entry and the game over screen
+        stay paced); render=False skips drawing gameplay altogether (menus and the game over
+        screen are still shown).
+        """
+        if self.headless:
+            raise RuntimeError("Headless games have no window - use simulate() instead")
+
+        pacer = FramePacer(1.0 / FPS)
+        uncapped = False
+        first_frame = True
+        profiler = self.profiler
         while self.running:
+            if profiler is not None:
+                profiler.begin_frame()
             self.handle_events()
+            if profiler is not None:
+                profiler.lap(PHASE_EVENTS)
 
-            if self.lives > 0:
-                self.update()
-
-            self.draw()
-            self.clock.tick(FPS)
+            was_uncapped = uncapped
+            uncapped = bool(turbo) and self.game_started and self.lives > 0
+            if uncapped:
+                ticks = turbo
+            else:
+                if was_uncapped:
+                    pacer.restart()  # Turbo time is not a stall to catch up on
+                ticks = pacer.ticks_due()
 
+            for _ in range(ticks):
+                if self.lives <= 0 or not self.running:
+                    break
+                self.update()
+                if profiler is not None:
+                    profiler.count_tick()
+            if self.lives <= 0:
+                self.save_replay()
+            if profiler is not None:
+                profiler.lap(PHASE_OTHER)
+
+            if render or not self.game_started or self.lives <= 0:
+                self.draw()
+            if profiler is not None:
+                profiler.lap(PHASE_DRAW)
+            if first_frame:
+                first_frame = False
+                startup_profile.mark("first frame shown")
+                self.start_background_init()
+                if startup_report:
+                    self.print_startup_report()
+            # Present a frame per tick; turbo games run uncapped
+            if not uncapped:
+                pacer.wait()
+            if profiler is not None:
+                profiler.lap(PHASE_TICK)
+                profiler.end_frame()
+
+        if profiler is not None:
+            print(f"Frame profile written to {profiler.write_csv()}")
+        if self.game_started:
+            # Quitting mid-game still leaves a replay of the game so far
+            self.save_replay()
+        if self._sound_manager is not None:
+            self._sound_manager.stop_music(wait=True)  # Before the mixer the music thread feeds goes away
+        if self._leaderboard is not None:
+            self._leaderboard.close()  # Finish any score still being written
         pygame.quit()
         sys.exit()
 
+    def print_startup_report(self):
+        """Print the startup profile once the background initialisation has finished"""
+        def wait_and_print():
+            if self.background_init_thread is not None:
+                self.background_init_thread.join()
+            self.sound_manager.wait_until_warm()
+            print(startup_profile.report())
+
+        threading.Thread(target=wait_and_print, name="startup-report", daemon=True).start()
+
+
+def run_headless(frames, seed=None):
+    """Simulate one game with no input and print how fast it ran"""
+    game = Game(headless=True, seed=seed)
+    start = time.perf_counter()
+    frames_run = game.simulate(frames)
+    elapsed = time.perf_counter() - start
+    fps = frames_run / elapsed if elapsed > 0 else float('inf')
+    print(f"Simulated {frames_run} frames in {elapsed:.3f}s ({fps:.0f} frames/s)")
+    print(f"Score: {game.total_score}  Level: {game.level}  Lives: {game.lives}")
+
+
+def print_audio_latency(frequency=None, buffer=None):
+    """Open the mixer with the given settings and print its estimated and measured latency"""
+    settings = {key: value for key, value in (('frequency', frequency), ('buffer', buffer)) if value is not None}
+    sound_manager = SoundManager(**settings)
+    mean, worst = sound_manager.measure_latency()
+    print(f"Mixer: {sound_manager.sample_rate} Hz, buffer {sound_manager.buffer} samples")
+    print(f"Buffer latency: {sound_manager.latency_estimate() * 1000:.1f} ms")
+    print(f"Measured trigger-to-output latency: {mean * 1000:.1f} ms mean, {worst * 1000:.1f} ms worst")
+
+
+def run_replay(filename):
+    """Play a replay file back headlessly and check its recorded result"""
+    from replay import Replay, play_replay
+
+    replay = Replay.load(filename)
+    start = time.perf_counter()
+    game = play_replay(replay)
+    elapsed = time.perf_counter() - start
+    print(f"Replayed {len(replay.inputs)} frames (seed {replay.seed}) in {elapsed:.3f}s")
+    print(f"Score: {game.total_score}  Level: {game.level}  Lives: {max(game.lives, 0)}")
+    if (game.total_score, game.level, max(game.lives, 0)) == (replay.score, replay.level, replay.lives):
+        print("Verified: matches the recorded result")
+        return True
+    print(f"MISMATCH: recorded Score: {replay.score}  Level: {replay.level}  Lives: {replay.lives}")
+    return False
+
 
 if __name__ == "__main__":
     # Check for debug flag
     debug_mode = '--debug' in sys.argv
-    game = Game(debug_mode=debug_mode)
-    game.run()
+    seed = None
+    if '--seed' in sys.argv:
+        seed = int(sys.argv[sys.argv.index('--seed') + 1])
+    if '--replay' in sys.argv:
+        verified = run_replay(sys.argv[sys.argv.index('--replay') + 1])
+        sys.exit(0 if verified else 1)
+    if '--headless' in sys.argv:
+        frames = FPS * 60
+        if '--frames' in sys.argv:
+            frames = int(sys.argv[sys.argv.index('--frames') + 1])
+        run_headless(frames, seed)
+        if '--startup-report' in sys.argv:
+            print(startup_profile.report())
+        sys.exit()
+    mixer_frequency = mixer_buffer = None
+    if '--sample-rate' in sys.argv:
+        mixer_frequency = int(sys.argv[sys.argv.index('--sample-rate') + 1])
+    if '--audio-buffer' in sys.argv:
+        mixer_buffer = int(sys.argv[sys.argv.index('--audio-buffer') + 1])
+    if '--audio-latency' in sys.argv:
+        print_audio_latency(mixer_frequency, mixer_buffer)
+        sys.exit()
+    dirty_rects = '--dirty-rects' in sys.argv
+    turbo = 0
+    if '--turbo' in sys.argv:
+        turbo = int(sys.argv[sys.argv.index('--turbo') + 1])
+    profile = '--profile' in sys.argv
+    game = Game(debug_mode=debug_mode, dirty_rects=dirty_rects, seed=seed, profile=profile,
+                mixer_frequency=mixer_frequency, mixer_buffer=mixer_buffer, music='--no-music' not in sys.argv)
+    if '--profile-csv' in sys.argv and game.profiler is not None:
+        game.profiler.csv_filename = sys.argv[sys.argv.index('--profile-csv') + 1]
+    if '--record' in sys.argv:
+        game.record_replay(sys.argv[sys.argv.index('--record') + 1])
+    game.run(startup_report='--startup-report' in sys.argv, turbo=turbo,
+             render='--no-render' not in sys.argv)
@@ -1,46 +1,269 @@
+import bisect
+import heapq
+import itertools
 import json
 import os
-from datetime import datetime
+import queue
+import threading
+from datetime import date, datetime, timedelta
+
+WEEK_DAYS = 7  # Days the per-day indexes cover, enough for get_weekly_scores()
 
 
 class Leaderboard:
-    def __init__(self, filename='leaderboard.json'):
+    """Leaderboard backed by a compact snapshot plus an append-only score log.
+
+    Every score is appended as one JSON line to the log (<name>.log next to the
+    snapshot) and inserted into an in-memory top-K list kept sorted with bisect.
+    Every compact_every scores the top-K is written to the snapshot file and the
+    log is truncated, so startup only reads the snapshot and a short log tail.
+
+    add_score() only updates memory and queues the write: a writer thread
+    appends the queued records and writes snapshots (see _write_batch), so a
+    slow disk never stalls a frame. Call flush() to wait for pending writes and
+    close() before exiting.
+
+    Queries use indexes that _insert() keeps up to date: rank() bisects the
+    sorted keys, personal_best() reads a per-name dict, and the daily/weekly
+    boards merge per-day sorted lists, so none of them scans the scores. Only
+    the last WEEK_DAYS days are indexed, each with its best day_top_k scores,
+    so the indexes (and the snapshot holding them) stay bounded.
+    """
+
+    def __init__(self, filename='leaderboard.json', top_k=1000, compact_every=50, max_pending=256,
+                 day_top_k=10):
         self.filename = filename
-        self.scores = []
+        self.log_filename = os.path.splitext(filename)[0] + '.log' if filename else None
+        self.top_k = top_k
+        self.day_top_k = day_top_k
+        self.compact_every = compact_every
+        # Guards the indexes, last_seq and last_player_name while the writer thread snapshots them
+        self._index_lock = threading.Lock()
+        self._order = 0  # Tie-breaker: equal scores keep insertion order
+        self._reset_indexes()
+        self.last_seq = 0  # Sequence number of the last logged score
+        self.snapshot_seq = 0  # Last sequence number included in the snapshot on disk
+        self.requested_seq = 0  # last_seq when a snapshot was last queued
         self.last_player_name = ""
+        # Writes waiting for the writer thread: ('record', record) or ('snapshot', None)
+        self.pending = queue.Queue(maxsize=max_pending)
+        self.writer_thread = None
         self.load()
 
+    def _reset_indexes(self):
+        self.scores = []
+        self._keys = []  # Sort keys parallel to self.scores
+        self._best = {}  # Player name -> (level, score) of their best result
+        self._days = {}  # 'YYYY-MM-DD' -> (sorted keys, entries) of that day's best day_top_k
+
+    @staticmethod
+    def _sorted_insert(keys, entries, key, entry, limit):
+        """Insert into parallel sorted lists holding at most limit entries"""
+        if len(keys) >= limit and key >= keys[-1]:
+            return
+        position = bisect.bisect_right(keys, key)
+        keys.insert(position, key)
+        entries.insert(position, entry)
+        if len(keys) > limit:
+            keys.pop()
+            entries.pop()
+
+    def _insert(self, entry):
+        """Insert an entry into the sorted top-K (level first, then score, both descending)
+        and the per-player and per-day indexes"""
+        key = (-entry['level'], -entry['score'], self._order)
+        self._order += 1
+        self._sorted_insert(self._keys, self.scores, key, entry, self.top_k)
+
+        best = self._best.get(entry['name'])
+        if best is None or (entry['level'], entry['score']) > best:
+            self._best[entry['name']] = (entry['level'], entry['score'])
+
+        day_key = entry['date'][:10]
+        day = self._days.get(day_key)
+        if day is None:
+            day = self._days[day_key] = ([], [])
+            self._prune_days()
+        self._sorted_insert(day[0], day[1], key, entry, self.day_top_k)
+
+    def _prune_days(self):
+        """Drop the per-day lists older than the WEEK_DAYS ending with the newest day"""
+        newest = date.fromisoformat(max(self._days))
+        oldest = (newest - timedelta(days=WEEK_DAYS - 1)).isoformat()
+        for day_key in [day_key for day_key in self._days if day_key < oldest]:
+            del self._days[day_key]
+
     def load(self):
-        """Load scores from file"""
+        """Load the snapshot, then replay scores logged since it was written
+        (filename=None keeps the leaderboard in memory only)"""
+        self._reset_indexes()
+        if not self.filename:
+            return
+
         if os.path.exists(self.filename):
             try:
                 with open(self.filename, 'r') as f:
                     data = json.load(f)
-                    self.scores = data.get('scores', [])
-                    self.last_player_name = data.get('last_player_name', "")
-            except (json.JSONDecodeError, IOError):
-                self.scores = []
+                if 'days' in data:
+                    self._load_indexes(data)
+                else:
+                    # Older files hold only the scores, and may not be sorted
+                    snapshot_scores = sorted(data.get('scores', []) + data.get('archive', []),
+                                             key=lambda x: (x['level'], x['score']), reverse=True)
+                    for entry in snapshot_scores:
+                        self._insert(entry)
+                self.last_player_name = data.get('last_player_name', "")
+                self.snapshot_seq = data.get('last_seq', 0)
+                self.last_seq = self.requested_seq = self.snapshot_seq
+            except (json.JSONDecodeError, KeyError, TypeError, AttributeError, IOError) as e:
+                # Keep the damaged file for recovery instead of overwriting it with
+                # the next snapshot; the scores still in the log are loaded below
+                self._reset_indexes()
                 self.last_player_name = ""
+                corrupt_filename = f"{self.filename}.corrupt-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+                try:
+                    os.replace(self.filename, corrupt_filename)
+                    print(f"Warning: could not read {self.filename} ({e}); kept it as {corrupt_filename}")
+                except OSError:
+                    print(f"Warning: could not read {self.filename} ({e})")
 
-    def save(self):
-        """Save scores to file"""
-        try:
-            data = {
-                'scores': self.scores,
+        if os.path.exists(self.log_filename):
+            try:
+                with open(self.log_filename, 'r') as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except json.JSONDecodeError:
+                            break  # Partially written last line
+                        if record['seq'] <= self.snapshot_seq:
+                            continue  # Already in the snapshot
+                        self.last_seq = record['seq']
+                        self.last_player_name = record['name']
+                        self._insert({key: record[key] for key in ('name', 'score', 'level', 'date')})
+            except IOError:
+                pass
+
+    def _load_indexes(self, data):
+        """Fill the indexes straight from a snapshot, which stores each of them sorted"""
+        for entry in data['scores']:
+            self._keys.append((-entry['level'], -entry['score'], self._order))
+            self.scores.append(entry)
+            self._order += 1
+        for day_key, entries in data['days'].items():
+            keys = []
+            for entry in entries:
+                keys.append((-entry['level'], -entry['score'], self._order))
+                self._order += 1
+            self._days[day_key] = (keys, entries)
+        self._best = {name: tuple(best) for name, best in data['bests'].items()}
+
+    def _snapshot_data(self):
+        """The snapshot of the current indexes, built on the writer thread.
+
+        Only the lists are copied under the lock; the entries themselves are
+        never modified, so they are serialised after it is released.
+        """
+        with self._index_lock:
+            return {
+                'version': 4,
+                'last_seq': self.last_seq,
+                'scores': list(self.scores),
+                'days': {day_key: list(entries) for day_key, (_, entries) in self._days.items()},
+                'bests': dict(self._best),
                 'last_player_name': self.last_player_name
             }
-            with open(self.filename, 'w') as f:
-                json.dump(data, f, indent=2)
-        except IOError:
-            pass  # Silently fail if we can't write
+
+    def save(self):
+        """Queue a snapshot of the indexes; the log it includes is truncated once it is written"""
+        if not self.filename:
+            return
+        self.requested_seq = self.last_seq
+        self._enqueue(('snapshot', None))
+
+    def _enqueue(self, write):
+        if self.writer_thread is None:
+            self.writer_thread = threading.Thread(target=self._writer, name="leaderboard-writer", daemon=True)
+            self.writer_thread.start()
+        self.pending.put(write)  # Only blocks if max_pending writes are already waiting
+
+    def _writer(self):
+        while True:
+            batch = [self.pending.get()]
+            # Coalesce whatever else queued up while we waited or wrote
+            while True:
+                try:
+                    batch.append(self.pending.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in batch
+            try:
+                self._write_batch([write for write in batch if write is not None])
+            finally:
+                for _ in batch:
+                    self.pending.task_done()
+            if stop:
+                return
+
+    def _write_batch(self, batch):
+        """Write queued records and snapshots in one go.
+
+        The records are appended to the log first, with one write and fsync (a
+        torn last line is skipped on load), so a failed snapshot loses nothing.
+        Then one snapshot of the indexes as they are now is written, however
+        many were queued: to a temporary file that is
+        fsynced and renamed over the old one, so a crash leaves either the old
+        or the new snapshot, never a truncated one. The log is then replaced
+        the same way by the records the snapshot doesn't include.
+        """
+        records = [record for kind, record in batch if kind == 'record']
+        try:
+            if records:
+                self._append_to_log(records)
+            if any(kind == 'snapshot' for kind, _ in batch):
+                data = self._snapshot_data()
+                self._write_atomically(self.filename, json.dumps(data, separators=(',', ':')))
+                self.snapshot_seq = data['last_seq']
+                newer = [record for record in records if record['seq'] > data['last_seq']]
+                self._write_atomically(self.log_filename, ''.join(self._log_lines(newer)))
+        except OSError as e:
+            print(f"Warning: could not write the leaderboard: {e}")
+
+    @staticmethod
+    def _log_lines(records):
+        return [json.dumps(record, separators=(',', ':')) + '\n' for record in records]
+
+    def _append_to_log(self, records):
+        with open(self.log_filename, 'a') as f:
+            f.write(''.join(self._log_lines(records)))
+            f.flush()
+            os.fsync(f.fileno())
+
+    @staticmethod
+    def _write_atomically(filename, text):
+        temp_filename = f"{filename}.tmp"
+        with open(temp_filename, 'w') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_filename, filename)
+
+    def flush(self):
+        """Wait until every queued write has reached the disk"""
+        if self.writer_thread is not None:
+            self.pending.join()
+
+    def close(self):
+        """Write everything still queued and stop the writer thread"""
+        if self.writer_thread is not None:
+            self.pending.put(None)
+            self.writer_thread.join()
+            self.writer_thread = None
 
     def add_score(self, player_name, score, level):
-        """Add a new score to the leaderboard"""
+        """Add a new score to the leaderboard; returns its entry (see position())"""
         if not player_name:
             player_name = "Anonymous"
 
-        self.last_player_name = player_name
-
         entry = {
             'name': player_name,
             'score': score,
@@ -48,16 +271,85 @@ class Leaderboard:
             'date': datetime.now().strftime('%Y-%m-%d %H:%M')
         }
 
-        self.scores.append(entry)
-        # Sort by level first (descending), then by score (descending)
-        self.scores.sort(key=lambda x: (x['level'], x['score']), reverse=True)
-        # Keep all scores in the file (no limit)
-        self.save()
+        with self._index_lock:
+            self.last_player_name = player_name
+            self.last_seq += 1
+            seq = self.last_seq
+            self._insert(entry)
+        # Queued outside the lock: a full queue must not block the writer's snapshot.
+        # A snapshot taken first already includes the score, and load skips its record
+        if self.filename:
+            self._enqueue(('record', dict(entry, seq=seq)))
+
+        # Compact periodically so the log (and startup replay) stays short
+        if self.filename and self.last_seq - self.requested_seq >= self.compact_every:
+            self.save()
+        return entry
 
     def get_top_scores(self, limit=10):
         """Get the top N scores"""
         return self.scores[:limit]
 
+    def rank(self, level, score):
+        """1-based rank a (level, score) has or would have; equal results share a rank.
+
+        None if the top-K is full and the result would not make it onto it.
+        """
+        position = bisect.bisect_left(self._keys, (-level, -score))
+        if position >= self.top_k:
+            return None
+        return position + 1
+
+    def position(self, entry):
+        """Index of an entry (as returned by add_score) in get_top_scores(), or None"""
+        first = bisect.bisect_left(self._keys, (-entry['level'], -entry['score']))
+        for index in range(first, len(self.scores)):
+            if self.scores[index] is entry:
+                return index
+            if self._keys[index][:2] != (-entry['level'], -entry['score']):
+                break
+        return None
+
+    def personal_best(self, player_name):
+        """A player's best (level, score), or None if they have no score"""
+        return self._best.get(player_name)
+
+    def get_page(self, page, page_size=6):
+        """(index of the first entry, entries) of one page of the top scores, from page 0"""
+        first = page * page_size
+        return first, self.scores[first:first + page_size]
+
+    def get_page_around(self, index, page_size=6):
+        """(index of the first entry, entries) of page_size entries centred on index"""
+        first = max(0, min(index - page_size // 2, len(self.scores) - page_size))
+        return first, self.scores[first:first + page_size]
+
+    def get_scores_between(self, first_day, last_day, limit=10):
+        """Top scores set from first_day to last_day inclusive (datetime.date objects).
+
+        Only the last WEEK_DAYS days are indexed, each with its best day_top_k scores.
+        """
+        days = []
+        day = first_day
+        while day <= last_day:
+            index = self._days.get(day.isoformat())
+            if index is not None:
+                days.append(zip(*index))
+            day += timedelta(days=1)
+        # Each day is sorted already, so a k-way merge yields the window in order
+        merged = heapq.merge(*days, key=lambda item: item[0])
+        return [entry for _, entry in itertools.islice(merged, limit)]
+
+    def get_daily_scores(self, day=None, limit=10):
+        """Top scores of one day (default today)"""
+        day = day or date.today()
+        return self.get_scores_between(day, day, limit)
+
+    def get_weekly_scores(self, day=None, limit=10):
+        """Top scores of the seven days ending with day (default today)"""
+        day = day or date.today()
+        return self.get_scores_between(day - timedelta(days=6), day, limit)
+
     def get_last_player_name(self):
         """Get the name of the last player"""
         return self.last_player_name
@@ -0,0 +1,159 @@
+"""Procedural background music, synthesised in short chunks on a worker thread.
+
+MusicStream loops a level's melody and bass pattern, synthesising a quarter
+second at a time with NumPy and queueing each chunk on its own mixer channel
+(Channel.queue), so the main thread never waits on synthesis. At most three
+chunks exist at once - one playing, one queued on the channel, and the one
+being synthesised - however long the session runs. set_level() changes the
+pattern and tempo from the next chunk on.
+
+stop() never waits for the worker: it silences the channel and flags the
+worker, which exits on its own after the chunk it is synthesising, without
+queueing it. A stream started again gets a new worker with its own flag.
+"""
+import random
+import threading
+
+import pygame
+
+from numpy_loader import load_numpy
+
+# Semitone offsets of the notes a melody is built from (minor pentatonic)
+SCALE = (0, 3, 5, 7, 10, 12, 15, 17)
+STEPS_PER_BEAT = 4  # The sequencer plays sixteenth notes
+PATTERN_STEPS = 32  # Two bars, then the pattern repeats
+
+BASE_TEMPO = 100  # Beats per minute at the level 1 speed
+TEMPO_PER_SPEED = 50  # Extra beats per minute per unit of base_speed (+10 per level)
+MAX_TEMPO = 200
+
+
+def tempo_for_speed(base_speed):
+    """Beats per minute for a level's base_speed (1.2 on level 1, +0.2 per level)"""
+    return min(MAX_TEMPO, BASE_TEMPO + (base_speed - 1.2) * TEMPO_PER_SPEED)
+
+
+def level_pattern(level):
+    """(root frequency, melody, bass) for a level: per-step frequencies, 0 for a rest.
+
+    The pattern comes from its own generator seeded with the level, so it is
+    the same every time and never touches the game's RNG.
+    """
+    rng = random.Random(level)
+    root = 220.0 * 2 ** (((level - 1) * 5 % 12) / 12)  # Up a fourth per level, within an octave
+    melody = []
+    degree = 0
+    for step in range(PATTERN_STEPS):
+        if step % 2 and rng.random() < 0.4:
+            melody.append(0.0)
+            continue
+        # Mostly stepwise movement along the scale
+        degree = max(0, min(len(SCALE) - 1, degree + rng.choice((-2, -1, -1, 0, 1, 1, 2))))
+        melody.append(root * 2 ** (SCALE[degree] / 12))
+    bass_degrees = (0, 0, 3, 4)  # One bass note per bar half
+    bass = [root / 2 * 2 ** (SCALE[bass_degrees[step * len(bass_degrees) // PATTERN_STEPS]] / 12)
+            if step % STEPS_PER_BEAT == 0 else 0.0
+            for step in range(PATTERN_STEPS)]
+    return root, melody, bass
+
+
+class MusicStream:
+    """Streams a level's procedural music to one mixer channel (see the module docstring)"""
+
+    def __init__(self, channel, sample_rate, chunk_seconds=0.25, volume=0.08):
+        self.channel = channel
+        self.sample_rate = sample_rate
+        self.chunk_samples = int(sample_rate * chunk_seconds)
+        self.chunk_seconds = chunk_seconds
+        self.volume = volume
+        self._lock = threading.Lock()  # Guards the pattern and tempo the worker reads
+        self.set_level(1, 1.2)
+        # Held while checking a worker's stop flag and using the channel, so a
+        # stopped worker can never queue a chunk after stop() silenced it
+        self._channel_lock = threading.Lock()
+        self._stop = None  # The current worker's stop flag, None when stopped
+        self.thread = None
+
+    def set_level(self, level, base_speed):
+        """Switch to a level's pattern at the tempo its base_speed implies"""
+        _, melody, bass = level_pattern(level)
+        with self._lock:
+            self.melody = melody
+            self.bass = bass
+            self.tempo = tempo_for_speed(base_speed)
+
+    def start(self):
+        """Start playing from the beginning of the pattern (no-op while playing)"""
+        if self._stop is not None:
+            return
+        self._stop = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(self._stop, SynthState()), name="music",
+                                       daemon=True)
+        self.thread.start()
+
+    def stop(self, wait=False):
+        """Silence the channel and flag the worker to exit; wait=True also waits for it
+        (before the mixer is shut down)"""
+        thread = self.thread
+        with self._channel_lock:
+            if self._stop is not None:
+                self._stop.set()
+            self._stop = None
+            self.thread = None
+            self.channel.stop()
+        if wait and thread is not None:
+            thread.join()
+
+    def _run(self, stop, state):
+        np = load_numpy()
+        while not stop.is_set():
+            sound = pygame.sndarray.make_sound(self.synthesize(np, state))
+            # Wait for the channel's queue slot; the chunk playing now still has
+            # at least one chunk's worth of audio left when it frees up
+            while self.channel.get_queue() is not None:
+                if stop.wait(self.chunk_seconds / 4):
+                    return
+            with self._channel_lock:
+                if stop.is_set():
+                    return
+                if self.channel.get_busy():
+                    self.channel.queue(sound)
+                else:
+                    self.channel.play(sound)  # First chunk, or the mixer fell behind
+
+    def synthesize(self, np, state):
+        """The next chunk of music as 16-bit stereo samples, continuing from state"""
+        with self._lock:
+            melody, bass, tempo = self.melody, self.bass, self.tempo
+        n = self.chunk_samples
+        samples_per_step = self.sample_rate * 60.0 / (tempo * STEPS_PER_BEAT)
+        steps = state.position + np.arange(n) / samples_per_step
+        step_index = steps.astype(np.int64) % PATTERN_STEPS
+        # Seconds since each sample's note started, for the decay envelope
+        note_time = (steps % 1.0) * samples_per_step / self.sample_rate
+
+        melody_freq = np.asarray(melody)[step_index]
+        melody_phase = state.melody_phase + np.cumsum(2 * np.pi * melody_freq / self.sample_rate)
+        # Square-ish lead: a sine pushed towards a square wave
+        lead = np.tanh(3 * np.sin(melody_phase)) * np.exp(-6 * note_time) * (melody_freq > 0)
+
+        bass_freq = np.asarray(bass)[step_index]
+        bass_phase = state.bass_phase + np.cumsum(2 * np.pi * bass_freq / self.sample_rate)
+        low = np.sin(bass_phase) * np.exp(-3 * note_time) * (bass_freq > 0)
+
+        state.position = (state.position + n / samples_per_step) % PATTERN_STEPS
+        state.melody_phase = float(melody_phase[-1] % (2 * np.pi))
+        state.bass_phase = float(bass_phase[-1] % (2 * np.pi))
+
+        wave = ((0.6 * lead + 0.8 * low) * self.volume * 32767).astype(np.int16)
+        return np.column_stack((wave, wave))
+
+
+class SynthState:
+    """Synthesis position of one worker, carried between chunks so notes and phases continue smoothly"""
+    __slots__ = ('position', 'melody_phase', 'bass_phase')
+
+    def __init__(self):
+        self.position = 0.0  # In sequencer steps
+        self.melody_phase = 0.0
+        self.bass_phase = 0.0
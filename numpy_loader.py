@@ -0,0 +1,18 @@
+"""Lazy NumPy import, shared by the sound effects and the background music.
+
+NumPy is only needed to synthesize or load sounds, so it is imported on first
+use (timed as a startup stage) rather than when the game starts.
+"""
+from startup_profile import startup_profile
+
+_np = None
+
+
+def load_numpy():
+    """Import NumPy on first use and return the module"""
+    global _np
+    if _np is None:
+        with startup_profile.stage("import numpy"):
+            import numpy
+        _np = numpy
+    return _np
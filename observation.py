@@ -0,0 +1,157 @@
+"""Game state as compact NumPy arrays, for agents and analytics.
+
+ObservationEncoder reads a Game's objects directly - nothing is rendered - and
+fills preallocated arrays, so encoding every tick costs about a microsecond
+per gap or enemy and allocates nothing:
+
+    encoder = ObservationEncoder(resolution=80)
+    obs = encoder.encode(game)
+    obs['gaps']      # (levels, resolution) uint8: 1 where a gap is on that platform level
+    obs['enemies']   # (max_enemies, 4) float32: lane, x, width, direction
+    obs['enemy_mask']  # (max_enemies,) bool: which enemy rows are filled
+    obs['player']    # (4,) float32: x, y, velocity_y, jumping
+    obs['status']    # (4,) float32: invincibility_timer, lives, level, total_score
+
+The arrays are reused by the next encode() - copy them to keep them. For
+pixel-based agents, pixel_view() gives a downsampled view of a surface's
+pixels without copying, and FrameStack keeps the last few frames in a ring
+buffer.
+"""
+import struct
+
+import numpy as np
+import pygame
+
+from constants import SCREEN_WIDTH
+
+ENEMY_COLUMNS = ('lane', 'x', 'width', 'direction')
+PLAYER_COLUMNS = ('x', 'y', 'velocity_y', 'jumping')
+STATUS_COLUMNS = ('invincibility_timer', 'lives', 'level', 'total_score')
+_ENEMY_ROW = struct.Struct('<4f')
+
+
+class ObservationEncoder:
+    """Encodes a Game into preallocated NumPy arrays (see the module docstring)"""
+
+    def __init__(self, resolution=80, max_enemies=16, num_levels=5):
+        self.resolution = resolution
+        self.max_enemies = max_enemies
+        # The gap masks and enemy rows are filled through bytearrays (slice assignment and
+        # struct.pack_into are much cheaper per call than NumPy indexing) that the
+        # arrays are zero-copy views of
+        self._gap_bytes = bytearray(num_levels * resolution)
+        self._gap_ones = b'\x01' * resolution
+        self._gap_zeros = bytes(num_levels * resolution)
+        self.gaps = np.frombuffer(self._gap_bytes, dtype=np.uint8).reshape(num_levels, resolution)
+        self._enemy_bytes = bytearray(max_enemies * _ENEMY_ROW.size)
+        self.enemies = np.frombuffer(self._enemy_bytes, dtype=np.float32).reshape(max_enemies, len(ENEMY_COLUMNS))
+        self.enemy_mask = np.zeros(max_enemies, dtype=bool)
+        self.player = np.zeros(len(PLAYER_COLUMNS), dtype=np.float32)
+        self.status = np.zeros(len(STATUS_COLUMNS), dtype=np.float32)
+        self.observation = {
+            'gaps': self.gaps,
+            'enemies': self.enemies,
+            'enemy_mask': self.enemy_mask,
+            'player': self.player,
+            'status': self.status,
+        }
+        # Everything above in one flat vector, for encode_vector()
+        self.size = sum(array.size for array in self.observation.values())
+        self._vector = np.zeros(self.size, dtype=np.float32)
+
+    def encode(self, game):
+        """Fill the arrays from the game's current state and return them as a dict"""
+        self._encode_gaps(game)
+        self._encode_enemies(game)
+
+        # One assignment per array: setting NumPy elements one by one is slower
+        player = game.player
+        self.player[:] = (player.x, player.y, player.velocity_y, player.jumping)
+        self.status[:] = (game.invincibility_timer, game.lives, game.level, game.total_score)
+        return self.observation
+
+    def _encode_gaps(self, game):
+        cells = self._gap_bytes
+        ones = self._gap_ones
+        cells[:] = self._gap_zeros
+        resolution = self.resolution
+        cells_per_pixel = resolution / SCREEN_WIDTH
+        for level, level_gaps in enumerate(game.gap_index.levels):
+            row = level * resolution
+            for gap in level_gaps:
+                # Same span as gaps_contain: [start, start + gap_width], wrapping at the right edge
+                start = (gap.gap_start + gap.x_offset) % SCREEN_WIDTH
+                end = start + gap.gap_width
+                first = int(start * cells_per_pixel)
+                if end > SCREEN_WIDTH:
+                    cells[row + first:row + resolution] = ones[first:]
+                    last = min(resolution - 1, int((end - SCREEN_WIDTH) * cells_per_pixel))
+                    cells[row:row + last + 1] = ones[:last + 1]
+                else:
+                    last = min(resolution - 1, int(end * cells_per_pixel))
+                    cells[row + first:row + last + 1] = ones[first:last + 1]
+
+    def _encode_enemies(self, game):
+        rows = self._enemy_bytes
+        pack_into = _ENEMY_ROW.pack_into
+        row_size = _ENEMY_ROW.size
+        count = min(len(game.enemies), self.max_enemies)
+        for i in range(count):
+            enemy = game.enemies[i]
+            pack_into(rows, i * row_size, enemy.current_platform_index, enemy.x, enemy.width, enemy.direction)
+        if count < self.max_enemies:
+            self.enemies[count:] = 0
+        self.enemy_mask[:count] = True
+        self.enemy_mask[count:] = False
+
+    def encode_vector(self, game, out=None):
+        """encode() flattened into one float32 vector of length self.size (written into out if given)"""
+        self.encode(game)
+        if out is None:
+            out = self._vector
+        position = 0
+        for array in self.observation.values():
+            out[position:position + array.size] = array.ravel()
+            position += array.size
+        return out
+
+
+def pixel_view(surface, downsample=1):
+    """(width, height, 3) view of a surface's pixels, every `downsample`-th pixel, without copying.
+
+    The surface stays locked while the view exists (pygame.surfarray.pixels3d),
+    so delete it before drawing to or displaying the surface again.
+    """
+    pixels = pygame.surfarray.pixels3d(surface)
+    if downsample > 1:
+        pixels = pixels[::downsample, ::downsample]
+    return pixels
+
+
+class FrameStack:
+    """The last `depth` frames (arrays of one shape) in a ring buffer"""
+
+    def __init__(self, depth, shape, dtype=np.uint8):
+        self.depth = depth
+        self.frames = np.zeros((depth,) + tuple(shape), dtype=dtype)
+        self.next = 0  # Ring position the next frame is written to
+        self.count = 0
+
+    def push(self, frame):
+        """Copy a frame in, overwriting the oldest one"""
+        self.frames[self.next] = frame
+        self.next = (self.next + 1) % self.depth
+        self.count = min(self.count + 1, self.depth)
+
+    def latest(self, age=0):
+        """The newest frame (age 0) or an older one, as a view into the ring"""
+        return self.frames[(self.next - 1 - age) % self.depth]
+
+    def stacked(self):
+        """All frames, oldest first (a copy, shape (depth,) + frame shape)"""
+        return np.concatenate((self.frames[self.next:], self.frames[:self.next]))
+
+    def clear(self):
+        self.frames.fill(0)
+        self.next = 0
+        self.count = 0
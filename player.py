@@ -1,9 +1,17 @@
 import pygame
 from constants import SCREEN_WIDTH, SCREEN_HEIGHT, BLACK
+from game_platform import gaps_contain
 
 
 class Player:
+    __slots__ = ('width', 'height', 'x', 'y', 'velocity_y', 'jumping', 'gravity', 'jump_strength', 'move_speed',
+                 'animation_frame', 'last_direction', 'sound_manager', 'was_jumping')
+
     def __init__(self, sound_manager=None):
+        self.reset(sound_manager)
+
+    def reset(self, sound_manager=None):
+        """(Re)initialise Jack on the ground at the start of a level"""
         self.width = 20
         self.height = 32
         self.x = 100
@@ -45,7 +53,7 @@ class Player:
         if not self.jumping and self.sound_manager:
             self.sound_manager.play_walk()
 
-    def update(self, gap_objects, platform_positions):
+    def update(self, gap_objects, platform_positions, gap_index=None):
         # Track if we were jumping at start of frame
         was_jumping_before = self.jumping
 
@@ -54,7 +62,7 @@ class Player:
         # Check head collision against all 5 physical platform levels
         if self.velocity_y < 0:
             for platform_index, platform_y in enumerate(platform_positions):
-                if self.check_head_collision_at_level(platform_index, platform_y, gap_objects):
+                if self.check_head_collision_at_level(platform_index, platform_y, gap_objects, gap_index):
                     self.y = platform_y + 3  # platform height is 3
                     self.velocity_y = 0
                     if self.sound_manager:
@@ -68,7 +76,7 @@ class Player:
         # Check landing on all 5 physical platform levels
         if self.velocity_y >= 0:
             for platform_index, platform_y in enumerate(platform_positions):
-                if self.can_land_on_platform_at_level(platform_index, platform_y, gap_objects):
+                if self.can_land_on_platform_at_level(platform_index, platform_y, gap_objects, gap_index):
                     self.y = platform_y - self.height
                     self.velocity_y = 0
                     self.jumping = False
@@ -87,7 +95,15 @@ class Player:
 
         return True
 
-    def check_head_collision_at_level(self, platform_index, platform_y, gap_objects):
+    @staticmethod
+    def is_over_gap(platform_index, x_position, gap_objects, gap_index=None):
+        """Check if x_position is inside any gap currently on the given platform level"""
+        if gap_index is not None:
+            return gap_index.is_in_any_gap(platform_index, x_position)
+        active_gaps = [gap for gap in gap_objects if gap.gap_current_platform_index == platform_index]
+        return gaps_contain(active_gaps, x_position)
+
+    def check_head_collision_at_level(self, platform_index, platform_y, gap_objects, gap_index=None):
         """Check if player's head hits a solid part of a platform level"""
         platform_height = 3
         player_top = self.y
@@ -96,39 +112,14 @@ class Player:
         # Check if player is about to hit this platform from below
         if player_top >= platform_y + platform_height and player_next_top <= platform_y + platform_height:
             player_center = self.x + self.width / 2
+            in_any_gap = self.is_over_gap(platform_index, player_center, gap_objects, gap_index)
 
-            # Find ALL gaps currently on this platform level
-            active_gaps = []
-            for gap in gap_objects:
-                if gap.gap_current_platform_index == platform_index:
-                    active_gaps.append(gap)
-
-            if active_gaps:
-                # There are gap(s) on this level - check if player is in ANY of them
-                in_any_gap = False
-                for active_gap in active_gaps:
-                    gap_actual_start = (active_gap.gap_start + active_gap.x_offset) % active_gap.width
-                    gap_actual_end = gap_actual_start + active_gap.gap_width
-
-                    if gap_actual_end > active_gap.width:
-                        in_gap = (player_center >= gap_actual_start or
-                                 player_center <= gap_actual_end - active_gap.width)
-                    else:
-                        in_gap = gap_actual_start <= player_center <= gap_actual_end
-
-                    if in_gap:
-                        in_any_gap = True
-                        break
-
-                # If in a gap, can pass through; if not in gap, collide with solid platform
-                return not in_any_gap
-            else:
-                # No gap on this level - platform is solid, collision occurs
-                return True
+            # If in a gap, can pass through; if not in gap (or no gaps on this level), collide
+            return not in_any_gap
 
         return False
 
-    def can_land_on_platform_at_level(self, platform_index, platform_y, gap_objects):
+    def can_land_on_platform_at_level(self, platform_index, platform_y, gap_objects, gap_index=None):
         """Check if player can land on a solid part of a platform level"""
         player_bottom = self.y + self.height
 
@@ -136,44 +127,27 @@ class Player:
 
         if distance_to_platform <= abs(self.velocity_y) + 5:
             player_center = self.x + self.width / 2
+            in_any_gap = self.is_over_gap(platform_index, player_center, gap_objects, gap_index)
 
-            # Find ALL gaps currently on this platform level
-            active_gaps = []
-            for gap in gap_objects:
-                if gap.gap_current_platform_index == platform_index:
-                    active_gaps.append(gap)
-
-            if active_gaps:
-                # There are gap(s) on this level - check if player is in ANY of them
-                in_any_gap = False
-                for active_gap in active_gaps:
-                    gap_actual_start = (active_gap.gap_start + active_gap.x_offset) % active_gap.width
-                    gap_actual_end = gap_actual_start + active_gap.gap_width
-
-                    if gap_actual_end > active_gap.width:
-                        in_gap = (player_center >= gap_actual_start or
-                                 player_center <= gap_actual_end - active_gap.width)
-                    else:
-                        in_gap = gap_actual_start <= player_center <= gap_actual_end
-
-                    if in_gap:
-                        in_any_gap = True
-                        break
-
-                # If in gap, fall through; if not in gap, can land
-                return not in_any_gap
-            else:
-                # No gap on this level - platform is solid, can land
-                return True
+            # If in gap, fall through; if not in gap (or no gaps on this level), can land
+            return not in_any_gap
 
         return False
 
-    def check_crushed(self, platforms):
+    def check_crushed(self, platforms, gap_index=None):
         # Get unique Y positions of platforms we're touching
         touching_platform_y_positions = set()
-        for platform in platforms:
-            if platform.check_collision(self):
-                touching_platform_y_positions.add(platform.y)
+        if gap_index is not None:
+            # Only the bars we overlap vertically can touch us
+            player_center = self.x + self.width / 2
+            for platform_index, platform_y in enumerate(gap_index.platform_positions):
+                if self.y + self.height >= platform_y and self.y <= platform_y + 3:
+                    if gap_index.bar_is_solid_at(platform_index, player_center):
+                        touching_platform_y_positions.add(platform_y)
+        else:
+            for platform in platforms:
+                if platform.check_collision(self):
+                    touching_platform_y_positions.add(platform.y)
 
         # Crushed only if touching 2+ platforms at different Y positions
         if len(touching_platform_y_positions) >= 2:
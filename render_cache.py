@@ -0,0 +1,51 @@
+from collections import OrderedDict
+
+import pygame
+
+
+class RenderCache:
+    """Caches fonts by size, rendered text surfaces and full-screen overlays.
+
+    Text surfaces are keyed by (text, size, color) and evicted least recently used
+    first, so HUD strings such as the score are only re-rendered when they change.
+    Returned surfaces are shared - blit them, don't draw on them.
+    """
+
+    def __init__(self, max_text_surfaces=256):
+        self.max_text_surfaces = max_text_surfaces
+        self.fonts = {}
+        self.text_surfaces = OrderedDict()
+        self.overlays = {}
+
+    def font(self, size):
+        """Get the default font at the given size"""
+        font = self.fonts.get(size)
+        if font is None:
+            font = pygame.font.Font(None, size)
+            self.fonts[size] = font
+        return font
+
+    def text(self, text, size, color):
+        """Get an antialiased rendering of text"""
+        key = (text, size, color)
+        surface = self.text_surfaces.get(key)
+        if surface is not None:
+            self.text_surfaces.move_to_end(key)
+            return surface
+
+        surface = self.font(size).render(text, True, color)
+        self.text_surfaces[key] = surface
+        if len(self.text_surfaces) > self.max_text_surfaces:
+            self.text_surfaces.popitem(last=False)
+        return surface
+
+    def overlay(self, size, color, alpha):
+        """Get a solid surface of the given size, color and alpha"""
+        key = (size, color, alpha)
+        surface = self.overlays.get(key)
+        if surface is None:
+            surface = pygame.Surface(size)
+            surface.set_alpha(alpha)
+            surface.fill(color)
+            self.overlays[key] = surface
+        return surface
@@ -0,0 +1,143 @@
+import struct
+
+from game_input import InputState, ScriptedInput
+
+
+# File layout (little-endian):
+#   header  magic b'JJRP', format version (u8), seed (u64), frame count (u32),
+#           final score (u32), final level (u16), final lives (u8)
+#   body    one varint per run of identical inputs: (run length << 3) | input bits
+REPLAY_MAGIC = b'JJRP'
+REPLAY_VERSION = 5
+_HEADER = struct.Struct('<4sBQIIHB')
+
+
+class ReplayError(ValueError):
+    """Raised when a replay file is malformed or from an unsupported version"""
+
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, pos):
+    value = 0
+    shift = 0
+    while True:
+        if pos >= len(data):
+            raise ReplayError("Replay data ends in the middle of a run")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, pos
+        shift += 7
+
+
+class Replay:
+    """A recorded game: the seed of its random generator plus one input bit mask per frame.
+
+    A headless Game created with the same seed and fed the same inputs
+    reproduces the session exactly, so the final score, level and lives stored
+    with the replay can be verified by playing it back.
+    """
+
+    def __init__(self, seed, inputs=None, score=0, level=1, lives=0):
+        self.seed = seed
+        self.inputs = bytearray(inputs or ())
+        self.score = score
+        self.level = level
+        self.lives = lives
+
+    def to_bytes(self):
+        out = bytearray(_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, self.seed, len(self.inputs),
+                                     self.score, self.level, self.lives))
+        frame = 0
+        while frame < len(self.inputs):
+            bits = self.inputs[frame]
+            run_end = frame + 1
+            while run_end < len(self.inputs) and self.inputs[run_end] == bits:
+                run_end += 1
+            _write_varint(out, ((run_end - frame) << 3) | bits)
+            frame = run_end
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if len(data) < _HEADER.size:
+            raise ReplayError("Replay file is too short")
+        magic, version, seed, frames, score, level, lives = _HEADER.unpack_from(data)
+        if magic != REPLAY_MAGIC:
+            raise ReplayError("Not a Jumping Jack replay")
+        if version != REPLAY_VERSION:
+            raise ReplayError(f"Unsupported replay version {version}")
+
+        inputs = bytearray()
+        pos = _HEADER.size
+        while pos < len(data):
+            run, pos = _read_varint(data, pos)
+            inputs.extend(bytes((run & 0x7,)) * (run >> 3))
+        if len(inputs) != frames:
+            raise ReplayError(f"Replay has {len(inputs)} frames of input, header says {frames}")
+        return cls(seed, inputs, score, level, lives)
+
+    def save(self, filename):
+        with open(filename, 'wb') as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, filename):
+        with open(filename, 'rb') as f:
+            return cls.from_bytes(f.read())
+
+    def input_states(self):
+        """The recorded inputs as InputState values, e.g. for ScriptedInput"""
+        return (InputState.from_bits(bits) for bits in self.inputs)
+
+
+class RecordingInput:
+    """Wraps another input source and records every frame it returns into a Replay"""
+
+    def __init__(self, source, seed):
+        self.source = source
+        self.replay = Replay(seed)
+
+    def press_jump(self):
+        self.source.press_jump()
+
+    def restart(self, seed):
+        """Start recording a new game (the previous replay is discarded)"""
+        self.replay = Replay(seed)
+
+    def poll(self):
+        state = self.source.poll()
+        if isinstance(state, int):
+            state = InputState.from_bits(state)
+        self.replay.inputs.append(state.bits)
+        return state
+
+    def save(self, filename, game):
+        """Store the game's final score, level and lives with the inputs and write the replay"""
+        self.replay.score = game.total_score
+        self.replay.level = game.level
+        self.replay.lives = max(game.lives, 0)
+        self.replay.save(filename)
+
+
+def play_replay(replay):
+    """Play a replay back headlessly at full speed; returns the finished Game"""
+    # Imported here to avoid a circular import with jumping_jack
+    from jumping_jack import Game
+
+    game = Game(headless=True, seed=replay.seed, input_source=ScriptedInput(replay.input_states()))
+    game.simulate(len(replay.inputs))
+    return game
+
+
+def verify_replay(replay):
+    """Play a replay back and check it ends with the recorded score, level and lives"""
+    game = play_replay(replay)
+    return (game.total_score, game.level, max(game.lives, 0)) == (replay.score, replay.level, replay.lives)
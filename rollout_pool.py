@@ -0,0 +1,197 @@
+"""Run many headless games across worker processes.
+
+    from rollout_pool import RolloutPool, RandomPolicy
+
+    with RolloutPool(workers=8, max_frames=FPS * 120) as pool:
+        for seed in range(1000):
+            pool.submit(seed, RandomPolicy(seed))
+        for result in pool.collect():
+            print(result.seed, result.score, result.level, result.frames)
+
+Each worker plays whole episodes and writes every frame's observation and
+reward, plus the episode's final stats, straight into a shared-memory block
+(multiprocessing.shared_memory) - only a slot number and frame count travel
+back through the pool. Policies are called as policy(game) -> input bits, like
+PolicyInput, and must be picklable (module-level functions or objects such as
+RandomPolicy), since they are sent to the workers.
+"""
+import multiprocessing
+import os
+import random
+import time
+from collections import deque
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from constants import FPS
+from game_input import INPUT_LEFT, INPUT_RIGHT, INPUT_JUMP
+
+# Per-frame observation vector, recorded after each update
+OBSERVATION_FIELDS = ('player_x', 'player_y', 'velocity_y', 'level', 'lives', 'invincibility_timer', 'total_score')
+# Per-episode stats
+STAT_FIELDS = ('frames', 'score', 'level', 'lives', 'seconds')
+
+
+class RandomPolicy:
+    """Picks a random input each frame from its own seeded generator (picklable)"""
+
+    DEFAULT_CHOICES = (INPUT_JUMP, INPUT_JUMP, INPUT_RIGHT | INPUT_JUMP, INPUT_LEFT | INPUT_JUMP,
+                       INPUT_RIGHT, INPUT_LEFT, 0)
+
+    def __init__(self, seed=None, choices=DEFAULT_CHOICES):
+        self.rng = random.Random(seed)
+        self.choices = tuple(choices)
+
+    def __call__(self, game):
+        return self.rng.choice(self.choices)
+
+
+class RolloutResult:
+    """One finished episode: final stats plus per-frame observations and rewards (NumPy arrays)"""
+
+    def __init__(self, job, seed, level, stats, observations, rewards):
+        self.job = job
+        self.seed = seed
+        self.start_level = level
+        self.frames = int(stats[0])
+        self.score = int(stats[1])
+        self.level = int(stats[2])
+        self.lives = int(stats[3])
+        self.seconds = float(stats[4])
+        self.observations = observations  # shape (frames, len(OBSERVATION_FIELDS)), float32
+        self.rewards = rewards  # shape (frames,), float32 - score gained each frame
+
+
+class _Buffers:
+    """NumPy views of the rollout slots inside one shared-memory block"""
+
+    def __init__(self, shm, slots, max_frames):
+        n_obs = len(OBSERVATION_FIELDS)
+        obs_bytes = slots * max_frames * n_obs * 4
+        reward_bytes = slots * max_frames * 4
+        self.observations = np.ndarray((slots, max_frames, n_obs), dtype=np.float32, buffer=shm.buf)
+        self.rewards = np.ndarray((slots, max_frames), dtype=np.float32, buffer=shm.buf, offset=obs_bytes)
+        self.stats = np.ndarray((slots, len(STAT_FIELDS)), dtype=np.float64, buffer=shm.buf,
+                                offset=obs_bytes + reward_bytes)
+
+    @staticmethod
+    def size(slots, max_frames):
+        return slots * max_frames * (len(OBSERVATION_FIELDS) + 1) * 4 + slots * len(STAT_FIELDS) * 8
+
+
+# Worker process state, set up once per process by _init_worker
+_worker_shm = None
+_worker_buffers = None
+
+
+def _init_worker(shm_name, slots, max_frames):
+    global _worker_shm, _worker_buffers
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    _worker_shm = shared_memory.SharedMemory(name=shm_name)
+    _worker_buffers = _Buffers(_worker_shm, slots, max_frames)
+
+
+def _run_episode(slot, seed, policy, level, max_frames):
+    """Play one episode in a worker, writing into its slot; returns (slot, frames)"""
+    # Imported here so the parent process doesn't need pygame loaded to create a pool
+    from jumping_jack import Game
+    from game_input import PolicyInput
+
+    started = time.perf_counter()
+    game = Game(headless=True, seed=seed)
+    game.input_source = PolicyInput(policy, game)
+    if level != 1:
+        game.level = level
+        game.setup_level()
+
+    observations = _worker_buffers.observations[slot]
+    rewards = _worker_buffers.rewards[slot]
+    frames = 0
+    score = game.total_score
+    while game.running and game.lives > 0 and frames < max_frames:
+        game.update()
+        player = game.player
+        observations[frames] = (player.x, player.y, player.velocity_y, game.level, game.lives,
+                                game.invincibility_timer, game.total_score)
+        rewards[frames] = game.total_score - score
+        score = game.total_score
+        frames += 1
+
+    _worker_buffers.stats[slot] = (frames, game.total_score, game.level, max(game.lives, 0),
+                                   time.perf_counter() - started)
+    return slot, frames
+
+
+class RolloutPool:
+    """A pool of worker processes playing headless episodes into shared memory.
+
+    submit(seed, policy) queues an episode and returns its job number;
+    collect() waits for every submitted episode and returns their results in
+    submission order. At most `slots` episodes are in flight or uncollected at
+    once (default: two per worker) - submit() copies finished episodes out of
+    shared memory to free a slot when needed, so any number can be submitted.
+    """
+
+    def __init__(self, workers=None, max_frames=FPS * 300, slots=None, context=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_frames = max_frames
+        self.slots = slots or 2 * self.workers
+        self._shm = shared_memory.SharedMemory(create=True, size=_Buffers.size(self.slots, max_frames))
+        self._buffers = _Buffers(self._shm, self.slots, max_frames)
+        context = multiprocessing.get_context(context)
+        self._pool = context.Pool(self.workers, initializer=_init_worker,
+                                  initargs=(self._shm.name, self.slots, max_frames))
+        self._free_slots = deque(range(self.slots))
+        self._pending = deque()  # (job, seed, level, slot, AsyncResult), in submission order
+        self._finished = []
+        self._next_job = 0
+
+    def submit(self, seed, policy, level=1):
+        """Queue one episode from the given seed (and starting level); returns its job number"""
+        if not self._free_slots:
+            self._finish_oldest()
+        slot = self._free_slots.popleft()
+        job = self._next_job
+        self._next_job += 1
+        async_result = self._pool.apply_async(_run_episode, (slot, seed, policy, level, self.max_frames))
+        self._pending.append((job, seed, level, slot, async_result))
+        return job
+
+    def map(self, seeds, policy_factory, level=1):
+        """Play one episode per seed with policy_factory(seed) and return the results"""
+        for seed in seeds:
+            self.submit(seed, policy_factory(seed), level)
+        return self.collect()
+
+    def _finish_oldest(self):
+        job, seed, level, slot, async_result = self._pending.popleft()
+        try:
+            _, frames = async_result.get()  # Re-raises an exception from the worker
+            self._finished.append(RolloutResult(job, seed, level, self._buffers.stats[slot].copy(),
+                                                self._buffers.observations[slot, :frames].copy(),
+                                                self._buffers.rewards[slot, :frames].copy()))
+        finally:
+            self._free_slots.append(slot)
+
+    def collect(self):
+        """Wait for all submitted episodes; returns their RolloutResults in submission order"""
+        while self._pending:
+            self._finish_oldest()
+        results, self._finished = self._finished, []
+        return results
+
+    def close(self):
+        self._pool.close()
+        self._pool.join()
+        # Drop our views before releasing the block
+        self._buffers = None
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -1,33 +1,169 @@
+import hashlib
+import os
+import threading
+import time
+
 import pygame
-import numpy as np
-import io
+
+from music import MusicStream
+from numpy_loader import load_numpy
+from startup_profile import startup_profile
+
+
+# Bump when the synthesis code changes so stale cached buffers are regenerated
+SOUND_CACHE_VERSION = 1
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sound_cache')
+
+# Sound effect name -> (generator, positional args, keyword args)
+SOUND_EFFECTS = {
+    # Jump sound - upward sweep (rising pitch)
+    'jump': ('sweep', (200, 600, 0.15), {'volume': 0.25}),
+    # Walk/footstep - short low tone
+    'walk': ('tone', (150, 0.08), {'volume': 0.15}),
+    # Landing sound - quick downward sweep
+    'land': ('sweep', (400, 150, 0.12), {'volume': 0.2}),
+    # Death/hit sound - harsh downward sweep
+    'death': ('sweep', (600, 100, 0.3), {'volume': 0.3}),
+    # Level complete - upward celebration sweep
+    'level_complete': ('sweep', (300, 800, 0.5), {'volume': 0.25}),
+}
+
+
+# Sound effect name -> (channel category, most voices of it playing at once)
+EFFECT_VOICES = {
+    'jump': ('movement', 1),
+    'land': ('movement', 1),
+    'walk': ('footsteps', 1),
+    'death': ('events', 1),
+    'level_complete': ('events', 1),
+}
+
+# Mixer channels reserved for each category, so footsteps can never take the
+# channel a death or level complete sound needs
+CATEGORY_CHANNELS = {
+    'movement': 2,
+    'footsteps': 1,
+    'events': 2,
+}
+
+DEFAULT_FREQUENCY = 22050
+DEFAULT_BUFFER = 512  # samples per mixer callback - smaller is lower latency
+
+
+class ChannelPool:
+    """Fixed mixer channels per effect category, with voice limiting.
+
+    Every category gets its own channels (reserved, so pygame never hands them
+    out for other sounds). play() stops the oldest voice of an effect that is
+    already at its voice limit, otherwise uses a free channel of its category,
+    otherwise steals the category's oldest voice.
+    """
+
+    def __init__(self, category_channels=CATEGORY_CHANNELS, effect_voices=EFFECT_VOICES, first_channel=0):
+        self.effect_voices = effect_voices
+        self.channels = {}
+        index = first_channel
+        for category, count in category_channels.items():
+            self.channels[category] = [pygame.mixer.Channel(i) for i in range(index, index + count)]
+            index += count
+        if pygame.mixer.get_num_channels() < index:
+            pygame.mixer.set_num_channels(index)
+        pygame.mixer.set_reserved(index)
+        # Channel -> (effect name, serial) of the voice last started on it
+        self.voices = {}
+        self.serial = 0
+
+    def _voice(self, channel):
+        """(effect name, serial) playing on a channel, or None if it has finished"""
+        voice = self.voices.get(channel)
+        if voice is not None and not channel.get_busy():
+            del self.voices[channel]
+            voice = None
+        return voice
+
+    def choose_channel(self, effect):
+        category, max_voices = self.effect_voices[effect]
+        channels = self.channels[category]
+        playing = []  # (serial, channel) of the category's voices still sounding
+        same_effect = []
+        free = None
+        for channel in channels:
+            voice = self._voice(channel)
+            if voice is None:
+                if free is None:
+                    free = channel
+                continue
+            playing.append((voice[1], channel))
+            if voice[0] == effect:
+                same_effect.append((voice[1], channel))
+        if len(same_effect) >= max_voices:
+            return min(same_effect, key=lambda entry: entry[0])[1]
+        if free is not None:
+            return free
+        return min(playing, key=lambda entry: entry[0])[1]
+
+    def play(self, effect, sound):
+        """Start a sound on the effect's category channels; returns the channel used"""
+        channel = self.choose_channel(effect)
+        channel.play(sound)  # Replaces whatever the channel was playing
+        self.serial += 1
+        self.voices[channel] = (effect, self.serial)
+        return channel
 
 
 class SoundManager:
-    """Manages all game sounds with retro-style synthesized effects"""
+    """Manages all game sounds with retro-style synthesized effects.
 
-    def __init__(self):
-        pygame.mixer.init(frequency=22050, size=-16, channels=2, buffer=512)
+    Effects are synthesized on first use (or by warm(), optionally on a
+    background thread) and their PCM buffers are cached on disk as .npy files
+    keyed by the synthesis parameters, so later starts just memory-map them.
+
+    Effects play through a ChannelPool, and each effect is started at most
+    once per frame (see begin_frame). frequency and buffer set the mixer's
+    sample rate and callback size; the latency they add is buffer / frequency
+    seconds, see latency_estimate() and measure_latency().
+
+    Background music streams on mixer channel 0 (see music.py) unless music
+    is False.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, frequency=DEFAULT_FREQUENCY, buffer=DEFAULT_BUFFER,
+                 music=True):
+        with startup_profile.stage("mixer init"):
+            pygame.mixer.init(frequency=frequency, size=-16, channels=2, buffer=buffer)
+        # Synthesize at the rate the mixer actually opened with
+        mixer_settings = pygame.mixer.get_init()
+        self.sample_rate = mixer_settings[0] if mixer_settings else frequency
+        self.buffer = buffer
+        self.cache_dir = cache_dir
         self.sounds = {}
-        self.generate_all_sounds()
+        self._lock = threading.Lock()
+        self.warm_thread = None
+        # Channel 0 is the music's; the effects' channels follow it
+        self.channel_pool = ChannelPool(first_channel=1)
+        self.music = MusicStream(pygame.mixer.Channel(0), self.sample_rate) if music else None
+        # Effects started since begin_frame(), so a double trigger plays once
+        self.triggered = set()
 
         # Sound cooldowns to prevent spam
         self.walk_cooldown = 0
         self.walk_cooldown_max = 8  # frames between footstep sounds
 
-    def generate_tone(self, frequency, duration, volume=0.3, sample_rate=22050):
-        """Generate a simple sine wave tone"""
+    def tone_samples(self, frequency, duration, volume=0.3, sample_rate=22050):
+        """Generate a simple sine wave tone as 16-bit stereo samples"""
+        np = load_numpy()
         n_samples = int(duration * sample_rate)
         t = np.linspace(0, duration, n_samples, False)
         wave = np.sin(2 * np.pi * frequency * t) * volume
         # Convert to 16-bit signed integers
         wave = (wave * 32767).astype(np.int16)
         # Make stereo
-        stereo_wave = np.column_stack((wave, wave))
-        return pygame.sndarray.make_sound(stereo_wave)
+        return np.column_stack((wave, wave))
 
-    def generate_sweep(self, freq_start, freq_end, duration, volume=0.3, sample_rate=22050):
-        """Generate a frequency sweep (slide)"""
+    def sweep_samples(self, freq_start, freq_end, duration, volume=0.3, sample_rate=22050):
+        """Generate a frequency sweep (slide) as 16-bit stereo samples"""
+        np = load_numpy()
         n_samples = int(duration * sample_rate)
         t = np.linspace(0, duration, n_samples, False)
         # Linear frequency sweep
@@ -40,11 +176,11 @@ class SoundManager:
         # Convert to 16-bit signed integers
         wave = (wave * 32767).astype(np.int16)
         # Make stereo
-        stereo_wave = np.column_stack((wave, wave))
-        return pygame.sndarray.make_sound(stereo_wave)
+        return np.column_stack((wave, wave))
 
-    def generate_noise(self, duration, volume=0.2, sample_rate=22050):
-        """Generate white noise (for landing/falling sounds)"""
+    def noise_samples(self, duration, volume=0.2, sample_rate=22050):
+        """Generate white noise as 16-bit stereo samples"""
+        np = load_numpy()
         n_samples = int(duration * sample_rate)
         t = np.linspace(0, duration, n_samples, False)
         wave = np.random.uniform(-1, 1, n_samples) * volume
@@ -54,40 +190,105 @@ class SoundManager:
         # Convert to 16-bit signed integers
         wave = (wave * 32767).astype(np.int16)
         # Make stereo
-        stereo_wave = np.column_stack((wave, wave))
-        return pygame.sndarray.make_sound(stereo_wave)
+        return np.column_stack((wave, wave))
 
-    def generate_all_sounds(self):
-        """Generate all game sound effects"""
-        try:
-            # Jump sound - upward sweep (rising pitch)
-            self.sounds['jump'] = self.generate_sweep(200, 600, 0.15, volume=0.25)
+    def generate_tone(self, frequency, duration, volume=0.3, sample_rate=22050):
+        """Generate a simple sine wave tone"""
+        return pygame.sndarray.make_sound(self.tone_samples(frequency, duration, volume, sample_rate))
 
-            # Walk/footstep - short low tone
-            self.sounds['walk'] = self.generate_tone(150, 0.08, volume=0.15)
+    def generate_sweep(self, freq_start, freq_end, duration, volume=0.3, sample_rate=22050):
+        """Generate a frequency sweep (slide)"""
+        return pygame.sndarray.make_sound(self.sweep_samples(freq_start, freq_end, duration, volume, sample_rate))
 
-            # Landing sound - quick downward sweep with noise
-            landing_sweep = self.generate_sweep(400, 150, 0.12, volume=0.2)
-            landing_noise = self.generate_noise(0.08, volume=0.15)
-            # Mix both sounds
-            self.sounds['land'] = landing_sweep
+    def generate_noise(self, duration, volume=0.2, sample_rate=22050):
+        """Generate white noise (for landing/falling sounds)"""
+        return pygame.sndarray.make_sound(self.noise_samples(duration, volume, sample_rate))
 
-            # Death/hit sound - harsh downward sweep
-            self.sounds['death'] = self.generate_sweep(600, 100, 0.3, volume=0.3)
+    def _cache_path(self, kind, args, kwargs):
+        key = repr((SOUND_CACHE_VERSION, kind, args, sorted(kwargs.items()), self.sample_rate))
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{kind}-{digest}.npy")
 
-            # Level complete - upward celebration sweep
-            self.sounds['level_complete'] = self.generate_sweep(300, 800, 0.5, volume=0.25)
+    def load_samples(self, sound_name):
+        """Get the PCM buffer for an effect from the disk cache, synthesizing it on a miss"""
+        kind, args, kwargs = SOUND_EFFECTS[sound_name]
+        path = self._cache_path(kind, args, kwargs) if self.cache_dir else None
+        np = load_numpy()
 
-        except Exception as e:
-            print(f"Warning: Could not generate sounds: {e}")
-            # Disable sounds if generation fails
-            self.sounds = {}
+        if path and os.path.exists(path):
+            try:
+                return np.load(path, mmap_mode='r')
+            except (OSError, ValueError):
+                pass  # Corrupt cache entry - synthesize it again
+
+        generator = getattr(self, f"{kind}_samples")
+        samples = generator(*args, sample_rate=self.sample_rate, **kwargs)
+
+        if path:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                # Write under a temporary name so a crash never leaves a truncated entry
+                temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(temp_path, 'wb') as f:
+                    np.save(f, samples)
+                os.replace(temp_path, path)
+            except OSError:
+                pass  # Caching is best-effort
+        return samples
+
+    def get_sound(self, sound_name):
+        """Get a sound effect, creating it on first use (None if unknown or unavailable)"""
+        sound = self.sounds.get(sound_name)
+        if sound is not None or sound_name not in SOUND_EFFECTS:
+            return sound
+
+        with self._lock:
+            if sound_name in self.sounds:
+                return self.sounds[sound_name]
+            try:
+                sound = pygame.sndarray.make_sound(load_numpy().ascontiguousarray(self.load_samples(sound_name)))
+            except Exception as e:
+                print(f"Warning: Could not generate sound '{sound_name}': {e}")
+                sound = None  # Don't retry every time it's played
+            self.sounds[sound_name] = sound
+            return sound
+
+    def warm(self, background=True):
+        """Create every sound effect now, optionally on a background thread"""
+        def generate_all():
+            with startup_profile.stage("sound warm-up"):
+                for sound_name in SOUND_EFFECTS:
+                    self.get_sound(sound_name)
+
+        if not background:
+            generate_all()
+            return None
+        self.warm_thread = threading.Thread(target=generate_all, name="sound-warmup", daemon=True)
+        self.warm_thread.start()
+        return self.warm_thread
+
+    def wait_until_warm(self):
+        """Block until a background warm() has finished"""
+        if self.warm_thread is not None:
+            self.warm_thread.join()
+
+    def generate_all_sounds(self):
+        """Generate all game sound effects"""
+        self.warm(background=False)
+
+    def begin_frame(self):
+        """Start a new frame: each effect can be triggered again once"""
+        self.triggered.clear()
 
     def play(self, sound_name):
-        """Play a sound effect"""
-        if sound_name in self.sounds:
+        """Play a sound effect (ignored if it was already triggered this frame)"""
+        if sound_name in self.triggered:
+            return
+        self.triggered.add(sound_name)
+        sound = self.get_sound(sound_name)
+        if sound is not None:
             try:
-                self.sounds[sound_name].play()
+                self.channel_pool.play(sound_name, sound)
             except Exception as e:
                 print(f"Warning: Could not play sound '{sound_name}': {e}")
 
@@ -101,3 +302,71 @@ class SoundManager:
         """Update sound cooldowns"""
         if self.walk_cooldown > 0:
             self.walk_cooldown -= 1
+
+    def start_music(self, level, base_speed):
+        """Play the level's background music, at a tempo following base_speed"""
+        if self.music is not None:
+            # Only ever one stream: stop the previous level's before starting this one
+            self.music.stop()
+            self.music.set_level(level, base_speed)
+            self.music.start()
+
+    def stop_music(self, wait=False):
+        """Stop the background music; wait=True also waits for its worker thread to exit"""
+        if self.music is not None:
+            self.music.stop(wait)
+
+    def latency_estimate(self):
+        """Seconds of audio the mixer buffers between a trigger and the speaker"""
+        return self.buffer / self.sample_rate
+
+    def measure_latency(self, trials=10):
+        """Measured trigger-to-output latency in seconds: (mean, worst) over trials.
+
+        Plays a silent 10 ms clip on a channel outside the pool and times how
+        long the mixer takes to finish it. Whatever exceeds the clip's length is
+        the wait for the mixer to pick it up; one more buffer is added for the
+        time the device takes to play out what the mixer produced.
+        """
+        np = load_numpy()
+        clip_length = 0.01
+        clip = pygame.sndarray.make_sound(np.zeros((int(self.sample_rate * clip_length), 2), dtype=np.int16))
+        channel = pygame.mixer.find_channel(True)  # Never one of the pool's reserved channels
+        output_delay = self.latency_estimate()
+        latencies = []
+        for _ in range(trials):
+            started = time.perf_counter()
+            channel.play(clip)
+            while channel.get_busy():
+                time.sleep(0.0002)
+            elapsed = time.perf_counter() - started
+            latencies.append(max(elapsed - clip_length, 0.0) + output_delay)
+        return sum(latencies) / len(latencies), max(latencies)
+
+
+class NullSoundManager:
+    """Silent stand-in used by headless and sound=False games (no mixer is initialised)"""
+
+    def warm(self, background=True):
+        return None
+
+    def wait_until_warm(self):
+        pass
+
+    def begin_frame(self):
+        pass
+
+    def start_music(self, level, base_speed):
+        pass
+
+    def stop_music(self, wait=False):
+        pass
+
+    def play(self, sound_name):
+        pass
+
+    def play_walk(self):
+        pass
+
+    def update(self):
+        pass
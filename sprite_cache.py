@@ -0,0 +1,112 @@
+from collections import OrderedDict
+
+import pygame
+
+
+# Transparent border around each sprite for parts drawn outside the hitbox
+# (the Hunter's gun, snake segments, Jack's arms)
+SPRITE_MARGIN = 20
+
+
+class _SpritePose:
+    """Stand-in passed to the original draw() methods while baking a sprite"""
+
+    def __init__(self, **attributes):
+        self.__dict__.update(attributes)
+
+
+class SpriteAtlas:
+    """Pre-rendered enemy and player sprites, so drawing an entity is a single blit.
+
+    Enemy sprites are keyed by (enemy class, color, direction, animation phase).
+    The phase quantises animation_frame modulo the class's animation_period to
+    its animation_phases poses, so every enemy sprite of a level fits in the
+    atlas: prebake() bakes them in setup_level, with the entity's own draw()
+    method. Other sprites are baked the first time they are needed; the least
+    recently used sprites are dropped beyond max_sprites.
+    """
+
+    def __init__(self, max_sprites=2048):
+        self.max_sprites = max_sprites
+        self.sprites = OrderedDict()
+
+    def _new_surface(self, width, height):
+        surface = pygame.Surface((width + 2 * SPRITE_MARGIN, height + 2 * SPRITE_MARGIN), pygame.SRCALPHA)
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha()
+        surface.fill((0, 0, 0, 0))
+        return surface
+
+    def _get(self, key, bake):
+        sprite = self.sprites.get(key)
+        if sprite is not None:
+            self.sprites.move_to_end(key)
+            return sprite
+
+        sprite = bake()
+        self.sprites[key] = sprite
+        if len(self.sprites) > self.max_sprites:
+            self.sprites.popitem(last=False)
+        return sprite
+
+    @staticmethod
+    def animation_phase(enemy_class, animation_frame):
+        """The pose (0 to animation_phases - 1) shown at an animation frame"""
+        period = enemy_class.animation_period
+        return animation_frame % period * enemy_class.animation_phases // period
+
+    def _enemy_sprite(self, enemy_class, color, direction, phase):
+        key = (enemy_class, color, direction, phase)
+
+        def bake():
+            surface = self._new_surface(enemy_class.WIDTH, enemy_class.HEIGHT)
+            # Each pose is drawn at the first animation frame it stands for
+            frame = -(-phase * enemy_class.animation_period // enemy_class.animation_phases)
+            pose = _SpritePose(x=SPRITE_MARGIN, y=SPRITE_MARGIN, width=enemy_class.WIDTH,
+                               height=enemy_class.HEIGHT, color=color, direction=direction,
+                               animation_frame=frame)
+            enemy_class.draw(pose, surface)
+            return surface
+
+        return self._get(key, bake)
+
+    def enemy_sprite(self, enemy):
+        enemy_class = type(enemy)
+        return self._enemy_sprite(enemy_class, enemy.color, enemy.direction,
+                                  self.animation_phase(enemy_class, enemy.animation_frame))
+
+    def prebake(self, enemy_classes):
+        """Bake every color, direction and pose of some enemy types up front"""
+        for enemy_class in enemy_classes:
+            for color in enemy_class.COLORS:
+                for direction in (-1, 1):
+                    for phase in range(enemy_class.animation_phases):
+                        self._enemy_sprite(enemy_class, color, direction, phase)
+
+    def draw_enemy(self, screen, enemy):
+        screen.blit(self.enemy_sprite(enemy), (enemy.x - SPRITE_MARGIN, enemy.y - SPRITE_MARGIN))
+
+    def draw_player(self, screen, player):
+        # Jack has three poses: standing, and two alternating running frames
+        running = player.last_direction != 0
+        stride = (player.animation_frame // 4) % 2 if running else 0
+        key = ('player', player.width, player.height, running, stride)
+
+        def bake():
+            surface = self._new_surface(player.width, player.height)
+            pose = _SpritePose(x=SPRITE_MARGIN, y=SPRITE_MARGIN, width=player.width, height=player.height,
+                               last_direction=player.last_direction, animation_frame=stride * 4)
+            type(player).draw(pose, surface)
+            return surface
+
+        sprite = self._get(key, bake)
+        screen.blit(sprite, (player.x - SPRITE_MARGIN, player.y - SPRITE_MARGIN))
+
+    def draw_small_jack(self, screen, x, y, player_class):
+        def bake():
+            surface = self._new_surface(0, 0)
+            player_class.draw_small_jack(surface, SPRITE_MARGIN, SPRITE_MARGIN)
+            return surface
+
+        sprite = self._get(('small_jack', player_class), bake)
+        screen.blit(sprite, (x - SPRITE_MARGIN, y - SPRITE_MARGIN))
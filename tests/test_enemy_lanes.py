@@ -0,0 +1,62 @@
+import random
+
+from enemy_types import EnemyLanes, Snake
+from game_input import PolicyInput
+from jumping_jack import Game
+
+PLATFORMS = [340, 280, 220, 160, 100]
+
+
+def snake(lane, x, direction):
+    enemy = Snake(PLATFORMS, 1.5, lane)
+    enemy.place(x, direction)
+    return enemy
+
+
+def step(lanes, enemies, frames):
+    for _ in range(frames):
+        for enemy in enemies:
+            enemy.update()
+        lanes.positions_changed()
+
+
+def test_lanes_stay_sorted_without_crossings():
+    lanes = EnemyLanes(PLATFORMS)
+    enemies = [snake(0, 100, 1), snake(0, 300, 1), snake(1, 500, -1), snake(1, 600, -1)]
+    for enemy in enemies:
+        lanes.add(enemy)
+    step(lanes, enemies, 50)
+    assert lanes.unsorted == set()
+    assert lanes.lane_xs[0] == [enemy.x for enemy in enemies[:2]]
+
+
+def test_only_a_lane_with_a_crossing_is_resorted():
+    lanes = EnemyLanes(PLATFORMS)
+    enemies = [snake(0, 100, 1), snake(0, 200, -1), snake(2, 100, 1), snake(2, 400, 1)]
+    for enemy in enemies:
+        lanes.add(enemy)
+    step(lanes, enemies, 50)  # The lane 0 pair has passed each other
+    assert lanes.unsorted == {0}
+    assert lanes.enemies_between(0, 0, 800) == [enemies[1], enemies[0]]
+    assert lanes.unsorted == set()
+
+
+def test_queries_match_a_full_scan():
+    for seed in range(6):
+        rng = random.Random(seed)
+        game = Game(headless=True, seed=seed)
+        game.level = 1 + seed * 2
+        game.setup_level()
+        for _ in range(20):
+            game.spawn_enemy()
+        game.input_source = PolicyInput(lambda _game: rng.choice([4, 4, 6, 5, 2, 1, 0]))
+        for _ in range(1500):
+            if game.lives <= 0:
+                break
+            game.update()
+            expected = [enemy for enemy in game.enemies if enemy.check_collision(game.player)]
+            found = [enemy for enemy in game.enemy_lanes.collision_candidates(game.player)
+                     if enemy.check_collision(game.player)]
+            assert sorted(map(id, found)) == sorted(map(id, expected))
+            for lane, enemies in enumerate(game.enemy_lanes.lanes):
+                assert all(enemy.current_platform_index == lane for enemy in enemies)
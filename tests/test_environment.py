@@ -0,0 +1,61 @@
+import random
+
+import numpy as np
+import pytest
+
+from environment import JumpingJackEnv
+
+
+def play(env, seed, steps=60):
+    observation, info = env.reset(seed=seed)
+    trace = [(observation.copy(), info)]
+    actions = random.Random(seed)
+    for _ in range(steps):
+        observation, reward, terminated, truncated, info = env.step(actions.randrange(8))
+        trace.append((observation.copy(), reward, terminated, truncated, info))
+        if terminated or truncated:
+            break
+    return trace
+
+
+def same_trace(a, b):
+    return len(a) == len(b) and all(
+        np.array_equal(step_a[0], step_b[0]) and step_a[1:] == step_b[1:] for step_a, step_b in zip(a, b))
+
+
+def test_reset_with_a_seed_is_deterministic():
+    env = JumpingJackEnv(frame_skip=4)
+    first = play(env, seed=7)
+    assert same_trace(first, play(env, seed=7))
+    assert same_trace(first, play(JumpingJackEnv(frame_skip=4), seed=7))
+    assert not np.array_equal(first[-1][0], play(env, seed=8)[-1][0])
+
+
+def test_truncation_is_not_termination():
+    env = JumpingJackEnv(frame_skip=4, max_frames=8)
+    env.reset(seed=1)
+    assert env.step(0)[2:4] == (False, False)
+    _, _, terminated, truncated, _ = env.step(0)
+    assert (terminated, truncated) == (False, True)
+    with pytest.raises(RuntimeError):
+        env.step(0)
+    env.reset(seed=1)
+    env.step(0)  # A new episode steps again
+
+
+def test_stepping_after_game_over_raises():
+    env = JumpingJackEnv(frame_skip=4)
+    env.reset(seed=1)
+    env.game.lives = 1
+    env.game.invincibility_timer = 0
+    actions = random.Random(1)
+    terminated = False
+    for _ in range(2000):
+        _, _, terminated, truncated, info = env.step(actions.randrange(8))
+        if terminated:
+            break
+    assert terminated and not truncated and info['lives'] == 0
+    frames = env.frames
+    with pytest.raises(RuntimeError):
+        env.step(0)
+    assert env.frames == frames
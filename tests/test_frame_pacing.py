@@ -0,0 +1,82 @@
+from constants import FPS
+from jumping_jack import FramePacer
+
+TICK = 1.0 / FPS
+
+
+class FakeTimer:
+    """A clock that only moves when the test sleeps or works, and records the sleeps"""
+
+    def __init__(self, overshoot=0.0, early=0.0):
+        self.now = 0.0
+        self.overshoot = overshoot  # Every sleep wakes this much late...
+        self.early = early  # ...or this fraction of the time asked for early
+        self.sleeps = []
+        self.reads = 0
+
+    def clock(self):
+        self.reads += 1
+        self.now += 1e-7  # Reading the clock takes a little time, so a spin ends
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds * (1 - self.early) + self.overshoot
+
+
+def run_frames(timer, frames, load, **pacer_options):
+    pacer = FramePacer(TICK, clock=timer.clock, sleep=timer.sleep, **pacer_options)
+    pacer.wait()
+    timer.started = timer.now
+    ticks = []
+    for frame in range(frames):
+        ticks.append(pacer.ticks_due())
+        timer.now += load(frame)
+        pacer.wait()
+    return pacer, ticks
+
+
+def test_one_tick_per_frame_under_steady_load():
+    timer = FakeTimer()
+    pacer, ticks = run_frames(timer, 120, lambda frame: 0.006)
+    assert pacer.spin_margin == 0.0
+    assert ticks == [1] * 120
+
+
+def test_slow_frames_are_caught_up():
+    timer = FakeTimer()
+    _, ticks = run_frames(timer, 60, lambda frame: 0.04 if frame % 10 == 5 else 0.004)
+    assert ticks.count(0) == 0
+    assert ticks[6:8] == [2, 1]  # 40 ms is 2.4 ticks; the 0.4 is kept and shortens the next wait
+    # The stalls don't slow the simulation down
+    assert abs(sum(ticks) - (timer.now - timer.started) * FPS) <= 1
+
+
+def test_stalls_beyond_the_catch_up_limit_are_dropped():
+    timer = FakeTimer()
+    _, ticks = run_frames(timer, 3, lambda frame: 1.0 if frame == 0 else 0.0)
+    assert ticks[1] == 5
+
+
+def test_precise_sleep_is_not_spun():
+    timer = FakeTimer(overshoot=0.0005)
+    pacer, ticks = run_frames(timer, 60, lambda frame: 0.006)
+    assert pacer.spin_margin == 0.0
+    assert ticks == [1] * 60
+    assert timer.reads < 60 * 5  # A few clock reads per frame, no polling loop
+
+
+def test_coarse_sleep_spins_only_the_measured_margin():
+    timer = FakeTimer(overshoot=0.005)
+    pacer, ticks = run_frames(timer, 60, lambda frame: 0.006)
+    assert 0.005 <= pacer.spin_margin < 0.006
+    assert ticks == [1] * 60
+    # Sleeps stop early enough for their lateness, so no frame is late
+    assert timer.now - timer.started < 60 * TICK + 0.001
+
+
+def test_early_wakeups_sleep_again():
+    timer = FakeTimer(early=0.5)
+    pacer, ticks = run_frames(timer, 60, lambda frame: 0.006, spin_margin=0.0)
+    assert ticks == [1] * 60
+    assert len(timer.sleeps) > 60
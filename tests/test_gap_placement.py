@@ -0,0 +1,32 @@
+import random
+
+from constants import SCREEN_WIDTH
+from game_platform import GapPlacer, GAP_START_MIN, GAP_START_MAX
+
+
+def min_spacing(placed):
+    """Smallest distance between gap centers starting on the same platform, around the screen"""
+    centers = {}
+    for level, gap_start, gap_width in placed:
+        assert GAP_START_MIN <= gap_start <= GAP_START_MAX
+        centers.setdefault(level, []).append(gap_start + gap_width / 2)
+    spacing = SCREEN_WIDTH
+    for level_centers in centers.values():
+        for i, center in enumerate(level_centers):
+            for other in level_centers[i + 1:]:
+                distance = abs(center - other)
+                spacing = min(spacing, distance, SCREEN_WIDTH - distance)
+    return spacing
+
+
+def test_35_gaps_keep_their_spacing():
+    # Starts between 50 and 700 fit at most 7 gaps 100 pixels apart on each of the 5 platforms
+    for seed in range(100):
+        placer = GapPlacer(5, random.Random(seed), min_distance=100, count=35)
+        assert min_spacing([placer.place() for _ in range(35)]) >= 100
+
+
+def test_spacing_only_breaks_when_full():
+    placer = GapPlacer(5, random.Random(1), min_distance=100, count=36)
+    placed = [placer.place() for _ in range(36)]
+    assert min_spacing(placed[:35]) >= 100
@@ -0,0 +1,121 @@
+import random
+from datetime import datetime, timedelta
+
+import leaderboard as leaderboard_module
+from leaderboard import WEEK_DAYS, Leaderboard
+
+
+def add_scores_over_days(monkeypatch, leaderboard, days, per_day, rng):
+    """Add per_day random results on each of days consecutive days; returns (entries, last day)"""
+    now = [datetime(2024, 3, 1, 12, 0)]
+
+    class FakeDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return now[0]
+
+    monkeypatch.setattr(leaderboard_module, 'datetime', FakeDatetime)
+    entries = []
+    for day in range(days):
+        now[0] = datetime(2024, 3, 1, 12, 0) + timedelta(days=day)
+        for _ in range(per_day):
+            entries.append(leaderboard.add_score(rng.choice("abcdefg"), rng.randrange(0, 500, 10),
+                                                 rng.randint(1, 4)))
+    return entries, now[0].date()
+
+
+def brute_force_sort(entries):
+    # Level, then score, both descending; equal results keep the order they were added in
+    return sorted(entries, key=lambda entry: (-entry['level'], -entry['score']))
+
+
+def test_indexes_survive_a_restart(tmp_path):
+    filename = str(tmp_path / 'leaderboard.json')
+    leaderboard = Leaderboard(filename, top_k=5, compact_every=3)
+    for i in range(8):
+        leaderboard.add_score(f"player{i}", 100 * (i + 1), 1)
+    # The weakest player's only score is long out of the top 5
+    assert leaderboard.personal_best("player0") == (1, 100)
+    daily = leaderboard.get_daily_scores()
+    weekly = leaderboard.get_weekly_scores()
+    leaderboard.close()
+
+    restarted = Leaderboard(filename, top_k=5, compact_every=3)
+    assert restarted.snapshot_seq > 0  # Loaded through a compacted snapshot
+    assert restarted.get_top_scores() == leaderboard.get_top_scores()
+    assert restarted.get_daily_scores() == daily
+    assert len(daily) == 8  # The day's own list isn't limited by the top 5
+    assert restarted.get_weekly_scores() == weekly
+    for i in range(8):
+        assert restarted.personal_best(f"player{i}") == (1, 100 * (i + 1))
+
+
+def test_rank_and_position(tmp_path):
+    leaderboard = Leaderboard(None)
+    entries = [leaderboard.add_score("a", score, level) for score, level in ((50, 1), (80, 1), (10, 2), (80, 1))]
+    assert leaderboard.rank(2, 10) == 1
+    assert leaderboard.rank(1, 80) == 2  # Equal results share a rank
+    assert leaderboard.rank(1, 60) == 4
+    assert [leaderboard.position(entry) for entry in entries] == [3, 1, 0, 2]
+
+
+def test_failed_snapshot_loses_no_scores(tmp_path, monkeypatch):
+    filename = str(tmp_path / 'leaderboard.json')
+    leaderboard = Leaderboard(filename, compact_every=3)
+
+    def disk_full(filename, text):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(leaderboard, '_write_atomically', disk_full)
+    for i in range(7):
+        leaderboard.add_score(f"player{i}", 100 * (i + 1), 1)
+    leaderboard.close()
+    assert leaderboard.snapshot_seq == 0
+
+    restarted = Leaderboard(filename)
+    assert [entry['score'] for entry in restarted.get_top_scores()] == [700, 600, 500, 400, 300, 200, 100]
+    assert restarted.last_seq == 7
+
+
+def test_scores_after_a_snapshot_stay_in_the_log(tmp_path):
+    filename = str(tmp_path / 'leaderboard.json')
+    leaderboard = Leaderboard(filename, compact_every=3)
+    for i in range(5):
+        leaderboard.add_score("player", i, 1)
+    leaderboard.close()
+    restarted = Leaderboard(filename)
+    assert 3 <= restarted.snapshot_seq <= 5
+    assert sorted(entry['score'] for entry in restarted.get_top_scores()) == [0, 1, 2, 3, 4]
+
+
+def test_queries_match_a_brute_force_sort(tmp_path, monkeypatch):
+    filename = str(tmp_path / 'leaderboard.json')
+    leaderboard = Leaderboard(filename, top_k=40, compact_every=25, day_top_k=5)
+    entries, last_day = add_scores_over_days(monkeypatch, leaderboard, 10, 30, random.Random(3))
+    leaderboard.close()
+    restarted = Leaderboard(filename, top_k=40, compact_every=25, day_top_k=5)
+    expected = brute_force_sort(entries)
+
+    for board in (leaderboard, restarted):
+        assert board.get_top_scores(40) == expected[:40]
+        for index in range(40):
+            first, page = board.get_page_around(index)
+            assert first <= index < first + len(page) and len(page) == 6
+            assert page == expected[first:first + 6]
+        for level in range(1, 5):
+            for score in range(0, 500, 5):
+                better = sum(1 for entry in expected[:40] if (entry['level'], entry['score']) > (level, score))
+                assert board.rank(level, score) == (better + 1 if better < 40 else None)
+        for name in "abcdefg":
+            assert board.personal_best(name) == max((entry['level'], entry['score'])
+                                                    for entry in entries if entry['name'] == name)
+        for offset in range(WEEK_DAYS):
+            day = last_day - timedelta(days=offset)
+            on_day = [entry for entry in entries if entry['date'][:10] == day.isoformat()]
+            assert board.get_daily_scores(day, limit=5) == brute_force_sort(on_day)[:5]
+        week = [entry for entry in entries
+                if entry['date'][:10] >= (last_day - timedelta(days=WEEK_DAYS - 1)).isoformat()]
+        assert board.get_weekly_scores(last_day, limit=5) == brute_force_sort(week)[:5]
+        # Days before the weekly window are not kept
+        assert board.get_daily_scores(last_day - timedelta(days=WEEK_DAYS)) == []
+        assert len(board._days) == WEEK_DAYS
@@ -0,0 +1,54 @@
+import threading
+
+from benchmark import bench_draw
+from sound_manager import SoundManager
+
+
+def music_threads():
+    return [thread for thread in threading.enumerate() if thread.name == "music"]
+
+
+def test_one_stream_across_levels(tmp_path):
+    sound_manager = SoundManager(cache_dir=str(tmp_path))
+    workers = []
+    try:
+        for level in range(1, 6):
+            sound_manager.start_music(level, 1.2 + (level - 1) * 0.2)
+            workers.append(sound_manager.music.thread)
+            # Starting a level never waits for the previous level's worker...
+            assert workers[-1].is_alive()
+        # ...which exits on its own once flagged
+        for worker in workers[:-1]:
+            worker.join(timeout=5)
+            assert not worker.is_alive()
+        assert music_threads() == [workers[-1]]
+    finally:
+        sound_manager.stop_music(wait=True)
+    assert music_threads() == []
+
+
+def test_draw_benchmark_plays_no_music():
+    for level in (1, 5, 10):
+        bench_draw(level, seed=1, calls=10)
+        assert music_threads() == []
+
+
+def test_silent_windowed_game_runs():
+    from jumping_jack import Game
+    from leaderboard import Leaderboard
+
+    game = Game(leaderboard=Leaderboard(None), sound=False)
+    frames = []
+
+    def handle_events():
+        frames.append(None)
+        if len(frames) >= 10:
+            game.running = False
+
+    game.handle_events = handle_events
+    try:
+        game.run()
+    except SystemExit:
+        pass
+    assert len(frames) == 10
+    assert music_threads() == []
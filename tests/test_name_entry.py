@@ -0,0 +1,27 @@
+import time
+
+import jumping_jack
+from jumping_jack import Game
+
+
+def test_cursor_blinks_in_real_time():
+    # Nothing here starts SDL's timer, so a blink on pygame.time.get_ticks() would stay on
+    game = Game()
+    seen = set()
+    deadline = time.perf_counter() + 1.2
+    while len(seen) < 2 and time.perf_counter() < deadline:
+        game.draw()
+        seen.add(game.cursor_visible())
+        time.sleep(0.01)
+    assert seen == {True, False}
+
+
+def test_cursor_blinks(monkeypatch):
+    game = Game()
+    now = [game.started_at]
+    monkeypatch.setattr(jumping_jack.time, 'perf_counter', lambda: now[0])
+    shown = []
+    for _ in range(8):
+        shown.append(game.cursor_visible())
+        now[0] += 0.25
+    assert shown == [True, True, False, False] * 2
@@ -0,0 +1,44 @@
+import numpy as np
+
+from game_input import PolicyInput
+from jumping_jack import Game
+from rollout_pool import RandomPolicy, RolloutPool
+
+MAX_FRAMES = 300
+
+
+def serial_episode(seed, level):
+    """(observations, rewards, score, level) of one episode played in this process"""
+    game = Game(headless=True, seed=seed)
+    game.input_source = PolicyInput(RandomPolicy(seed), game)
+    if level != 1:
+        game.level = level
+        game.setup_level()
+    observations, rewards = [], []
+    score = game.total_score
+    while game.running and game.lives > 0 and len(rewards) < MAX_FRAMES:
+        game.update()
+        player = game.player
+        observations.append((player.x, player.y, player.velocity_y, game.level, game.lives,
+                             game.invincibility_timer, game.total_score))
+        rewards.append(game.total_score - score)
+        score = game.total_score
+    return (np.array(observations, dtype=np.float32), np.array(rewards, dtype=np.float32),
+            game.total_score, game.level)
+
+
+def test_pool_matches_a_serial_run():
+    jobs = [(seed, 1) for seed in range(5)] + [(5, 3)]
+    # Two slots for six episodes, so slots are reused while other episodes are in flight
+    with RolloutPool(workers=2, max_frames=MAX_FRAMES, slots=2) as pool:
+        for seed, level in jobs:
+            pool.submit(seed, RandomPolicy(seed), level)
+        results = pool.collect()
+
+    assert [(result.seed, result.start_level) for result in results] == jobs
+    for result, (seed, level) in zip(results, jobs):
+        observations, rewards, score, final_level = serial_episode(seed, level)
+        assert result.frames == len(rewards)
+        assert np.array_equal(result.observations, observations)
+        assert np.array_equal(result.rewards, rewards)
+        assert (result.score, result.level) == (score, final_level)
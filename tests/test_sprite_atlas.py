@@ -0,0 +1,51 @@
+import pygame
+
+from constants import WHITE
+from enemy_types import ENEMY_TYPES
+from sprite_cache import SpriteAtlas
+
+PLATFORMS = [340, 280, 220, 160, 100]
+
+
+def pixels(surface):
+    return pygame.image.tostring(surface, 'RGB')
+
+
+def render(draw):
+    screen = pygame.Surface((200, 120))
+    screen.fill(WHITE)
+    draw(screen)
+    return pixels(screen)
+
+
+def test_sprites_match_a_direct_draw():
+    atlas = SpriteAtlas()
+    for enemy_class in ENEMY_TYPES.values():
+        enemy = enemy_class(PLATFORMS, 1.5, 0)
+        enemy.x, enemy.y = 70, 40
+        for color_variant in range(len(enemy_class.COLORS)):
+            enemy.color = enemy_class.COLORS[color_variant]
+            for direction in (-1, 1):
+                enemy.direction = direction
+                for frame in range(enemy_class.animation_period):
+                    # Every frame shows its pose, drawn at the first frame the pose stands for
+                    phase = atlas.animation_phase(enemy_class, frame)
+                    enemy.animation_frame = frame
+                    from_atlas = render(lambda screen: atlas.draw_enemy(screen, enemy))
+                    enemy.animation_frame = min(f for f in range(frame + 1)
+                                                if atlas.animation_phase(enemy_class, f) == phase)
+                    assert from_atlas == render(enemy.draw), (enemy_class.__name__, frame)
+
+
+def test_prebaked_level_fits_in_the_atlas():
+    atlas = SpriteAtlas()
+    atlas.prebake(ENEMY_TYPES.values())
+    baked = len(atlas.sprites)
+    assert baked <= atlas.max_sprites
+    screen = pygame.Surface((800, 600))
+    for enemy_class in ENEMY_TYPES.values():
+        enemy = enemy_class(PLATFORMS, 1.5, 0)
+        for frame in range(1000):
+            enemy.animation_frame = frame
+            atlas.draw_enemy(screen, enemy)
+    assert len(atlas.sprites) == baked  # Nothing left to bake lazily
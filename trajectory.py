@@ -0,0 +1,200 @@
+"""Closed-form gap and enemy trajectories.
+
+Gaps and enemies run back and forth across the screen in straight segments:
+position = segment_origin + velocity * segment_frame, and when the position
+passes the far edge the entity moves one lane up or down (bouncing at the top
+and bottom lanes), restarts from a fixed position at that edge and reverses.
+After the first segment the motion is periodic, so the state any number of
+frames ahead can be computed in O(1) instead of by stepping update().
+
+The formulas evaluate exactly the same floating-point expressions as
+Platform.update and BaseEnemy.update, so the results agree with stepping
+bit for bit.
+"""
+from constants import SCREEN_WIDTH
+
+
+def first_frame_reaching(origin, velocity, reached, after=0):
+    """Smallest segment frame k > after with reached(origin + velocity * k).
+
+    reached must be monotonic along the segment (it tests "past the edge").
+    The condition is evaluated with the same expression update() uses, so the
+    answer matches stepping exactly; the search is a galloping then binary
+    search over frames, which is a handful of evaluations for screen-sized
+    segments.
+    """
+    if velocity == 0:
+        return None
+
+    low = after + 1
+    if reached(origin + velocity * low):
+        return low
+
+    # Find some frame where it holds, then binary search down to the first one
+    estimate = after + 2
+    while not reached(origin + velocity * estimate):
+        low = estimate
+        estimate = max(estimate * 2, low + 1)
+    high = estimate
+    while high - low > 1:
+        middle = (low + high) // 2
+        if reached(origin + velocity * middle):
+            high = middle
+        else:
+            low = middle
+    return high
+
+
+def lane_after_moves(lane, vertical_direction, num_lanes, moves):
+    """Lane and vertical direction after `moves` snake-pattern lane changes.
+
+    Lane changes bounce between the bottom and top lane, staying put for one
+    change at each end, so (lane, vertical_direction) cycles through 2 * num_lanes
+    states: up through lanes 0..n-1 with direction 1, then down with -1.
+    """
+    if moves == 0:
+        return lane, vertical_direction
+    phase = lane if vertical_direction == 1 else 2 * num_lanes - 1 - lane
+    phase = (phase + moves) % (2 * num_lanes)
+    if phase < num_lanes:
+        return phase, 1
+    return 2 * num_lanes - 1 - phase, -1
+
+
+class SnakePath:
+    """Piecewise-linear back-and-forth motion with lane changes at the edges.
+
+    velocity(direction) gives the per-frame step for a direction, reached(position,
+    direction) tests whether a segment has gone past its edge, and
+    restart(direction) is where the segment after an edge starts (given the
+    direction it was moving when it reached that edge).
+    """
+
+    def __init__(self, velocity, reached, restart):
+        self.velocity = velocity
+        self.reached = reached
+        self.restart = restart
+
+    def segment_length(self, origin, direction, after=0):
+        """Frame within the segment at which the edge is reached"""
+        return first_frame_reaching(origin, self.velocity(direction),
+                                    lambda position: self.reached(position, direction), after)
+
+    def state_at(self, origin, frame, direction, frames):
+        """(position, segment_origin, segment_frame, direction, lane changes) after `frames` more updates"""
+        end = self.segment_length(origin, direction, frame)
+        if end is None or frame + frames < end:
+            frame += frames
+            return origin + self.velocity(direction) * frame, origin, frame, direction, 0
+
+        # Finish the current segment, then whole back-and-forth cycles, then the remainder
+        remaining = frames - (end - frame)
+        direction = -direction
+        first_origin = self.restart(-direction)
+        first_length = self.segment_length(first_origin, direction)
+        second_origin = self.restart(direction)
+        second_length = self.segment_length(second_origin, -direction)
+
+        cycles, remaining = divmod(remaining, first_length + second_length)
+        moves = 1 + 2 * cycles
+        if remaining < first_length:
+            origin = first_origin
+        else:
+            remaining -= first_length
+            moves += 1
+            origin = second_origin
+            direction = -direction
+        return origin + self.velocity(direction) * remaining, origin, remaining, direction, moves
+
+
+def gap_path(gap):
+    """SnakePath of a gap's x_offset (see Platform.update)"""
+    def reached(x_offset, direction):
+        if direction == 1:
+            return (gap.gap_start + x_offset + gap.gap_width) >= gap.width
+        return (gap.gap_start + x_offset) <= 0
+
+    def restart(direction):
+        # Off the right edge restarts with the gap end at the right edge, off the left with its start at 0
+        return gap.width - gap.gap_start - gap.gap_width if direction == 1 else -gap.gap_start
+
+    return SnakePath(lambda direction: direction * gap.speed, reached, restart)
+
+
+def enemy_path(enemy):
+    """SnakePath of an enemy's x (see BaseEnemy.update)"""
+    def reached(x, direction):
+        if direction == 1:
+            return x >= SCREEN_WIDTH + enemy.width
+        return x <= -(enemy.width * 2)
+
+    def restart(direction):
+        return SCREEN_WIDTH + enemy.width - 1 if direction == 1 else -(enemy.width * 2 - 1)
+
+    return SnakePath(lambda direction: direction * enemy.speed * 0.8, reached, restart)
+
+
+def gap_state_at(gap, frames):
+    """Where a gap will be after `frames` more updates, without changing it.
+
+    Returns a dict of x_offset, direction, gap_current_platform_index,
+    vertical_direction, segment_origin and segment_frame.
+    """
+    x_offset, origin, frame, direction, moves = gap_path(gap).state_at(
+        gap.segment_origin, gap.segment_frame, gap.direction, frames)
+    level, vertical_direction = lane_after_moves(gap.gap_current_platform_index, gap.vertical_direction,
+                                                 gap.num_levels, moves)
+    return {
+        'x_offset': x_offset,
+        'direction': direction,
+        'gap_current_platform_index': level,
+        'vertical_direction': vertical_direction,
+        'segment_origin': origin,
+        'segment_frame': frame,
+    }
+
+
+def enemy_state_at(enemy, frames):
+    """Where an enemy will be after `frames` more updates, without changing it.
+
+    Returns a dict of x, y, direction, current_platform_index,
+    vertical_direction, animation_frame, segment_origin and segment_frame.
+    """
+    x, origin, frame, direction, moves = enemy_path(enemy).state_at(
+        enemy.segment_origin, enemy.segment_frame, enemy.direction, frames)
+    level, vertical_direction = lane_after_moves(enemy.current_platform_index, enemy.vertical_direction,
+                                                 len(enemy.platform_positions), moves)
+    # y is only recomputed on a lane change (which can keep the lane at the top or bottom)
+    y = enemy.platform_positions[level] - enemy.height if moves else enemy.y
+    return {
+        'x': x,
+        'y': y,
+        'direction': direction,
+        'current_platform_index': level,
+        'vertical_direction': vertical_direction,
+        'animation_frame': enemy.animation_frame + frames,
+        'segment_origin': origin,
+        'segment_frame': frame,
+    }
+
+
+def advance_gap(gap, frames):
+    """Skip a gap `frames` updates ahead (keeps its GapIndex up to date)"""
+    state = gap_state_at(gap, frames)
+    old_level = gap.gap_current_platform_index
+    for name, value in state.items():
+        setattr(gap, name, value)
+    if gap.gap_index is not None and state['gap_current_platform_index'] != old_level:
+        gap.gap_index.move(gap, old_level, state['gap_current_platform_index'])
+
+
+def advance_enemy(enemy, frames):
+    """Skip an enemy `frames` updates ahead (keeps its EnemyLanes up to date)"""
+    state = enemy_state_at(enemy, frames)
+    old_level = enemy.current_platform_index
+    for name, value in state.items():
+        setattr(enemy, name, value)
+    if enemy.lanes is not None:
+        enemy.lanes.move(enemy, old_level, enemy.current_platform_index)
+        enemy.lanes.positions_changed()
+